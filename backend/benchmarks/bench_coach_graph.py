@@ -0,0 +1,67 @@
+# benchmarks/bench_coach_graph.py - Per-request orchestration overhead of AIFitnessCoach
+#
+# Run from backend/:  python -m benchmarks.bench_coach_graph [iterations]
+#
+# Uses a zero-latency stub LLM and an empty retriever so the numbers isolate
+# LangGraph build/compile/invoke cost from model time.
+
+import sys
+import time
+from statistics import mean, median
+
+from benchmarks.stubs import STUB_PROFILE, make_stub_llm, make_stub_retriever
+from services.coach import AIFitnessCoach, build_initial_graph, get_graph_build_stats
+
+
+def _time_runs(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def _report(label, timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+    print(f"{label:<28} mean {mean(timings):7.2f}ms  median {median(timings):7.2f}ms  p95 {p95:7.2f}ms")
+
+
+def main(iterations=200):
+    # Plan cache off: every run must go through the generation node
+    coach = AIFitnessCoach(llm=make_stub_llm(), retriever=make_stub_retriever(), plan_cache=False)
+
+    def rebuild_per_request():
+        # Behaviour before the graph registry: compile a fresh StateGraph per call
+        graph = build_initial_graph()
+        graph.invoke(_fresh_state(), config=coach._graph_config())
+
+    def cached_graph():
+        coach.run_initial(dict(STUB_PROFILE))
+
+    build_only = _time_runs(build_initial_graph, iterations)
+    rebuilt = _time_runs(rebuild_per_request, iterations)
+    cached = _time_runs(cached_graph, iterations)
+
+    print(f"🏁 {iterations} iterations, stub LLM calls: {coach.llm.counter.calls}")
+    _report("graph build+compile only", build_only)
+    _report("rebuild per request", rebuilt)
+    _report("cached compiled graph", cached)
+    print(f"🧩 Graph build stats: {get_graph_build_stats()}")
+
+
+def _fresh_state():
+    from langchain_core.messages import HumanMessage
+    profile = dict(STUB_PROFILE)
+    return {
+        "user_data": profile,
+        "fitness_plan": "",
+        "feedback": "",
+        "progress": [],
+        "messages": [HumanMessage(content=str(profile))],
+    }
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,67 @@
+# benchmarks/bench_followup_pipeline.py - Multi-agent vs fused follow-up latency
+#
+# Run from backend/:  python -m benchmarks.bench_followup_pipeline [llm_latency_seconds] [iterations]
+#
+# The stub LLM sleeps for a fixed latency per call, so wall time is dominated by
+# the number of serial model calls each pipeline makes.
+
+import sys
+import json
+import time
+from statistics import mean
+
+from benchmarks.stubs import STUB_PLAN, STUB_PROFILE, make_stub_llm, make_stub_retriever
+from services.coach import AIFitnessCoach
+
+FEEDBACK_CASES = [
+    ("general", "Can you make it a bit harder and add more core work?"),
+    ("rule", "Please remove day 2"),
+]
+
+
+def _stub_response(prompt):
+    text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+    if "Return ONLY the JSON object" in text:
+        return json.dumps({
+            "intent": "plan_change",
+            "response": "I've added more core work and bumped the intensity.",
+            "plan": STUB_PLAN.replace("3 sets x 10 reps", "4 sets x 12 reps"),
+        })
+    return STUB_PLAN
+
+
+def _measure(fn, iterations):
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return mean(timings)
+
+
+def main(latency=0.25, iterations=5):
+    user_data = dict(STUB_PROFILE)
+    print(f"🏁 stub LLM latency {latency * 1000:.0f}ms, {iterations} iterations per case")
+
+    for label, feedback in FEEDBACK_CASES:
+        for mode in ("multi_agent", "fused"):
+            llm = make_stub_llm(response=_stub_response, latency=latency)
+            coach = AIFitnessCoach(llm=llm, retriever=make_stub_retriever())
+
+            if mode == "multi_agent":
+                run = lambda: coach.run_followup("bench-user", STUB_PLAN, feedback, user_data=dict(user_data))
+            else:
+                run = lambda: coach.run_followup_fused("bench-user", STUB_PLAN, feedback, user_data=dict(user_data))
+
+            avg_ms = _measure(run, iterations)
+            calls = llm.counter.calls / iterations
+            print(f"{label:<8} {mode:<12} mean {avg_ms:8.1f}ms  LLM calls/request {calls:.1f}")
+            if mode == "multi_agent" and coach.last_followup_timings:
+                print(f"{'':<8} {'':<12} branches {coach.last_followup_timings}")
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 0.25,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
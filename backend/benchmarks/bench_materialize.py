@@ -0,0 +1,106 @@
+# benchmarks/bench_materialize.py - Write throughput of program materialization
+#
+# Run from backend/:  python -m benchmarks.bench_materialize [weeks] [days] [exercises_per_day]
+#
+# Builds one parsed plan in the frontend structure and writes it into an
+# in-memory SQLite database (DATABASE_URL is forced to sqlite://) twice:
+#   legacy  - the old path: load + delete each existing row, one ORM object and
+#             one print per new row
+#   bulk    - exercise_store.materialize_plan_data(): one DELETE, batched multi-row INSERTs
+# Each path replaces an already-materialized program, as a re-parse does.
+
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("PARSE_ON_COMMIT", "false")
+
+from app import app
+from models.db import db
+from models.workout_program import WorkoutProgram
+from models.workoutLog_model import WorkoutExercise
+from services.exercise_store import materialize_plan_data
+from benchmarks.bench_workout_reads import QueryCounter
+
+USER_ID = "bench-materialize-user"
+
+
+def _plan_data(weeks, days, exercises_per_day):
+    return {
+        f"Week {week}": {
+            f"Day {day}": {
+                "label": f"Day {day} focus",
+                "exercises": [
+                    {"name": f"Exercise {index}", "sets": 3, "reps": 10, "rest_seconds": 60}
+                    for index in range(exercises_per_day)
+                ],
+            }
+            for day in range(1, days + 1)
+        }
+        for week in range(1, weeks + 1)
+    }
+
+
+def legacy_materialize(parsed_data, program_id):
+    """The per-object write path this benchmark compares against"""
+    for existing in WorkoutExercise.query.filter_by(program_id=program_id).all():
+        db.session.delete(existing)
+
+    count = 0
+    for week_key, week_data in parsed_data.items():
+        week_num = int(week_key.replace("Week ", ""))
+        for day_key, day_data in week_data.items():
+            day_num = int(day_key.replace("Day ", ""))
+            for exercise in day_data["exercises"]:
+                db.session.add(WorkoutExercise(
+                    program_id=program_id,
+                    week=week_num,
+                    day=day_num,
+                    day_label=day_data["label"],
+                    name=exercise["name"],
+                    sets=exercise["sets"],
+                    reps=exercise["reps"],
+                    rest_seconds=exercise["rest_seconds"],
+                    completed=False,
+                ))
+                print(f"💾 Saved exercise: {exercise['name']} (Week {week_num}, Day {day_num})")
+                count += 1
+    return count
+
+
+def _run(label, write, parsed_data, program_id, rows):
+    with QueryCounter(db.engine) as counter, redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        write(parsed_data, program_id)
+        db.session.commit()
+        elapsed = time.perf_counter() - start
+    stored = WorkoutExercise.query.filter_by(program_id=program_id).count()
+    assert stored == rows, f"{label} stored {stored} rows, expected {rows}"
+    print(f"{label:<8} {counter.count:5d} statements  {elapsed * 1000:8.2f}ms  "
+          f"{rows / elapsed:10.0f} rows/s")
+    return elapsed
+
+
+def main(weeks=8, days=5, exercises_per_day=6):
+    parsed_data = _plan_data(weeks, days, exercises_per_day)
+    rows = weeks * days * exercises_per_day
+
+    with app.app_context():
+        db.create_all()
+        program = WorkoutProgram(user_id=USER_ID, program_text="### Day 1: Bench\n- Push-ups: 3 sets x 10 reps")
+        db.session.add(program)
+        db.session.commit()
+        materialize_plan_data(parsed_data, program.id)
+        db.session.commit()
+        print(f"🏁 Replacing {rows} exercises ({weeks} weeks x {days} days x {exercises_per_day})")
+
+        legacy = _run("legacy", legacy_materialize, parsed_data, program.id, rows)
+        bulk = _run("bulk", materialize_plan_data, parsed_data, program.id, rows)
+        print(f"speedup  {legacy / bulk:.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,79 @@
+# benchmarks/bench_parser.py - Throughput and confidence of the plan parser
+#
+# Run from backend/:  python -m benchmarks.bench_parser [iterations] [--db]
+#
+# With --db the corpus is every stored WorkoutProgram.program_text; otherwise a
+# small built-in corpus of generator-style and free-form plans is used. No LLM
+# is passed, so the numbers are the deterministic engine only; the confidence
+# histogram shows how many plans would have needed the LLM.
+
+import sys
+import time
+from collections import Counter
+from statistics import mean
+
+from benchmarks.stubs import STUB_PLAN
+from services.plan_parser import PARSE_LLM_THRESHOLD, parse_program
+
+NUMBERED_PLAN = """### Week 1
+### Day 1: Push Day
+**Main Workout:**
+1. Bench Press (Barbell) - 3x8-10, Rest: 90 seconds
+2. Shoulder Press - 3x8, Rest: 60 seconds
+3. Tricep Dips - 3x12, Rest: 60 seconds
+
+### Day 2: Pull Day
+**Main Workout:**
+1. Pull-ups - 3x6-8, Rest: 2 minutes
+2. Barbell Rows - 4x10, Rest: 90 seconds
+"""
+
+BARE_HEADER_PLAN = """Day 1: Upper Body
+- Push-ups: 3 sets x 10 reps, Rest: 60 sec
+- Pike push-ups: 3 sets x 8 reps
+
+Day 2: Lower Body
+- Squats: 3 sets x 15 reps, Rest: 60 sec
+- Lunges: 3 sets x 10 reps
+"""
+
+FREE_FORM_PLAN = """Monday - upper body: push ups, rows and some planks.
+Wednesday - legs: squats and lunges until tired.
+Friday - go for a run."""
+
+
+def _corpus(from_db):
+    if not from_db:
+        return [STUB_PLAN, NUMBERED_PLAN, BARE_HEADER_PLAN, FREE_FORM_PLAN]
+
+    from app import app
+    from models.workout_program import WorkoutProgram
+    with app.app_context():
+        return [row.program_text for row in WorkoutProgram.query.with_entities(WorkoutProgram.program_text)
+                if row.program_text]
+
+
+def main(iterations=200, from_db=False):
+    corpus = _corpus(from_db)
+    print(f"🏁 {len(corpus)} plans x {iterations} iterations (LLM threshold {PARSE_LLM_THRESHOLD})")
+
+    timings = []
+    sources = Counter()
+    below_threshold = 0
+    for text in corpus:
+        result = parse_program(text)
+        sources[result.source] += 1
+        below_threshold += result.confidence < PARSE_LLM_THRESHOLD
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            parse_program(text)
+        timings.append((time.perf_counter() - start) * 1000 / iterations)
+
+    print(f"mean parse time {mean(timings):.3f}ms  max {max(timings):.3f}ms")
+    print(f"sources {dict(sources)}  would call LLM: {below_threshold}/{len(corpus)}")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if a != "--db"]
+    main(int(args[0]) if args else 200, "--db" in sys.argv)
@@ -0,0 +1,46 @@
+# benchmarks/bench_plan_cache.py - Signup burst with and without the plan cache
+#
+# Run from backend/:  python -m benchmarks.bench_plan_cache [concurrent_users] [llm_latency_seconds]
+#
+# Every simulated user has the same normalized profile, so with the cache on the
+# burst should cost one generation and everyone else is served from the cache.
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stubs import STUB_PLAN, STUB_PROFILE, make_stub_llm, make_stub_retriever
+from services.coach import AIFitnessCoach
+from services.plan_cache import PlanCache
+
+
+def _burst(coach, users):
+    def signup(i):
+        profile = dict(STUB_PROFILE, firebase_uid=f"bench-user-{i}")
+        return coach.run_initial(profile)["fitness_plan"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        plans = list(pool.map(signup, range(users)))
+    return (time.perf_counter() - start) * 1000, plans
+
+
+def main(users=20, latency=0.25):
+    print(f"🏁 {users} concurrent identical signups, stub LLM latency {latency * 1000:.0f}ms")
+
+    for label, plan_cache in (("no cache", False), ("plan cache", PlanCache()),
+                              ("plan cache + variation", PlanCache(variation=True))):
+        llm = make_stub_llm(response=STUB_PLAN, latency=latency)
+        coach = AIFitnessCoach(llm=llm, retriever=make_stub_retriever(), plan_cache=plan_cache)
+        elapsed_ms, plans = _burst(coach, users)
+        distinct = len(set(plans))
+        print(f"{label:<24} {elapsed_ms:8.1f}ms  LLM calls {llm.counter.calls:3d}  distinct plans {distinct}")
+        if plan_cache:
+            print(f"{'':<24} stats {plan_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 0.25,
+    )
@@ -0,0 +1,93 @@
+# benchmarks/bench_workout_reads.py - SQL round-trips of the workout screen
+#
+# Run from backend/:  python -m benchmarks.bench_workout_reads [weeks] [days] [exercises_per_day]
+#
+# Seeds one program in an in-memory SQLite database (DATABASE_URL is forced to
+# sqlite://), then counts the statements issued by load_plan_data() and by a
+# full GET /workout/current/<user_id>, cold and then served from the plan view
+# cache. load_plan_data must stay at exactly one query no matter how many weeks
+# the program has; tests/test_workout_reads.py enforces the statement budgets.
+
+import os
+import sys
+import time
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("PARSE_ON_COMMIT", "false")
+
+from sqlalchemy import event
+
+from app import app
+from models.db import db
+from models.workout_program import WorkoutProgram
+from models.workoutLog_model import WorkoutExercise
+
+PLAN_DATA_QUERY_BUDGET = 1
+USER_ID = "bench-reads-user"
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *_args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *_exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def _seed(weeks, days, exercises_per_day):
+    program = WorkoutProgram(user_id=USER_ID, program_text="### Day 1: Bench\n- Push-ups: 3 sets x 10 reps")
+    db.session.add(program)
+    db.session.flush()
+    db.session.add_all([
+        WorkoutExercise(
+            program_id=program.id, week=week, day=day, day_label=f"Day {day} focus",
+            name=f"Exercise {index}", sets=3, reps=10, rest_seconds=60,
+            completed=week < weeks,
+        )
+        for week in range(1, weeks + 1)
+        for day in range(1, days + 1)
+        for index in range(exercises_per_day)
+    ])
+    db.session.commit()
+    return program.id
+
+
+def main(weeks=8, days=4, exercises_per_day=6):
+    from services.plan_view import load_plan_data, invalidate
+
+    with app.app_context():
+        db.create_all()
+        program_id = _seed(weeks, days, exercises_per_day)
+        print(f"🏁 Program with {weeks} weeks x {days} days x {exercises_per_day} exercises")
+
+        with QueryCounter(db.engine) as counter:
+            start = time.perf_counter()
+            plan_data, total, completed = load_plan_data(program_id)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"load_plan_data           {counter.count:3d} queries  {elapsed_ms:7.2f}ms  "
+              f"{total} exercises ({completed} completed)")
+        assert counter.count <= PLAN_DATA_QUERY_BUDGET, \
+            f"load_plan_data issued {counter.count} queries (budget {PLAN_DATA_QUERY_BUDGET})"
+        assert len(plan_data) == weeks and total == weeks * days * exercises_per_day
+
+        client = app.test_client()
+        invalidate()
+        for label in ("cold", "cached"):
+            with QueryCounter(db.engine) as counter:
+                start = time.perf_counter()
+                response = client.get(f"/workout/current/{USER_ID}")
+                elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"GET /workout/current {label:<6} {counter.count:3d} queries  {elapsed_ms:7.2f}ms  "
+                  f"status {response.status_code}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
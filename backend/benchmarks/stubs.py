@@ -0,0 +1,96 @@
+# benchmarks/stubs.py - Deterministic LLM / retriever stand-ins for offline benchmarks
+
+import time
+import threading
+from langchain_core.runnables import RunnableLambda
+
+STUB_PLAN = """## 3-Day Circuit Training Workout Plan for General Fitness
+
+This 3-day workout plan is designed for General Fitness using bodyweight only. Each workout takes 30-45 minutes.
+
+### Day 1: Upper Body
+**Warm-up (5-10 min):**
+- Jumping jacks: 30 seconds
+- Arm circles: 30 seconds
+
+**Main Workout (30-35 min):**
+- Push-ups: 3 sets x 10 reps, Rest: 60 sec
+- Tricep dips: 3 sets x 12 reps, Rest: 60 sec
+- Pike push-ups: 3 sets x 8 reps, Rest: 60 sec
+- Plank: 3 sets x 30 seconds, Rest: 45 sec
+
+**Cool-down (5 min):**
+- Full body stretch: 30 seconds per muscle group
+
+### Day 2: Lower Body
+**Warm-up (5-10 min):**
+- Leg swings: 10 each leg
+
+**Main Workout (30-35 min):**
+- Squats: 3 sets x 15 reps, Rest: 60 sec
+- Lunges: 3 sets x 10 reps, Rest: 60 sec
+- Glute bridges: 3 sets x 12 reps, Rest: 60 sec
+- Calf raises: 3 sets x 20 reps, Rest: 45 sec
+
+**Cool-down (5 min):**
+- Deep breathing: 1 minute
+
+### Day 3: Full Body Cardio
+**Warm-up (5-10 min):**
+- High knees: 30 seconds
+
+**Main Workout (30-35 min):**
+- Burpees: 3 sets x 8 reps, Rest: 90 sec
+- Mountain climbers: 3 sets x 20 reps, Rest: 60 sec
+- Jump squats: 3 sets x 10 reps, Rest: 60 sec
+
+**Cool-down (5 min):**
+- Full body stretch: 30 seconds per muscle group
+
+## Training Notes:
+- **Progression:** Increase reps by 2-3 each week
+- **Frequency:** Perform 3 days per week with rest days in between
+"""
+
+STUB_PROFILE = {
+    "firebase_uid": "bench-user",
+    "gender": "Other",
+    "age": 30,
+    "goal": "General Fitness",
+    "height": 175,
+    "weight": 70,
+    "experience": "Beginner (1-6 months)",
+    "days_per_week": "3 days",
+    "equipment": "Bodyweight Only",
+    "style": "Circuit Training",
+}
+
+
+class CountingStub:
+    """Callable that returns `response` (or `response(prompt)`) after `latency` seconds and counts calls"""
+
+    def __init__(self, response, latency=0.0):
+        self.response = response
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, **_kwargs):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if callable(self.response):
+            return self.response(prompt)
+        return self.response
+
+
+def make_stub_llm(response=STUB_PLAN, latency=0.0):
+    counter = CountingStub(response, latency)
+    llm = RunnableLambda(counter)
+    llm.counter = counter
+    return llm
+
+
+def make_stub_retriever():
+    return RunnableLambda(lambda _query: [])
@@ -1,7 +1,18 @@
 from app import app, db
 from models.user_profile import UserProfile
 from models.workout_program import WorkoutProgram
-from models.workoutLog_model import WorkoutLog
+from models.workoutLog_model import WorkoutLog, WorkoutTemplate, WorkoutTemplateExercise
+from models.plan_template import PlanTemplate
+from models.generation_job import GenerationJob
+from models.single_flight_lock import SingleFlightLock
+from models.program_structure import ProgramStructure
+from models.parse_cache_entry import ParseCacheEntry
+from models.program_parse_job import ProgramParseJob
+from models.program_week_marker import ProgramWeekMarker
+from models.plan_view import PlanView
+from models.program_version import ProgramVersion, ExerciseChange
+from models.progress_summary import ProgressSummary
+from models.user_streak import UserStreak
 
 with app.app_context():
     db.create_all()
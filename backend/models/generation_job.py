@@ -0,0 +1,19 @@
+# models/generation_job.py
+from datetime import datetime
+from models.db import db
+
+class GenerationJob(db.Model):
+    __tablename__ = 'generation_job'
+    id = db.Column(db.String(36), primary_key=True)          # uuid4 hex
+    user_id = db.Column(db.String(255), nullable=False, index=True)
+    kind = db.Column(db.String(50), nullable=False)          # "generate" | "follow_up"
+    request_hash = db.Column(db.String(64), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued, running, succeeded, failed
+    progress = db.Column(db.String(100))                     # human readable stage
+    payload = db.Column(db.Text)                             # request JSON
+    result = db.Column(db.Text)                              # response JSON
+    status_code = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    program_id = db.Column(db.Integer, db.ForeignKey("workout_program.id"))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,15 @@
+# models/parse_cache_entry.py
+from datetime import datetime
+from models.db import db
+
+class ParseCacheEntry(db.Model):
+    """Parsed weeks for a program_text, shared by every program with the same text"""
+    __tablename__ = 'parse_cache_entry'
+    text_hash = db.Column(db.String(64), primary_key=True)        # sha256 of program_text
+    parser_version = db.Column(db.Integer, primary_key=True)      # services.plan_parser.PARSER_VERSION
+    source = db.Column(db.String(20), nullable=False)             # rules, llm, json
+    confidence = db.Column(db.Float, nullable=False, default=0.0)
+    weeks_json = db.Column(db.Text, nullable=False)               # ParseResult.weeks (no program ids)
+    hits = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_hit_at = db.Column(db.DateTime)
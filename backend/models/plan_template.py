@@ -0,0 +1,16 @@
+# models/plan_template.py
+from datetime import datetime
+from models.db import db
+
+class PlanTemplate(db.Model):
+    """Pre-generated plan (services/template_pregen.py) for a WorkoutTemplate row"""
+    __tablename__ = 'plan_template'
+    template_id = db.Column(db.Integer, db.ForeignKey("workout_template.id"), primary_key=True)
+    profile_key = db.Column(db.String(64), unique=True, index=True, nullable=False)  # sha256 of the normalized profile tuple
+    equipment = db.Column(db.String(255))
+    style = db.Column(db.String(100))
+    plan_text = db.Column(db.Text, nullable=False)
+    profile_count = db.Column(db.Integer, default=0)  # users with this profile when generated
+    times_served = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,12 @@
+# models/plan_view.py
+from datetime import datetime
+from models.db import db
+
+class PlanView(db.Model):
+    """Serialized GET /workout/current body per program; shared store of services/plan_view.py"""
+    __tablename__ = 'plan_view'
+    program_id = db.Column(db.Integer, db.ForeignKey("workout_program.id"), primary_key=True)
+    user_id = db.Column(db.String(255), index=True)
+    body = db.Column(db.Text, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=0)  # ProgramVersion.version the body was built at
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,14 @@
+# models/program_parse_job.py
+from datetime import datetime
+from models.db import db
+
+class ProgramParseJob(db.Model):
+    """Background parsing / WorkoutExercise materialization state of a WorkoutProgram"""
+    __tablename__ = 'program_parse_job'
+    program_id = db.Column(db.Integer, db.ForeignKey("workout_program.id"), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default="pending")  # pending, running, ready, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    exercise_count = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
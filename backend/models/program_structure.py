@@ -0,0 +1,12 @@
+# models/program_structure.py
+from datetime import datetime
+from models.db import db
+
+class ProgramStructure(db.Model):
+    """Parsed plan AST (services/plan_ast.py) stored alongside WorkoutProgram.program_text"""
+    __tablename__ = 'program_structure'
+    program_id = db.Column(db.Integer, db.ForeignKey("workout_program.id"), primary_key=True)
+    version = db.Column(db.Integer, nullable=False)        # PLAN_AST_VERSION used to build plan_json
+    text_hash = db.Column(db.String(64), nullable=False)   # sha256 of the program_text it was parsed from
+    plan_json = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,21 @@
+# models/program_version.py
+from datetime import datetime
+from models.db import db
+
+class ProgramVersion(db.Model):
+    """Monotonic per-program version, bumped by every commit that writes its exercises or logs"""
+    __tablename__ = 'program_version'
+    program_id = db.Column(db.Integer, db.ForeignKey("workout_program.id"), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    # Deltas from versions below this are unavailable (exercises replaced or change log pruned)
+    floor_version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ExerciseChange(db.Model):
+    """One exercise written at one program version; drives /workout/delta"""
+    __tablename__ = 'exercise_change'
+    id = db.Column(db.Integer, primary_key=True)
+    program_id = db.Column(db.Integer, db.ForeignKey("workout_program.id"), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    exercise_id = db.Column(db.Integer, nullable=False)
+    __table_args__ = (db.Index("ix_exercise_change_program_version", "program_id", "version"),)
@@ -0,0 +1,10 @@
+# models/program_week_marker.py
+from datetime import datetime
+from models.db import db
+
+class ProgramWeekMarker(db.Model):
+    """Highest fully completed week per program; drives event-driven week generation"""
+    __tablename__ = 'program_week_marker'
+    program_id = db.Column(db.Integer, db.ForeignKey("workout_program.id"), primary_key=True)
+    highest_completed_week = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
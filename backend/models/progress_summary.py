@@ -0,0 +1,23 @@
+# models/progress_summary.py
+from datetime import datetime
+from models.db import db
+
+class ProgressSummary(db.Model):
+    """Per-program progress counters kept up to date by exercise and log writes (services/progress_summary.py)"""
+    __tablename__ = 'progress_summary'
+    program_id = db.Column(db.Integer, db.ForeignKey("workout_program.id"), primary_key=True)
+    user_id = db.Column(db.String(255), index=True)
+    version = db.Column(db.Integer, nullable=False, default=0)  # ProgramVersion.version the row reflects
+
+    # From WorkoutExercise
+    total_exercises = db.Column(db.Integer, nullable=False, default=0)
+    completed_exercises = db.Column(db.Integer, nullable=False, default=0)
+    completed_days = db.Column(db.Integer, nullable=False, default=0)  # (week, day) pairs with a completed exercise
+    current_week = db.Column(db.Integer, nullable=False, default=1)
+
+    # From WorkoutLog
+    log_count = db.Column(db.Integer, nullable=False, default=0)
+    log_minutes = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    reconciled_at = db.Column(db.DateTime)
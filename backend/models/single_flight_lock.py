@@ -0,0 +1,12 @@
+# models/single_flight_lock.py
+from datetime import datetime
+from models.db import db
+
+class SingleFlightLock(db.Model):
+    __tablename__ = 'single_flight_lock'
+    key = db.Column(db.String(64), primary_key=True)          # sha256 of (uid, endpoint, payload)
+    owner = db.Column(db.String(64), nullable=False)         # worker/thread that holds the flight
+    status = db.Column(db.String(20), nullable=False, default="running")  # running, done
+    result = db.Column(db.Text)                              # JSON [body, status_code] once done
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,13 @@
+# models/user_streak.py
+from datetime import datetime
+from models.db import db
+
+class UserStreak(db.Model):
+    """Workout streak per user, maintained by services/streaks.py"""
+    __tablename__ = 'user_streak'
+    user_id = db.Column(db.String(255), primary_key=True)
+    last_workout_date = db.Column(db.Date)
+    run_days = db.Column(db.Integer, nullable=False, default=0)  # consecutive workout days ending at last_workout_date
+    longest_streak = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    recomputed_at = db.Column(db.DateTime)
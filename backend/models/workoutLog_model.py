@@ -58,6 +58,19 @@ class WorkoutTemplate(db.Model):
     weeks_duration = db.Column(db.Integer)
     days_per_week = db.Column(db.Integer)
     created_by = db.Column(db.String(255))  # user_id or "system"
+
+class WorkoutTemplateExercise(db.Model):
+    __tablename__ = 'workout_template_exercise'
+    id = db.Column(db.Integer, primary_key=True)
+    template_id = db.Column(db.Integer, db.ForeignKey("workout_template.id"), nullable=False, index=True)
+    day = db.Column(db.Integer, nullable=False)
+    day_label = db.Column(db.String(100))
+    position = db.Column(db.Integer, nullable=False)  # order within the day
+    name = db.Column(db.String(255), nullable=False)
+    sets = db.Column(db.Integer)
+    reps = db.Column(db.Integer)
+    rest_seconds = db.Column(db.Integer)
+    notes = db.Column(db.Text)
     
 class ProgressMeasurement(db.Model):
     __tablename__ = 'progress_measurement'
@@ -6,4 +6,6 @@ class WorkoutProgram(db.Model):
     user_id = db.Column(db.String(255), nullable=False)
     program_text = db.Column(db.Text)
     created_at = db.Column(db.DateTime, nullable=False, default=db.func.now())  # Add this
+    # Latest-program lookups (services/plan_view.py) read one entry of this index
+    __table_args__ = (db.Index("ix_workout_program_user_created", "user_id", "created_at"),)
 
@@ -1,6 +1,6 @@
 # backend/routes/dashboard.py - Performance Dashboard API Endpoints
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from models.user_profile import UserProfile
 from models.db import db
 from services.llm_engine import LLMEngine
@@ -9,11 +9,18 @@ from services.agents.performance_dashboard_agent import (
     get_dashboard_widget_data,
     PerformanceDashboardAgent
 )
+from services.program_version import user_version, make_etag, not_modified, with_etag
 import json
 from datetime import datetime
 
 dashboard_bp = Blueprint("dashboard", __name__)
 
+def dashboard_etag(user_id, time_period):
+    """ETag over everything the dashboard reads: the user's program versions, profile and today's date"""
+    profile = UserProfile.query.filter_by(firebase_uid=user_id).first()
+    profile_state = [getattr(profile, column.name) for column in UserProfile.__table__.columns] if profile else None
+    return make_etag("dashboard", user_id, time_period, *user_version(user_id), profile_state, daily=True)
+
 # Initialize LLM Engine
 llm = LLMEngine(provider="ollama", model="qwen2.5:3b-instruct", timeout=180)
 
@@ -34,6 +41,11 @@ def get_full_dashboard(user_id):
         if time_period not in valid_periods:
             return jsonify({"error": f"Invalid period. Must be one of: {valid_periods}"}), 400
         
+        # Unchanged programs, logs and profile since the client's copy (same day): 304
+        etag = dashboard_etag(user_id, time_period)
+        if not_modified(etag):
+            return with_etag(Response(status=304), etag)
+        
         print(f"📊 Generating full dashboard for user: {user_id}, period: {time_period}")
         
         # Generate dashboard
@@ -42,11 +54,11 @@ def get_full_dashboard(user_id):
         if "error" in dashboard_data:
             return jsonify(dashboard_data), 404
         
-        return jsonify({
+        return with_etag(jsonify({
             "success": True,
             "dashboard": dashboard_data,
             "generated_at": datetime.utcnow().isoformat()
-        }), 200
+        }), etag), 200
         
     except Exception as e:
         print(f"❌ Error in get_full_dashboard: {e}")
@@ -1,25 +1,156 @@
 # routes/generateProgram_routes.py
 
-from flask import Blueprint, request, jsonify
-from services.handlers.generator_handler import generate_workout
-from services.handlers.followup_handler import follow_up_workout
+import json
+import queue
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context, url_for
+from services.handlers.generator_handler import generate_workout, REQUIRED_KEYS
+from services.handlers.followup_handler import follow_up_workout, get_followup_metrics
 from services.handlers.check_handler import check_existing_program
+from services.job_queue import JobQueue, ACTIVE_STATUSES, job_to_response
+from services import tracing
+from services.plan_cache import get_plan_cache
+from services.structured_plan import PLAN_OUTPUT_MODE, stats as structured_plan_stats
+from services.single_flight import SingleFlight
 from models.conversation_model import Conversation, Message
 
 
 generate_bp = Blueprint('generate', __name__)
 
+# Background runner for the same handlers the synchronous endpoints use
+plan_jobs = JobQueue()
+plan_jobs.register("generate", generate_workout)
+plan_jobs.register("follow_up", follow_up_workout)
+
+# Concurrent duplicates of the synchronous endpoints share one handler run
+request_flights = SingleFlight()
+
+def _coalesced(endpoint, data, handler):
+    (result, status_code), shared = request_flights.do(endpoint, data, lambda: handler(data))
+    response = jsonify(result)
+    if shared:
+        response.headers["X-Request-Coalesced"] = "true"
+    return response, status_code
+
 @generate_bp.route('/generate-workout', methods=['POST'])
 def generate_program():
     data = request.get_json()
-    result, status_code = generate_workout(data)
-    return jsonify(result), status_code
+    return _coalesced("generate-workout", data, generate_workout)
 
 @generate_bp.route('/chat-follow-up', methods=['POST'])
 def follow_up_program():
     data = request.get_json()
-    result, status_code = follow_up_workout(data)
-    return jsonify(result), status_code
+    return _coalesced("chat-follow-up", data, follow_up_workout)
+
+# ---------- Asynchronous job endpoints ----------
+
+def _job_accepted(job, created):
+    body = job_to_response(job)
+    body["deduplicated"] = not created
+    body["status_url"] = url_for("generate.get_job", job_id=job["id"])
+    body["events_url"] = url_for("generate.job_events", job_id=job["id"])
+    return jsonify(body), 202
+
+@generate_bp.route('/jobs/generate-workout', methods=['POST'])
+def submit_generate_job():
+    data = request.get_json() or {}
+    missing_keys = [key for key in REQUIRED_KEYS if key not in data]
+    if missing_keys:
+        return jsonify({"error": f"Missing fields: {', '.join(missing_keys)}"}), 400
+
+    job, created = plan_jobs.submit("generate", data, app=current_app._get_current_object())
+    return _job_accepted(job, created)
+
+@generate_bp.route('/jobs/chat-follow-up', methods=['POST'])
+def submit_follow_up_job():
+    data = request.get_json() or {}
+    if not data.get("firebase_uid") or not data.get("feedback"):
+        return jsonify({"error": "Missing firebase_uid or feedback"}), 400
+
+    job, created = plan_jobs.submit("follow_up", data, app=current_app._get_current_object())
+    return _job_accepted(job, created)
+
+@generate_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = plan_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job_to_response(job)), 200
+
+@generate_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-Sent Events stream: one event per status change, closes when the job finishes"""
+    if not plan_jobs.get(job_id):
+        return jsonify({"error": "Job not found"}), 404
+
+    def stream():
+        # Subscribe before reading the current state so no transition is missed
+        listener = plan_jobs.subscribe(job_id)
+        try:
+            job = plan_jobs.get(job_id)
+            while True:
+                event = "status" if job["status"] in ACTIVE_STATUSES else "complete"
+                yield f"event: {event}\ndata: {json.dumps(job_to_response(job))}\n\n"
+                if event == "complete":
+                    break
+                try:
+                    job = listener.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    job = plan_jobs.get(job_id)
+        finally:
+            plan_jobs.unsubscribe(job_id, listener)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@generate_bp.route('/metrics/follow-up', methods=['GET'])
+def follow_up_metrics():
+    return jsonify(get_followup_metrics()), 200
+
+@generate_bp.route('/metrics/single-flight', methods=['GET'])
+def single_flight_metrics():
+    return jsonify(request_flights.stats()), 200
+
+@generate_bp.route('/metrics/plan-cache', methods=['GET'])
+def plan_cache_metrics():
+    plan_cache = get_plan_cache()
+    if plan_cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **plan_cache.stats()}), 200
+
+@generate_bp.route('/metrics/structured-plans', methods=['GET'])
+def structured_plan_metrics():
+    return jsonify({"mode": PLAN_OUTPUT_MODE, **structured_plan_stats()}), 200
+
+@generate_bp.route('/debug/traces', methods=['GET'])
+def list_traces():
+    limit = request.args.get("limit", default=20, type=int)
+    traces = tracing.get_recent_traces(limit)
+    return jsonify({
+        "sample_rate": tracing.TRACE_SAMPLE_RATE,
+        "export": tracing.TRACE_EXPORT,
+        "traces": [
+            {
+                "trace_id": t["trace_id"],
+                "name": t["name"],
+                "duration_ms": t["duration_ms"],
+                "error": t["error"],
+                "span_count": len(t["spans"]),
+                "breakdown_ms": tracing.summarize_trace(t),
+            }
+            for t in traces
+        ],
+    }), 200
+
+@generate_bp.route('/debug/traces/<trace_id>', methods=['GET'])
+def get_trace(trace_id):
+    trace = tracing.get_trace(trace_id)
+    if not trace:
+        return jsonify({"error": "Trace not found"}), 404
+    return jsonify(trace), 200
 
 @generate_bp.route('/check-existing', methods=['POST'])
 def check_existing():
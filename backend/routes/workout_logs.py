@@ -1,24 +1,32 @@
 # backend/routes/workout_logs.py - ENHANCED WITH AUTO WEEK GENERATION
 
-from flask import Blueprint, app, request, jsonify
+from flask import Blueprint, Response, app, request, jsonify
 from models.workoutLog_model import WorkoutLog, WorkoutExercise
 from models.workout_program import WorkoutProgram
-from services.llm_engine import LLMEngine
 from models.db import db
-from datetime import datetime, timedelta
+from datetime import datetime
 from sqlalchemy import desc
 import json, re
 from services.agents.progress_monitoring import progress_monitoring_agent
-from models.user_profile import UserProfile
-from utils.json_parser import extract_json_from_response
-from services.workout_parser import parse_workout_text_enhanced
-from services.workout_parser_enhanced import parse_crossfit_workout_text
+from services.parse_cache import stats as parse_cache_stats
+from services.program_materializer import ensure_materialization, parse_status
+from services.plan_store import save_plan_structure
+from services.plan_view import load_exercises, latest_program, latest_program_id, get_view, stats as plan_view_stats
+from services.progress_summary import get_summary, progress_payload
+from services.streaks import get_streak, recompute, runs as streak_runs
+from services.program_version import changed_exercise_ids, make_etag, not_modified, with_etag
+from services.exercise_store import (
+    set_exercise_completed, parse_legacy_exercise_id, resolve_legacy_exercise_id,
+    resolve_legacy_exercise_ids, apply_completion_changes,
+)
+from services.week_progression import (
+    get_week_structure, generate_next_week, on_completion_write,
+    completed_weeks, completed_day_pairs, program_totals,
+)
 
 workout_logs_bp = Blueprint("workout_logs", __name__)
 parser_bp = Blueprint("parser", __name__)
 
-# Initialize LLM Engine
-llm = LLMEngine(provider="ollama", model="qwen2.5:3b-instruct", timeout=180)
 
 def get_latest_active_workout(user_id):
     """Get the user's most recent workout program"""
@@ -57,462 +65,93 @@ def get_latest_active_workout(user_id):
         print(f"❌ Error getting latest workout: {str(e)}")
         return None
 
-def save_parsed_workout_to_db(parsed_data, program_id):
-    """Save parsed workout data to WorkoutExercise table"""
-    try:
-        print(f"💾 Saving workout data for program {program_id}")
-        print(f"📊 Data structure: {type(parsed_data)}")
-        
-        # Clear existing exercises for this program to avoid duplicates
-        existing_exercises = WorkoutExercise.query.filter_by(program_id=program_id).all()
-        for exercise in existing_exercises:
-            db.session.delete(exercise)
-        
-        saved_count = 0
-        
-        # Handle the frontend structure: {"Week 1": {"Day 1": {...}}}
-        for week_key, week_data in parsed_data.items():
-            if not week_key.startswith("Week "):
-                continue
-                
-            try:
-                week_num = int(week_key.replace("Week ", ""))
-            except ValueError:
-                print(f"⚠️ Invalid week key: {week_key}")
-                continue
-
-            for day_key, day_data in week_data.items():
-                if not day_key.startswith("Day "):
-                    continue
-                    
-                try:
-                    day_num = int(day_key.replace("Day ", ""))
-                except ValueError:
-                    print(f"⚠️ Invalid day key: {day_key}")
-                    continue
-                
-                day_label = day_data.get("label", f"Day {day_num}")
-                exercises = day_data.get("exercises", [])
-                
-                print(f"📝 Processing Week {week_num}, Day {day_num}: {len(exercises)} exercises")
-                
-                for exercise in exercises:
-                    try:
-                        new_exercise = WorkoutExercise(
-                            program_id=program_id,
-                            week=week_num,
-                            day=day_num,
-                            day_label=day_label,
-                            name=exercise.get("name", "Unknown Exercise"),
-                            sets=exercise.get("sets", 3),
-                            reps=exercise.get("reps", 10),
-                            rest_seconds=exercise.get("rest_seconds", 60),
-                            completed=False
-                        )
-                        db.session.add(new_exercise)
-                        saved_count += 1
-                        print(f"✅ Added exercise: {new_exercise.name} ({new_exercise.sets}x{new_exercise.reps})")
-                        
-                    except Exception as ex_error:
-                        print(f"❌ Error adding exercise {exercise.get('name', 'Unknown')}: {ex_error}")
-                        continue
-
-        db.session.commit()
-        print(f"✅ Successfully saved {saved_count} exercises to database")
-        return True
-        
-    except Exception as e:
-        db.session.rollback()
-        print(f"❌ Error saving workout to DB: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
-
-def merge_completion_status(plan_data, program_id):
-    """Merge completion status from database into plan data"""
-    try:
-        # Get all exercises for this program from DB
-        db_exercises = WorkoutExercise.query.filter_by(program_id=program_id).order_by(
-            WorkoutExercise.week, WorkoutExercise.day, WorkoutExercise.id
-        ).all()
-
-        # Create a lookup: (week, day, exercise_index) -> completed
-        completed_lookup = {}
-        from collections import defaultdict
-        grouped = defaultdict(list)
-        
-        for ex in db_exercises:
-            grouped[(ex.week, ex.day)].append(ex)
-
-        for (week, day), ex_list in grouped.items():
-            for idx, ex in enumerate(ex_list):
-                completed_lookup[(week, day, idx)] = ex.completed
-
-        # Merge into plan_data
-        for week_key, week_data in plan_data.items():
-            try:
-                week_num = int(week_key.replace("Week ", ""))
-            except ValueError:
-                continue
-                
-            for day_key, day_data in week_data.items():
-                try:
-                    day_num = int(day_key.replace("Day ", ""))
-                except ValueError:
-                    continue
-                    
-                exercises = day_data.get("exercises", [])
-                for idx, exercise in enumerate(exercises):
-                    exercise["completed"] = completed_lookup.get((week_num, day_num, idx), False)
-
-        return plan_data
-        
-    except Exception as e:
-        print(f"❌ Error merging completion status: {e}")
-        return plan_data
-
 # =============== NEW WEEK GENERATION FUNCTIONS ===============
 
-def is_week_completed(program_id, week_number):
-    """Check if all exercises in a specific week are completed"""
-    try:
-        week_exercises = WorkoutExercise.query.filter_by(
-            program_id=program_id, 
-            week=week_number
-        ).all()
-        
-        if not week_exercises:
-            print(f"❌ No exercises found for Week {week_number}")
-            return False
-        
-        completed_exercises = [ex for ex in week_exercises if ex.completed]
-        completion_rate = len(completed_exercises) / len(week_exercises)
-        
-        print(f"📊 Week {week_number}: {len(completed_exercises)}/{len(week_exercises)} completed ({completion_rate:.1%})")
-        
-        return completion_rate == 1.0  # 100% completion
-        
-    except Exception as e:
-        print(f"❌ Error checking week completion: {e}")
-        return False
+# =============== ENHANCED ROUTES ===============
 
-def get_week_structure(program_id, week_number):
-    """Get the structure of a specific week for cloning"""
+@workout_logs_bp.route("/workout/current/<user_id>", methods=["GET"])
+def get_current_workout(user_id):
     try:
-        week_exercises = WorkoutExercise.query.filter_by(
-            program_id=program_id, 
-            week=week_number
-        ).order_by(WorkoutExercise.day, WorkoutExercise.id).all()
-        
-        if not week_exercises:
-            return None
+        print(f"🔍 Fetching workout for user: {user_id}")
         
-        # Group by day
-        from collections import defaultdict
-        week_structure = defaultdict(list)
+        # Latest program, its committed version and the view built at it (services/plan_view.py)
+        program_id, version = latest_program(user_id)
         
-        for exercise in week_exercises:
-            week_structure[exercise.day].append({
-                "name": exercise.name,
-                "sets": exercise.sets,
-                "reps": exercise.reps,
-                "rest_seconds": exercise.rest_seconds,
-                "day_label": exercise.day_label
-            })
-        
-        return dict(week_structure)
+        if program_id is None:
+            print("❌ No workout plan found")
+            return jsonify({"error": "No workout plan found"}), 404
         
-    except Exception as e:
-        print(f"❌ Error getting week structure: {e}")
-        return None
+        body, version = get_view(program_id, version)
+        
+        if body is None:
+            # Exercises are written by the background parser (services/program_materializer.py)
+            status = ensure_materialization(program_id)
+            if status["status"] == "failed":
+                print(f"❌ Parsing failed for program {program_id}: {status['error']}")
+                return jsonify({
+                    "error": f"Failed to parse workout: {status['error']}",
+                    "status": "parsing_failed",
+                    "program_id": program_id,
+                    "parse": status,
+                }), 500
+            print(f"⏳ Program {program_id} is still being parsed ({status['status']})")
+            return jsonify({
+                "status": "parsing_pending",
+                "program_id": program_id,
+                "parse": status,
+                "retry_after": 2,
+            }), 202
 
-def apply_progression_logic(exercise_data, week_number):
-    """Apply progression logic to exercises for the new week"""
-    try:
-        # Clone the exercise data
-        new_exercise = exercise_data.copy()
-        
-        # Progressive overload logic
-        progression_factor = (week_number - 1) * 0.1  # 10% increase per week
-        
-        # Increase reps slightly (1-2 reps per week)
-        if isinstance(new_exercise["reps"], (int, str)):
-            try:
-                current_reps = int(new_exercise["reps"])
-                # Add 1-2 reps every 2 weeks
-                additional_reps = max(1, (week_number - 1) // 2)
-                new_exercise["reps"] = current_reps + additional_reps
-            except ValueError:
-                pass  # Keep original reps if not numeric
-        
-        # Optionally increase sets after week 3
-        if week_number > 3 and isinstance(new_exercise["sets"], (int, str)):
-            try:
-                current_sets = int(new_exercise["sets"])
-                if current_sets < 5:  # Cap at 5 sets
-                    new_exercise["sets"] = current_sets + ((week_number - 1) // 3)
-            except ValueError:
-                pass
-        
-        # Reduce rest time slightly for conditioning
-        if new_exercise["rest_seconds"] > 30:
-            rest_reduction = min(10, (week_number - 1) * 5)  # Reduce by 5s per week, max 10s
-            new_exercise["rest_seconds"] = max(30, new_exercise["rest_seconds"] - rest_reduction)
-        
-        print(f"📈 Applied progression: {new_exercise['name']} -> {new_exercise['sets']}x{new_exercise['reps']} (rest: {new_exercise['rest_seconds']}s)")
-        
-        return new_exercise
-        
-    except Exception as e:
-        print(f"❌ Error applying progression: {e}")
-        return exercise_data
+        etag = make_etag("current", program_id, version)
+        if not_modified(etag):
+            return with_etag(Response(status=304), etag)
+
+        print(f"✅ Returning workout view for program {program_id} (version {version})")
+        return with_etag(Response(body, status=200, mimetype="application/json"), etag)
 
-def generate_next_week(program_id, new_week_number, base_week_number=None):
-    """Generate the next week based on a previous week structure"""
-    try:
-        print(f"🏗️ Generating Week {new_week_number} for program {program_id}")
-        
-        # Determine base week (default to week 1 or previous week)
-        if base_week_number is None:
-            base_week_number = max(1, new_week_number - 1)
-        
-        # Check if the new week already exists
-        existing_week = WorkoutExercise.query.filter_by(
-            program_id=program_id, 
-            week=new_week_number
-        ).first()
-        
-        if existing_week:
-            print(f"⚠️ Week {new_week_number} already exists, skipping generation")
-            return False
-        
-        # Get the structure from the base week
-        base_week_structure = get_week_structure(program_id, base_week_number)
-        
-        if not base_week_structure:
-            print(f"❌ Could not get base week {base_week_number} structure")
-            return False
-        
-        print(f"📋 Base week {base_week_number} has {len(base_week_structure)} days")
-        
-        # Generate new week with progression
-        new_exercises_count = 0
-        
-        for day_number, day_exercises in base_week_structure.items():
-            for exercise_data in day_exercises:
-                # Apply progression
-                progressed_exercise = apply_progression_logic(exercise_data, new_week_number)
-                
-                # Create new exercise entry
-                new_exercise = WorkoutExercise(
-                    program_id=program_id,
-                    week=new_week_number,
-                    day=day_number,
-                    day_label=progressed_exercise["day_label"],
-                    name=progressed_exercise["name"],
-                    sets=progressed_exercise["sets"],
-                    reps=progressed_exercise["reps"],
-                    rest_seconds=progressed_exercise["rest_seconds"],
-                    completed=False
-                )
-                
-                db.session.add(new_exercise)
-                new_exercises_count += 1
-        
-        db.session.commit()
-        print(f"✅ Generated Week {new_week_number} with {new_exercises_count} exercises")
-        
-        return True
-        
     except Exception as e:
-        db.session.rollback()
-        print(f"❌ Error generating Week {new_week_number}: {e}")
+        print(f"❌ Error in get_current_workout: {str(e)}")
         import traceback
         traceback.print_exc()
-        return False
+        return jsonify({"error": str(e)}), 500
 
-def check_and_auto_generate_weeks(program_id):
-    """Check for completed weeks and auto-generate next weeks"""
+@workout_logs_bp.route("/workout/delta/<user_id>", methods=["GET"])
+def get_workout_delta(user_id):
+    """
+    Exercises changed since ?since=<plan_version>. Answers {"full": true} when the
+    client must reload /workout/current instead (another program, replaced or pruned history).
+    """
     try:
-        print(f"🔍 Checking for auto-generation opportunities for program {program_id}")
-        
-        # Get all existing weeks for this program
-        existing_weeks = db.session.query(WorkoutExercise.week).filter_by(
-            program_id=program_id
-        ).distinct().order_by(WorkoutExercise.week).all()
-        
-        existing_week_numbers = [w[0] for w in existing_weeks]
-        
-        if not existing_week_numbers:
-            print("❌ No weeks found for auto-generation")
-            return False
-        
-        print(f"📊 Existing weeks: {existing_week_numbers}")
-        
-        # Check each week for completion and generate next if needed
-        weeks_generated = 0
-        
-        for week_num in existing_week_numbers:
-            if is_week_completed(program_id, week_num):
-                next_week = week_num + 1
-                
-                # Check if next week already exists
-                next_week_exists = next_week in existing_week_numbers
-                
-                if not next_week_exists:
-                    print(f"🚀 Week {week_num} completed, generating Week {next_week}")
-                    
-                    if generate_next_week(program_id, next_week, week_num):
-                        weeks_generated += 1
-                        existing_week_numbers.append(next_week)  # Update list for next iteration
-                        print(f"✅ Week {next_week} auto-generated successfully")
-                    else:
-                        print(f"❌ Failed to generate Week {next_week}")
-                else:
-                    print(f"ℹ️ Week {week_num} completed, but Week {next_week} already exists")
-        
-        if weeks_generated > 0:
-            print(f"🎉 Auto-generated {weeks_generated} new week(s)")
-            return True
-        else:
-            print("ℹ️ No new weeks needed")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Error in auto-generation check: {e}")
-        return False
-
-# =============== ENHANCED ROUTES ===============
+        since = request.args.get("since", type=int)
+        if since is None:
+            return jsonify({"error": "since is required"}), 400
 
-@workout_logs_bp.route("/workout/current/<user_id>", methods=["GET"])
-def get_current_workout(user_id):
-    try:
-        print(f"🔍 Fetching workout for user: {user_id}")
-        
-        # Get the most recent workout program
-        plan = get_latest_active_workout(user_id)
-        
-        if not plan:
-            print("❌ No workout plan found")
+        program_id = latest_program_id(user_id)
+        if program_id is None:
             return jsonify({"error": "No workout plan found"}), 404
-        
-        print(f"✅ Found plan: {plan.id}")
-        
-        # 🚀 NEW: Auto-generate weeks if needed
-        check_and_auto_generate_weeks(plan.id)
-        
-        # Check if exercises are already in database
-        existing_exercises = WorkoutExercise.query.filter_by(program_id=plan.id).first()
-        
-        if not existing_exercises:
-            print("🔄 No exercises in DB, parsing program text...")
-            
-            # Parse the program text
-            try:
-                plan_data = parse_crossfit_workout_text(plan.program_text, plan.id, llm)
-                print(f"✅ Enhanced parsing successful - found {len(plan_data)} weeks")
-            except Exception as parsing_error:
-                print(f"⚠️ Enhanced parsing failed: {parsing_error}")
-                try:
-                    plan_data = parse_workout_text_enhanced(plan.program_text, plan.id, llm)
-                    print(f"✅ Standard parsing successful")
-                except Exception as fallback_error:
-                    print(f"❌ All parsing failed: {fallback_error}")
-                    return jsonify({"error": f"Failed to parse workout: {fallback_error}"}), 500
-            
-            # Save parsed data to database
-            if save_parsed_workout_to_db(plan_data, plan.id):
-                print("✅ Successfully saved exercises to database")
-            else:
-                print("⚠️ Failed to save exercises, but continuing with parsed data")
-        else:
-            print("✅ Exercises already in DB, reconstructing from database...")
-            
-            # Reconstruct plan data from database
-            db_exercises = WorkoutExercise.query.filter_by(program_id=plan.id).order_by(
-                WorkoutExercise.week, WorkoutExercise.day, WorkoutExercise.id
-            ).all()
-            
-            plan_data = {}
-            
-            from collections import defaultdict
-            grouped = defaultdict(lambda: defaultdict(list))
-            
-            for ex in db_exercises:
-                grouped[f"Week {ex.week}"][f"Day {ex.day}"].append({
-                    "id": f"{plan.id}_{ex.week}_{ex.day}_{len(grouped[f'Week {ex.week}'][f'Day {ex.day}'])}",
-                    "name": ex.name,
-                    "sets": ex.sets,
-                    "reps": ex.reps,
-                    "rest_seconds": ex.rest_seconds,
-                    "completed": ex.completed,
-                    "notes": ""
-                })
-            
-            for week_key, week_data in grouped.items():
-                plan_data[week_key] = {}
-                for day_key, exercises in week_data.items():
-                    # Get day label from first exercise or create default
-                    day_label = "Full Body"
-                    if exercises:
-                        first_ex = WorkoutExercise.query.filter_by(
-                            program_id=plan.id, 
-                            week=int(week_key.replace("Week ", "")), 
-                            day=int(day_key.replace("Day ", ""))
-                        ).first()
-                        if first_ex and first_ex.day_label:
-                            day_label = first_ex.day_label
-                    
-                    plan_data[week_key][day_key] = {
-                        "label": day_label,
-                        "exercises": exercises
-                    }
-
-        # Ensure completion status is up to date
-        plan_data = merge_completion_status(plan_data, plan.id)
-
-        # Calculate progress statistics
-        total_exercises = sum(
-            len(day_data.get("exercises", []))
-            for week_data in plan_data.values()
-            for day_data in week_data.values()
-        )
-        
-        completed_exercises = sum(
-            1
-            for week_data in plan_data.values()
-            for day_data in week_data.values()
-            for exercise in day_data.get("exercises", [])
-            if exercise.get("completed", False)
-        )
 
-        completion_percentage = (completed_exercises / total_exercises) * 100 if total_exercises > 0 else 0
-        
-        # Build response
-        response_data = {
-            "user_id": plan.user_id,
-            "program_id": plan.id,
-            "program_name": getattr(plan, "name", "Workout Plan"),
-            "plan": plan_data,
-            "completion_percentage": round(completion_percentage, 1),
-            "is_latest": True,
+        client_program = request.args.get("program_id", type=int)
+        if client_program is not None and client_program != program_id:
+            return jsonify({"program_id": program_id, "full": True, "reason": "new_program"}), 200
+
+        version, exercise_ids = changed_exercise_ids(program_id, since)
+        if exercise_ids is None:
+            return jsonify({"program_id": program_id, "version": version, "full": True,
+                            "reason": "history_unavailable"}), 200
+
+        total_exercises, completed_exercises = program_totals(program_id)
+        return jsonify({
+            "program_id": program_id,
+            "since": since,
+            "version": version,
+            "full": False,
+            "exercises": load_exercises(program_id, exercise_ids),
             "total_exercises": total_exercises,
             "completed_exercises": completed_exercises,
-            "total_days": sum(len(week_data) for week_data in plan_data.values()),
-            "plan_version": int(datetime.utcnow().timestamp())  # 🚀 NEW: Version tracking
-        }
-        
-        # Add created_at if it exists
-        if hasattr(plan, 'created_at') and plan.created_at:
-            response_data["created_at"] = plan.created_at.isoformat()
-        
-        print(f"✅ Returning workout data: {total_exercises} exercises, {completion_percentage:.1f}% complete")
-        return jsonify(response_data), 200
+        }), 200
 
     except Exception as e:
-        print(f"❌ Error in get_current_workout: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        print(f"❌ Error in get_workout_delta: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 # 🚀 NEW ROUTE: Manual Week Generation
@@ -583,21 +222,16 @@ def create_workout_from_conversation():
         
         new_program = WorkoutProgram(**new_program_data)
         db.session.add(new_program)
+        db.session.flush()
+        save_plan_structure(new_program.id, program_text)
         db.session.commit()
         
         print(f"✅ Created new workout program: {new_program.id}")
         
-        # Immediately parse and save exercises
-        try:
-            plan_data = parse_crossfit_workout_text(program_text, new_program.id, llm)
-            if save_parsed_workout_to_db(plan_data, new_program.id):
-                print(f"✅ Exercises saved for new program {new_program.id}")
-        except Exception as parse_error:
-            print(f"⚠️ Failed to parse new program exercises: {parse_error}")
-        
         return jsonify({
             "success": True,
             "program_id": new_program.id,
+            "parse_status": "pending",
             "message": "New workout program created from conversation"
         }), 201
         
@@ -606,55 +240,194 @@ def create_workout_from_conversation():
         print(f"❌ Error creating workout from conversation: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-# Toggle Exercise Completion (Enhanced with auto-generation trigger)
+def _set_completion(exercise_id, completed):
+    """Single-row completion UPDATE plus the week-generation trigger; returns the response"""
+    updated = set_exercise_completed(exercise_id, completed)
+    if updated is None:
+        return jsonify({"error": "Exercise not found"}), 404
+    program_id, week, name, completed_at = updated
+    db.session.commit()
+
+    print(f"✅ Exercise {name} marked as {'completed' if completed else 'incomplete'}")
+
+    # 🚀 Completing the last exercise of a week generates the next one
+    if completed:
+        on_completion_write(program_id, week)
+
+    return jsonify({
+        "success": True,
+        "exercise_id": exercise_id,
+        "completed": completed,
+        "exercise_name": name,
+        "completed_at": completed_at.isoformat() if completed_at else None
+    }), 200
+
+
+@workout_logs_bp.route('/workout/exercises/<int:exercise_id>/completion', methods=['PUT'])
+def set_exercise_completion(exercise_id):
+    try:
+        data = request.get_json(silent=True) or {}
+        return _set_completion(exercise_id, bool(data.get('completed', True)))
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error updating exercise {exercise_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+# Toggle Exercise Completion (accepts WorkoutExercise ids and legacy positional ids)
 @workout_logs_bp.route('/workout/exercise/<exercise_id>/complete', methods=['POST'])
 def toggle_exercise_completion(exercise_id):
     try:
         print(f"🔄 Toggling exercise completion: {exercise_id}")
-        
-        # Parse exercise ID format: program_id_week_day_index
-        parts = str(exercise_id).split('_')
-        if len(parts) != 4:
-            return jsonify({"error": "Invalid exercise ID format"}), 400
 
-        program_id = int(parts[0])
-        week = int(parts[1])
-        day = int(parts[2])
-        exercise_index = int(parts[3])
+        data = request.get_json(silent=True) or {}
+        completed = bool(data.get('completed', True))
 
-        data = request.get_json()
-        completed = data.get('completed', True)
+        if str(exercise_id).isdigit():
+            return _set_completion(int(exercise_id), completed)
 
-        # Fetch the exercise from DB using index
-        exercises = WorkoutExercise.query.filter_by(
-            program_id=program_id, week=week, day=day
-        ).order_by(WorkoutExercise.id).all()
+        # Legacy format: program_id_week_day_index
+        legacy = parse_legacy_exercise_id(exercise_id)
+        if legacy is None:
+            return jsonify({"error": "Invalid exercise ID format"}), 400
 
-        if exercise_index >= len(exercises):
+        row_id = resolve_legacy_exercise_id(*legacy)
+        if row_id is None:
             return jsonify({"error": "Exercise index out of range"}), 404
 
-        exercise = exercises[exercise_index]
-        exercise.completed = completed
-        db.session.commit()
+        response, status = _set_completion(row_id, completed)
+        if status == 200:
+            body = response.get_json()
+            body.update({"exercise_id": exercise_id, "id": row_id})
+            response = jsonify(body)
+        return response, status
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error toggling exercise: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def _number(value, cast):
+    if value is None or value == "":
+        return None
+    return cast(value)
+
+
+def _exercise_ref(raw_id):
+    """Row id (int) or legacy positional id (str) of a submitted exercise, None when malformed"""
+    if isinstance(raw_id, bool):
+        return None
+    if isinstance(raw_id, int):
+        return raw_id
+    if isinstance(raw_id, str):
+        if raw_id.isdigit():
+            return int(raw_id)
+        if parse_legacy_exercise_id(raw_id) is not None:
+            return raw_id
+    return None
+
+
+@workout_logs_bp.route('/workout/exercises/completion', methods=['POST'])
+def complete_exercises_batch():
+    """
+    Log a whole session in one request: {"user_id", "exercises": [{"id", "completed",
+    "actual_sets"?, "actual_reps"?, "weight_used"?}], "week"?, "day"?, "duration"?, "notes"?}.
+    Ids are WorkoutExercise ids (legacy positional ids are accepted) of the user's own
+    programs. All changes and the WorkoutLog row (written when "log" is not false) commit
+    together; week generation runs once.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        user_id = data.get('user_id')
+        submitted = data.get('exercises') or []
+        if not user_id:
+            return jsonify({"error": "Missing required field: user_id"}), 400
+        if not isinstance(submitted, list) or not submitted or not all(isinstance(item, dict) for item in submitted):
+            return jsonify({"error": "exercises must be a non-empty list of objects"}), 400
+
+        refs = [_exercise_ref(item.get('id')) for item in submitted]
+        invalid = [item.get('id') for item, ref in zip(submitted, refs) if ref is None]
+        if invalid:
+            return jsonify({"error": "Invalid exercise ids", "invalid_ids": invalid}), 400
+
+        legacy = resolve_legacy_exercise_ids([ref for ref in refs if isinstance(ref, str)])
+        changes, applied_items, unknown = [], [], []
+        for item, ref in zip(submitted, refs):
+            row_id = legacy.get(ref) if isinstance(ref, str) else ref
+            if row_id is None:
+                unknown.append(ref)
+                continue
+            changes.append({
+                "id": row_id,
+                "completed": bool(item.get('completed', True)),
+                "actual_sets": _number(item.get('actual_sets'), int),
+                "actual_reps": _number(item.get('actual_reps'), int),
+                "weight_used": _number(item.get('weight_used'), float),
+            })
+            applied_items.append(item)
+
+        found = apply_completion_changes(changes, user_id)
+        unknown += [change["id"] for change in changes if change["id"] not in found]
+        if not found:
+            db.session.rollback()
+            return jsonify({"error": "No matching exercises", "unknown_ids": unknown}), 404
+
+        program_ids = {program_id for program_id, _week, _day, _name in found.values()}
+        if len(program_ids) > 1:
+            db.session.rollback()
+            return jsonify({"error": "Exercises belong to more than one program"}), 400
+        program_id = program_ids.pop()
+
+        log_id = None
+        if data.get('log', True):
+            days = {(week, day) for _program, week, day, _name in found.values()}
+            week, day = data.get('week'), data.get('day')
+            if (week is None or day is None) and len(days) == 1:
+                week, day = next(iter(days))
+            workout_log = WorkoutLog(
+                user_id=user_id,
+                program_id=program_id,
+                week=week,
+                day=day,
+                date=datetime.utcnow().date(),
+                duration=data.get('duration', 0),
+                notes=data.get('notes', ''),
+                # Only completed work, like /workout/day/complete: log readers count these entries
+                exercises=json.dumps([
+                    {**item, "id": change["id"], "name": item.get('name') or found[change["id"]][3], "completed": True}
+                    for item, change in zip(applied_items, changes)
+                    if change["completed"] and change["id"] in found
+                ])
+            )
+            db.session.add(workout_log)
+            db.session.flush()
+            log_id = workout_log.id
 
-        print(f"✅ Exercise {exercise.name} marked as {'completed' if completed else 'incomplete'}")
+        db.session.commit()
+        print(f"✅ Applied {len(found)} completion changes for program {program_id}")
 
-        # 🚀 NEW: Check for week completion and auto-generate if needed
-        if completed:
-            print("🔍 Checking if week completion triggers auto-generation...")
-            check_and_auto_generate_weeks(program_id)
+        # 🚀 One generation check per touched week (a session touches one)
+        completed_weeks_touched = sorted({
+            found[change["id"]][1] for change in changes
+            if change["completed"] and change["id"] in found
+        })
+        generated = [w for w in (on_completion_write(program_id, week) for week in completed_weeks_touched) if w]
 
         return jsonify({
             "success": True,
-            "exercise_id": exercise_id,
-            "completed": completed,
-            "exercise_name": exercise.name,
-            "completed_at": datetime.utcnow().isoformat() if completed else None
+            "program_id": program_id,
+            "updated": len(found),
+            "unknown_ids": unknown,
+            "log_id": log_id,
+            "generated_weeks": generated,
         }), 200
 
+    except (TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({"error": f"Invalid exercise change: {e}"}), 400
     except Exception as e:
         db.session.rollback()
-        print(f"❌ Error toggling exercise: {str(e)}")
+        print(f"❌ Error applying completion batch: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 # Rest of the routes remain the same...
@@ -702,9 +475,8 @@ def complete_workout_day():
 
             db.session.commit()
             
-            # 🚀 NEW: Check for auto-generation after completing a day
-            print("🔍 Day completed, checking for auto-generation...")
-            check_and_auto_generate_weeks(program.id)
+            # 🚀 Completing the last day of a week generates the next one
+            on_completion_write(program.id, int(week))
             
         except Exception as sync_err:
             print(f"⚠️ Could not sync exercise completion flags: {sync_err}")
@@ -727,81 +499,26 @@ def get_workout_progress(user_id):
         print(f"📊 Fetching progress stats for user: {user_id}")
         
         # Get the user's current program
-        program = get_latest_active_workout(user_id)
-        if not program:
+        program_id = latest_program_id(user_id)
+        if program_id is None:
             return jsonify({"error": "No workout program found"}), 404
         
-        # Get all exercises for this program
-        all_exercises = WorkoutExercise.query.filter_by(program_id=program.id).all()
-        
-        if not all_exercises:
-            return jsonify({
-                "progress": {
-                    "completion_percentage": 0,
-                    "total_workouts": 0,
-                    "current_streak": 0,
-                    "total_time": 0,
-                    "total_exercises": 0,
-                    "completed_exercises": 0
-                }
-            }), 200
-        
-        # Calculate basic stats
-        total_exercises = len(all_exercises)
-        completed_exercises = len([ex for ex in all_exercises if ex.completed])
-        completion_percentage = (completed_exercises / total_exercises) * 100 if total_exercises > 0 else 0
-        
-        # Get workout logs for this program
-        workout_logs = WorkoutLog.query.filter_by(
-            user_id=user_id, 
-            program_id=program.id
-        ).order_by(WorkoutLog.date.desc()).all()
-        
-        total_workouts_from_logs = len(workout_logs)
-        total_time_from_logs = sum(log.duration for log in workout_logs if log.duration)  # in minutes
-        
-        # 🚀 NEW: Calculate "workouts" from completed exercises
-        # Group completed exercises by day and count days with at least 1 completed exercise
-        completed_exercise_days = set()
-        for ex in all_exercises:
-            if ex.completed:
-                completed_exercise_days.add((ex.week, ex.day))
-        
-        workouts_from_exercises = len(completed_exercise_days)
-        
-        # Use the higher count between logs and exercise-based calculation
-        total_workouts = max(total_workouts_from_logs, workouts_from_exercises)
-        
-        # 🚀 NEW: Estimate time from completed exercises if no logs
-        estimated_time = 0
-        if total_time_from_logs == 0 and completed_exercises > 0:
-            # Estimate 2-3 minutes per exercise on average
-            estimated_time = completed_exercises * 2.5  # 2.5 minutes per exercise
-        
-        total_time = max(total_time_from_logs, estimated_time)
-        
-        # Calculate current streak (consecutive days with workouts)
-        current_streak = calculate_workout_streak_enhanced(workout_logs, all_exercises)
+        # Rows kept current by exercise and log writes (services/progress_summary.py, services/streaks.py)
+        summary = get_summary(program_id)
+        if summary is None:
+            return jsonify({"error": "No workout program found"}), 404
         
-        # Get current week number
-        current_week = get_current_week_number(program.id)
+        streak = get_streak(user_id)
         
-        progress_data = {
-            "completion_percentage": round(completion_percentage, 1),
-            "total_workouts": int(total_workouts),
-            "current_streak": current_streak,
-            "total_time": int(total_time),  # in minutes
-            "total_exercises": total_exercises,
-            "completed_exercises": completed_exercises,
-            "current_week": current_week,
-            "program_id": program.id,
-            "workouts_from_logs": total_workouts_from_logs,
-            "workouts_from_exercises": workouts_from_exercises
-        }
+        # The row's version covers exercise and log writes; the streak row covers logs of older programs
+        etag = make_etag("progress", program_id, summary.version, *streak.values(), daily=True)
+        if not_modified(etag):
+            return with_etag(Response(status=304), etag)
         
-        print(f"✅ Progress stats calculated: {progress_data}")
+        progress_data = progress_payload(summary, streak)
+        print(f"✅ Progress stats: {progress_data}")
         
-        return jsonify({"progress": progress_data}), 200
+        return with_etag(jsonify({"progress": progress_data}), etag), 200
         
     except Exception as e:
         print(f"❌ Error getting progress stats: {str(e)}")
@@ -809,113 +526,6 @@ def get_workout_progress(user_id):
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
-def calculate_workout_streak_enhanced(workout_logs, all_exercises):
-    """Calculate streak considering both workout logs and completed exercises"""
-    try:
-        # Get unique dates with completed exercises
-        completed_dates = set()
-        
-        # Add dates from workout logs
-        for log in workout_logs:
-            completed_dates.add(log.date)
-        
-        # Add estimated dates from completed exercises (assume recent completions)
-        completed_exercise_count = len([ex for ex in all_exercises if ex.completed])
-        if completed_exercise_count > 0 and len(workout_logs) == 0:
-            # If no logs but exercises completed, assume they were done recently
-            from datetime import datetime, timedelta
-            today = datetime.utcnow().date()
-            
-            # Group exercises by day
-            from collections import defaultdict
-            exercises_by_day = defaultdict(list)
-            for ex in all_exercises:
-                if ex.completed:
-                    exercises_by_day[(ex.week, ex.day)].append(ex)
-            
-            # Assume one day per unique (week, day) combination
-            unique_days = len(exercises_by_day)
-            for i in range(unique_days):
-                completed_dates.add(today - timedelta(days=i))
-        
-        if not completed_dates:
-            return 0
-        
-        # Calculate streak from most recent date
-        sorted_dates = sorted(completed_dates, reverse=True)
-        streak = 0
-        current_date = datetime.utcnow().date()
-        
-        for date in sorted_dates:
-            days_diff = (current_date - date).days
-            
-            if days_diff == streak or days_diff == streak + 1:
-                streak += 1
-            else:
-                break
-        
-        return streak
-        
-    except Exception as e:
-        print(f"❌ Error calculating enhanced streak: {e}")
-        return 0
-def calculate_workout_streak(workout_logs):
-    """Calculate consecutive workout days streak"""
-    try:
-        if not workout_logs:
-            return 0
-        
-        # Sort by date descending (most recent first)
-        sorted_logs = sorted(workout_logs, key=lambda x: x.date, reverse=True)
-        
-        streak = 0
-        current_date = datetime.utcnow().date()
-        
-        # Check if there's a workout today or yesterday (to account for different time zones)
-        for log in sorted_logs:
-            days_diff = (current_date - log.date).days
-            
-            if days_diff == streak:
-                # Consecutive day
-                streak += 1
-            elif days_diff == streak + 1:
-                # Allow for one day gap (rest day)
-                continue
-            else:
-                # Gap too large, streak broken
-                break
-        
-        return streak
-        
-    except Exception as e:
-        print(f"❌ Error calculating streak: {e}")
-        return 0
-
-def get_current_week_number(program_id):
-    """Get the current active week number for a program"""
-    try:
-        # Get all weeks for this program
-        weeks = db.session.query(WorkoutExercise.week).filter_by(
-            program_id=program_id
-        ).distinct().order_by(WorkoutExercise.week).all()
-        
-        week_numbers = [w[0] for w in weeks]
-        
-        if not week_numbers:
-            return 1
-        
-        # Find first incomplete week
-        for week_num in week_numbers:
-            if not is_week_completed(program_id, week_num):
-                return week_num
-        
-        # All weeks completed, return next week
-        return max(week_numbers) + 1
-        
-    except Exception as e:
-        print(f"❌ Error getting current week: {e}")
-        return 1
-
 # ======== ACHIEVEMENTS (computed-only; no new tables) ========
 from collections import Counter
 
@@ -925,23 +535,6 @@ from collections import Counter
 def _dates_from_logs_sorted(logs):
     return sorted({l.date for l in logs if getattr(l, "date", None)})
 
-def _longest_streak_consecutive_days(dates_sorted):
-    if not dates_sorted:
-        return 0
-    best = cur = 1
-    for i in range(1, len(dates_sorted)):
-        if (dates_sorted[i] - dates_sorted[i-1]).days == 1:
-            cur += 1
-            best = max(best, cur)
-        elif (dates_sorted[i] - dates_sorted[i-1]).days > 1:
-            cur = 1
-    return best
-
-def _unique_completed_days(program_id):
-    """Unique (week, day) pairs with any completed exercise (no dates there)."""
-    exs = WorkoutExercise.query.filter_by(program_id=program_id).all()
-    return {(ex.week, ex.day) for ex in exs if ex.completed}
-
 def build_achievements(user_id, program_id):
     """
     Create achievements from WorkoutLog + WorkoutExercise.completed only.
@@ -965,7 +558,7 @@ def build_achievements(user_id, program_id):
     workouts_by_week = Counter([d.isocalendar()[:2] for d in dates_sorted])
 
     # Also consider completed exercise days (no true dates available)
-    completed_pairs = _unique_completed_days(program_id)
+    completed_pairs = completed_day_pairs(program_id)
 
     # ---- Milestones by total workouts (prefer logs, fallback to completed (week,day)) ----
     total_from_logs = len(dates_sorted)
@@ -979,7 +572,7 @@ def build_achievements(user_id, program_id):
                 "milestone", icon, unlocked_at=unlocked_at)
 
     # ---- Streaks (3, 7 days) from real log dates ----
-    longest = _longest_streak_consecutive_days(dates_sorted)
+    _run, longest, _last = streak_runs(dates_sorted)
     if longest >= 3:
         add("3-Day Streak", "Three days in a row—nice momentum!", "streak", "🔥",
             unlocked_at=(dates_sorted[2].isoformat() if len(dates_sorted) >= 3 else None))
@@ -988,13 +581,10 @@ def build_achievements(user_id, program_id):
             unlocked_at=(dates_sorted[6].isoformat() if len(dates_sorted) >= 7 else None))
 
     # ---- Completed weeks (every exercise completed) ----
-    weeks = db.session.query(WorkoutExercise.week).filter_by(program_id=program_id)\
-            .distinct().order_by(WorkoutExercise.week).all()
-    for w in [w[0] for w in weeks]:
-        if is_week_completed(program_id, w):
-            add(f"Week {w} Completed",
-                "You finished every exercise for the week.",
-                "milestone", "✅", meta={"week": w})
+    for w in completed_weeks(program_id):
+        add(f"Week {w} Completed",
+            "You finished every exercise for the week.",
+            "milestone", "✅", meta={"week": w})
 
     # ---- Consistency: any ISO week with 3+ workouts ----
     if any(v >= 3 for v in workouts_by_week.values()):
@@ -1021,19 +611,40 @@ def build_achievements(user_id, program_id):
     return achievements
 
 
+@workout_logs_bp.route("/workout/parse-status/<int:program_id>", methods=["GET"])
+def get_parse_status(program_id):
+    """Poll target for clients that got "parsing_pending" from /workout/current"""
+    if WorkoutExercise.query.filter_by(program_id=program_id).first():
+        return jsonify({"program_id": program_id, "status": "ready"}), 200
+    status = parse_status(program_id)
+    if status is None:
+        return jsonify({"error": "Program is not being parsed"}), 404
+    return jsonify(status), 200
+
+@workout_logs_bp.route("/workout/parse-cache/stats", methods=["GET"])
+def parse_cache_metrics():
+    return jsonify(parse_cache_stats()), 200
+
+@workout_logs_bp.route("/workout/plan-view/stats", methods=["GET"])
+def plan_view_metrics():
+    return jsonify(plan_view_stats()), 200
+
 @workout_logs_bp.route("/health", methods=["GET"])
 def health_check():
     return jsonify({"status": "healthy", "service": "workout_logs"}), 200
+@workout_logs_bp.route("/workout/streak/<user_id>", methods=["GET"])
+def get_user_streak(user_id):
+    return jsonify(get_streak(user_id)), 200
+
 @workout_logs_bp.route("/update-streak", methods=["POST"])
 def update_streak():
-    data = request.json
-    uid = data["uid"]
-    streak = data["streak"]
-
-    user = UserProfile.query.filter_by(firebase_uid=uid).first()
-    if not user:
-        return {"error": "User not found"}, 404
+    """Streaks are derived from workout logs; this recomputes the stored one instead of taking the client's value"""
+    data = request.get_json(silent=True) or {}
+    uid = data.get("uid")
+    if not uid:
+        return {"error": "uid is required"}, 400
 
-    user.streak = streak
+    recompute(uid)
     db.session.commit()
-    return {"message": "Streak updated", "streak": streak}
+    streak = get_streak(uid)
+    return {"message": "Streak updated", "streak": streak["current_streak"], **streak}
@@ -3,7 +3,9 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import AIMessage
+from services.tracing import traced
 
+@traced("agent.feedback_collection.feedback_collection_agent")
 def feedback_collection_agent(state, llm):
     """Enhanced feedback collection with better context analysis"""
     
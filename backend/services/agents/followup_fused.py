@@ -0,0 +1,243 @@
+# agents/followup_fused.py - Single-pass follow-up (at most one LLM call)
+#
+# The multi-agent follow-up runs feedback_collection_agent (LLM, full plan),
+# routine_adjustment_agent (LLM again for general requests) and
+# progress_monitoring_agent. This agent answers the same request with a single
+# structured call: {"intent", "response", "plan"}.
+
+import json
+import re
+from langchain_core.messages import AIMessage
+from services.tracing import traced
+from services.plan_ast import looks_like_plan, parse_plan
+from services.agents.routine_adjustment import (
+    RULE_HANDLED_INTENTS,
+    analyze_user_intent,
+    apply_rule_based_adjustment,
+    apply_equipment_and_restrictions,
+    build_restriction_constraints,
+    ensure_exact_generation_format,
+    extract_clean_plan,
+    extract_day_from_feedback,
+    extract_target_days,
+    extract_exercise_name,
+    extract_old_exercise,
+    extract_new_exercise,
+)
+
+FUSED_INTENTS = ["plan_change", "question", "progress_update", "injury", "difficulty", "other"]
+
+FUSED_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "intent": {"type": "string", "enum": FUSED_INTENTS},
+        "response": {"type": "string"},
+        "plan": {"type": "string"},
+    },
+    "required": ["intent", "response", "plan"],
+}
+
+FUSED_PROMPT = """You are an AI fitness coach. Read the user's message about their current workout plan and answer in ONE JSON object.
+
+USER PROFILE:
+- Goal: {goal}
+- Equipment Available: {equipment}
+- Restrictions: {restrictions}
+
+CURRENT WORKOUT PLAN:
+{current_plan}
+
+USER MESSAGE: "{feedback}"
+
+Return JSON with exactly these keys:
+- "intent": one of {intents}
+- "response": 2-4 friendly sentences for the user explaining what you did or answering the question
+- "plan": the COMPLETE modified workout plan in the EXACT markdown format of the current plan
+  (### Day X: headers, **Warm-up**, **Main Workout**, **Cool-down**, "- Exercise: X sets x X reps, Rest: X sec").
+  Use an empty string "" if the plan does not need to change.
+
+Respect the equipment and restrictions strictly. Return ONLY the JSON object."""
+
+RULE_RESPONSES = {
+    "remove_day": "Done! I've removed Day {day} and renumbered the remaining days. "
+                  "Use the extra rest day to recover well 💪",
+    "reduce_days": "Done! Your plan is now {days} days per week. Fewer sessions done consistently "
+                   "beat more sessions skipped, so keep the intensity up on the days you train 🎯",
+    "remove_exercise": "Done! I've taken {exercise} out of your plan. The rest of each session stays "
+                       "the same, so you keep the same training volume elsewhere 🔥",
+    "replace_exercise": "Done! I've swapped {old} for {new} throughout your plan. Start with a "
+                        "controlled tempo for the first session to learn the movement 👍",
+    "add_restrictions": "Got it! I've updated your plan to respect that restriction. Let me know if "
+                        "anything else feels uncomfortable 🙌",
+}
+
+PLAN_UNCHANGED_RESPONSE = ("I couldn't apply that change reliably, so your plan is unchanged. "
+                           "Could you rephrase what you'd like to adjust?")
+
+# The reply repeats the whole plan as a JSON string: budget for the plan (it may
+# grow, and escaping adds characters) on top of the intent and response
+FUSED_RESPONSE_TOKENS = 400
+PLAN_CHARS_PER_TOKEN = 3
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def fused_max_tokens(current_plan):
+    return FUSED_RESPONSE_TOKENS + int(len(current_plan or "") * 1.5 / PLAN_CHARS_PER_TOKEN)
+
+
+def _equipment_text(user_data):
+    equipment = user_data.get("equipment", [])
+    if isinstance(equipment, list):
+        return ", ".join(equipment) if equipment else "bodyweight only"
+    return str(equipment) if equipment else "bodyweight only"
+
+
+def _restriction_list(user_data):
+    restrictions = user_data.get("restrictions", [])
+    if not isinstance(restrictions, list):
+        restrictions = [restrictions] if restrictions else []
+    return list(restrictions)
+
+
+def parse_fused_output(raw):
+    """Parse the model output into (intent, response, plan); tolerant of non-JSON replies"""
+    text = str(raw.content) if hasattr(raw, "content") else str(raw or "")
+    data = None
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        match = _JSON_OBJECT.search(text)
+        if match:
+            try:
+                data = json.loads(match.group())
+            except ValueError:
+                data = None
+
+    if isinstance(data, dict):
+        intent = data.get("intent") if data.get("intent") in FUSED_INTENTS else "other"
+        return intent, str(data.get("response") or "").strip(), str(data.get("plan") or "").strip()
+
+    # Truncated or malformed JSON: its "plan" is an escaped fragment, not a plan
+    if text.lstrip().startswith("{"):
+        return "other", PLAN_UNCHANGED_RESPONSE, ""
+
+    # Model ignored the JSON instruction: keep a plan if it produced one
+    if re.search(r"### Day \d+:", text):
+        return "plan_change", "", extract_clean_plan(text)
+    return "other", text.strip(), ""
+
+
+def describe_rule_adjustment(request_intent, feedback):
+    """Instant templated coaching message for a rule-handled edit"""
+    details = {
+        "day": extract_day_from_feedback(feedback) or "that day",
+        "days": extract_target_days(feedback) or "fewer",
+        "exercise": extract_exercise_name(feedback) or "that exercise",
+        "old": extract_old_exercise(feedback) or "that exercise",
+        "new": extract_new_exercise(feedback) or "the new one",
+    }
+    return RULE_RESPONSES[request_intent].format(**details)
+
+
+def plan_rejection(proposed_plan, current_plan, feedback):
+    """Why an LLM-written plan must not replace the current one, or None when it can"""
+    if not looks_like_plan(proposed_plan):
+        return "not a complete plan"
+    proposed_days = parse_plan(proposed_plan).day_count
+    current_days = parse_plan(current_plan).day_count
+    if proposed_days != current_days and proposed_days != extract_target_days(feedback):
+        return f"{proposed_days} days instead of {current_days}"
+    return None
+
+
+@traced("agent.followup_fused.rule_based_followup")
+def rule_based_followup(user_data, current_plan, feedback, request_intent):
+    """Apply a rule-handled intent with zero LLM calls; same result shape as fused_followup"""
+    goal = user_data.get("goal", "General Fitness")
+    equipment_str = _equipment_text(user_data)
+    restrictions = _restriction_list(user_data)
+
+    modified_plan = apply_rule_based_adjustment(current_plan, feedback, request_intent, restrictions)
+    if modified_plan != current_plan or request_intent == "add_restrictions":
+        modified_plan = apply_equipment_and_restrictions(modified_plan, equipment_str, restrictions)
+        modified_plan = ensure_exact_generation_format(modified_plan, equipment_str, goal)
+
+    plan_changed = modified_plan.strip() != current_plan.strip()
+    return {
+        "intent": request_intent,
+        "response": describe_rule_adjustment(request_intent, feedback),
+        "plan": modified_plan if plan_changed else current_plan,
+        "plan_changed": plan_changed,
+        "llm_calls": 0,
+    }
+
+
+@traced("agent.followup_fused.fused_followup")
+def fused_followup(user_data, current_plan, feedback, llm):
+    """
+    Answer a follow-up with at most one LLM call.
+    Returns {"intent", "response", "plan", "plan_changed", "llm_calls"}.
+    """
+    goal = user_data.get("goal", "General Fitness")
+    equipment_str = _equipment_text(user_data)
+    restrictions = _restriction_list(user_data)
+
+    request_intent = analyze_user_intent(feedback)
+    print(f"🧠 Fused follow-up intent: {request_intent}")
+
+    if request_intent in RULE_HANDLED_INTENTS:
+        outcome = rule_based_followup(user_data, current_plan, feedback, request_intent)
+        if outcome["plan_changed"]:
+            return outcome
+        print("⚠️ Rule-based edit made no change, asking the LLM instead")
+
+    prompt = FUSED_PROMPT.format(
+        goal=goal,
+        equipment=equipment_str,
+        restrictions=build_restriction_constraints(equipment_str, restrictions),
+        current_plan=current_plan,
+        feedback=feedback,
+        intents=", ".join(FUSED_INTENTS),
+    )
+    raw = llm.invoke(prompt, format=FUSED_RESPONSE_SCHEMA, max_tokens=fused_max_tokens(current_plan))
+    intent, response, proposed_plan = parse_fused_output(raw)
+
+    modified_plan = current_plan
+    if proposed_plan and proposed_plan.strip() != current_plan.strip():
+        reason = plan_rejection(proposed_plan, current_plan, feedback)
+        if reason:
+            print(f"⚠️ Rejected fused follow-up plan: {reason}")
+            response = PLAN_UNCHANGED_RESPONSE
+        else:
+            modified_plan = apply_equipment_and_restrictions(proposed_plan, equipment_str, restrictions)
+            modified_plan = ensure_exact_generation_format(modified_plan, equipment_str, goal)
+    if not response:
+        response = "I've updated your workout plan based on your request." if modified_plan != current_plan \
+            else "I've processed your feedback."
+
+    plan_changed = modified_plan.strip() != current_plan.strip()
+    print(f"✅ Fused follow-up done: intent={intent}, plan_changed={plan_changed}")
+    return {
+        "intent": intent,
+        "response": response,
+        "plan": modified_plan if plan_changed else current_plan,
+        "plan_changed": plan_changed,
+        "llm_calls": 1,
+    }
+
+
+def fused_followup_agent(state, llm):
+    """State-graph wrapper around fused_followup"""
+    outcome = fused_followup(
+        state.get("user_data", {}),
+        state.get("fitness_plan", ""),
+        state.get("feedback", ""),
+        llm,
+    )
+    state["fitness_plan"] = outcome["plan"]
+    state["followup_result"] = outcome
+    if outcome["plan_changed"]:
+        state["messages"].append(AIMessage(content=outcome["plan"]))
+    state["messages"].append(AIMessage(content=outcome["response"]))
+    return state
@@ -2,7 +2,9 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.messages import AIMessage
+from services.tracing import traced
 
+@traced("agent.motivational.motivational_agent")
 def motivational_agent(state, llm):
     prompt = ChatPromptTemplate.from_template(
         """You are an AI motivational coach. Based on this user's profile and recent progress, give a motivational tip:
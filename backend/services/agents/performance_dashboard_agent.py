@@ -8,6 +8,8 @@ from models.workoutLog_model import WorkoutLog, WorkoutExercise
 from models.user_profile import UserProfile
 from models.db import db
 from sqlalchemy import func, desc
+from services.streaks import get_streak
+from services.tracing import traced
 import statistics
 
 class PerformanceDashboardAgent:
@@ -115,7 +117,7 @@ class PerformanceDashboardAgent:
             intensity_data = self._analyze_workout_intensity(workout_logs)
             
             # Consistency metrics
-            consistency_data = self._analyze_consistency(workout_logs, start_date, end_date)
+            consistency_data = self._analyze_consistency(user_id, workout_logs, start_date, end_date)
             
             # Exercise performance tracking
             exercise_performance = self._analyze_exercise_performance(workout_logs, program_exercises)
@@ -183,21 +185,19 @@ class PerformanceDashboardAgent:
             "total_sessions": len(durations)
         }
     
-    def _analyze_consistency(self, workout_logs, start_date, end_date):
+    def _analyze_consistency(self, user_id, workout_logs, start_date, end_date):
         """Analyze workout consistency and patterns"""
+        # Streaks are over the user's whole history, not just the period (services/streaks.py)
+        streak = get_streak(user_id)
         if not workout_logs:
-            return {"consistency_score": 0, "longest_streak": 0, "current_streak": 0}
+            return {"consistency_score": 0, "longest_streak": streak["longest_streak"],
+                    "current_streak": streak["current_streak"]}
         
         # Calculate consistency score based on regularity
         total_days = (end_date - start_date).days
         workout_days = len(set(log.date for log in workout_logs))
         consistency_score = (workout_days / total_days * 100) if total_days > 0 else 0
         
-        # Calculate streaks
-        workout_dates = sorted([log.date for log in workout_logs])
-        current_streak = self._calculate_current_streak(workout_dates)
-        longest_streak = self._calculate_longest_streak(workout_dates)
-        
         # Weekly pattern analysis
         weekday_counts = {}
         for log in workout_logs:
@@ -208,57 +208,14 @@ class PerformanceDashboardAgent:
         
         return {
             "consistency_score": round(consistency_score, 1),
-            "current_streak": current_streak,
-            "longest_streak": longest_streak,
+            "current_streak": streak["current_streak"],
+            "longest_streak": streak["longest_streak"],
             "workout_days": workout_days,
             "total_possible_days": total_days,
             "preferred_workout_days": [day for day, count in preferred_days],
             "weekday_distribution": weekday_counts
         }
     
-    def _calculate_current_streak(self, workout_dates):
-        """Calculate current workout streak"""
-        if not workout_dates:
-            return 0
-        
-        today = datetime.utcnow().date()
-        streak = 0
-        check_date = today
-        
-        # Look back from today to find consecutive workout days
-        for i in range(30):  # Check last 30 days max
-            if check_date in workout_dates:
-                streak += 1
-                check_date -= timedelta(days=1)
-            else:
-                # Allow 1 day gap (rest days)
-                check_date -= timedelta(days=1)
-                if check_date in workout_dates:
-                    streak += 1
-                    check_date -= timedelta(days=1)
-                else:
-                    break
-        
-        return streak
-    
-    def _calculate_longest_streak(self, workout_dates):
-        """Calculate longest historical workout streak"""
-        if not workout_dates:
-            return 0
-        
-        longest = 0
-        current = 1
-        
-        for i in range(1, len(workout_dates)):
-            days_diff = (workout_dates[i] - workout_dates[i-1]).days
-            if days_diff <= 2:  # Allow 1 rest day between workouts
-                current += 1
-            else:
-                longest = max(longest, current)
-                current = 1
-        
-        return max(longest, current)
-    
     def _analyze_exercise_performance(self, workout_logs, program_exercises):
         """Analyze performance on specific exercises"""
         exercise_stats = {}
@@ -714,6 +671,7 @@ Keep each insight to 1-2 sentences. Be motivational and actionable.
 
 
 # Main agent function for integration with your existing system
+@traced("agent.performance_dashboard_agent.performance_dashboard_agent")
 def performance_dashboard_agent(state, llm):
     """
     Main agent function that generates performance dashboard
@@ -911,24 +869,8 @@ def get_dashboard_widget_data(user_id, widget_type="summary"):
     
 # ---- Achievements helpers (computed from existing tables; no new tables) ----
 from collections import Counter
-
-def _longest_streak_by_consecutive_days(dates_sorted):
-    if not dates_sorted:
-        return 0
-    best = cur = 1
-    for i in range(1, len(dates_sorted)):
-        gap = (dates_sorted[i] - dates_sorted[i-1]).days
-        if gap == 1:
-            cur += 1
-            best = max(best, cur)
-        elif gap > 1:
-            cur = 1
-    return best
-
-def _is_week_completed_simple(program_id, week):
-    total = WorkoutExercise.query.filter_by(program_id=program_id, week=week).count()
-    done  = WorkoutExercise.query.filter_by(program_id=program_id, week=week, completed=True).count()
-    return total > 0 and total == done
+from services.week_progression import completed_weeks, completed_day_pairs
+from services.streaks import runs as streak_runs
 
 def build_achievements_from_db(user_id):
     """
@@ -942,16 +884,15 @@ def build_achievements_from_db(user_id):
         return []
     program_id = program.id
 
-    # Logs and exercises
+    # Logs
     logs = WorkoutLog.query.filter_by(user_id=user_id, program_id=program_id).order_by(WorkoutLog.date.asc()).all()
-    exercises = WorkoutExercise.query.filter_by(program_id=program_id).all()
 
     dates_sorted = sorted({l.date for l in logs if getattr(l, "date", None)})
     durations = [int(l.duration or 0) for l in logs]
     workouts_by_iso_week = Counter([d.isocalendar()[:2] for d in dates_sorted])
 
     # Unique (week, day) with any completed exercise (no real dates here, used as fallback)
-    completed_pairs = {(ex.week, ex.day) for ex in exercises if ex.completed}
+    completed_pairs = completed_day_pairs(program_id)
 
     achievements = []
     def add(title, description, category, icon, unlocked_at=None, meta=None):
@@ -975,7 +916,7 @@ def build_achievements_from_db(user_id):
             add(label, f"You've completed {t} workout{'s' if t>1 else ''}!", "milestone", icon, unlocked_at)
 
     # --- Streaks from real dates
-    longest = _longest_streak_by_consecutive_days(dates_sorted)
+    _run, longest, _last = streak_runs(dates_sorted)
     if longest >= 3:
         add("3-Day Streak", "Three days in a row—nice momentum!", "streak", "🔥",
             unlocked_at=(dates_sorted[2].isoformat() if len(dates_sorted) >= 3 else None))
@@ -984,12 +925,9 @@ def build_achievements_from_db(user_id):
             unlocked_at=(dates_sorted[6].isoformat() if len(dates_sorted) >= 7 else None))
 
     # --- Completed weeks (every exercise completed)
-    week_rows = db.session.query(WorkoutExercise.week)\
-                .filter_by(program_id=program_id).distinct().order_by(WorkoutExercise.week).all()
-    for w in [w[0] for w in week_rows]:
-        if _is_week_completed_simple(program_id, w):
-            add(f"Week {w} Completed", "You finished every exercise for the week.",
-                "milestone", "✅", meta={"week": w})
+    for w in completed_weeks(program_id):
+        add(f"Week {w} Completed", "You finished every exercise for the week.",
+            "milestone", "✅", meta={"week": w})
 
     # --- Consistency week: any ISO week with 3+ workouts
     if any(v >= 3 for v in workouts_by_iso_week.values()):
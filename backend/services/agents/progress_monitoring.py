@@ -5,7 +5,10 @@ from models.workout_program import WorkoutProgram
 from models.workoutLog_model import WorkoutLog, WorkoutExercise
 from models.db import db
 import json
+from services.tracing import traced
+from services.streaks import get_streak
 
+@traced("agent.progress_monitoring.progress_monitoring_agent")
 def progress_monitoring_agent(user_data: dict, llm):
     """
     Enhanced progress monitoring agent that analyzes user's workout adherence 
@@ -37,7 +40,7 @@ def progress_monitoring_agent(user_data: dict, llm):
         ).order_by(WorkoutLog.date.desc()).all()
 
         # Calculate statistics
-        stats = calculate_workout_stats(program_exercises, recent_logs)
+        stats = calculate_workout_stats(program_exercises, recent_logs, user_id)
 
         # Generate insights using LLM
         insights = generate_ai_insights(user_data, stats, llm)
@@ -70,7 +73,7 @@ def progress_monitoring_agent(user_data: dict, llm):
             }
         }
 
-def calculate_workout_stats(program_exercises, recent_logs):
+def calculate_workout_stats(program_exercises, recent_logs, user_id):
     """Calculate detailed workout statistics"""
     
     # Group exercises by week and day for planned workouts
@@ -89,8 +92,8 @@ def calculate_workout_stats(program_exercises, recent_logs):
     # Calculate workout frequency
     total_completed_workouts = len(recent_logs)
     
-    # Calculate current streak
-    current_streak = calculate_current_streak(recent_logs)
+    # Current streak over the user's whole log history
+    current_streak = get_streak(user_id)["current_streak"]
     
     # Calculate weekly average
     weeks_in_period = min(4, len(set(log.date.isocalendar()[1] for log in recent_logs)) or 1)
@@ -127,35 +130,6 @@ def calculate_workout_stats(program_exercises, recent_logs):
         "completed_exercises": completed_exercises
     }
 
-def calculate_current_streak(recent_logs):
-    """Calculate the current workout streak in days"""
-    if not recent_logs:
-        return 0
-    
-    sorted_logs = sorted(recent_logs, key=lambda x: x.date, reverse=True)
-    streak = 0
-    current_date = datetime.utcnow().date()
-    
-    for log in sorted_logs:
-        days_diff = (current_date - log.date).days
-        if days_diff <= 1:
-            streak = 1
-            break
-
-    if streak == 0:
-        return 0
-
-    prev_date = sorted_logs[0].date
-    for log in sorted_logs[1:]:
-        days_gap = (prev_date - log.date).days
-        if days_gap <= 2:
-            streak += 1
-            prev_date = log.date
-        else:
-            break
-
-    return streak
-
 def generate_ai_insights(user_data, stats, llm):
     """Generate AI-powered insights about user's progress"""
 
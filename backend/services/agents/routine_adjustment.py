@@ -12,7 +12,10 @@ from datetime import datetime, timedelta
 from sqlalchemy import desc
 import re
 import json
+from services.tracing import traced
+from services.plan_ast import parse_plan
 
+@traced("agent.routine_adjustment.routine_adjustment_agent")
 def routine_adjustment_agent(state, llm):
     """
     Direct adjustment agent that modifies the workout plan and returns ONLY the complete modified plan.
@@ -54,6 +57,38 @@ def routine_adjustment_agent(state, llm):
     request_intent = analyze_user_intent(user_request)
     print(f"🧠 Detected intent: {request_intent}")
     
+    if request_intent in RULE_HANDLED_INTENTS:
+        modified_plan = apply_rule_based_adjustment(current_plan, user_request, request_intent, restrictions)
+    else:
+        # For complex modifications, use LLM with strict formatting
+        modified_plan = handle_complex_modification(
+            current_plan, user_request, goal, equipment_str, restrictions, llm
+        )
+    
+    # Apply equipment and restriction filters
+    modified_plan = apply_equipment_and_restrictions(modified_plan, equipment_str, restrictions)
+    
+    # Ensure proper format matching the original generation
+    modified_plan = ensure_exact_generation_format(modified_plan, equipment_str, goal)
+    
+    # Update state with the modified plan
+    state["fitness_plan"] = modified_plan
+    
+    # Return ONLY the plan as the response
+    state["messages"].append(AIMessage(content=modified_plan))
+    
+    print("✅ Plan modified and returned")
+    return state
+
+# Intents that analyze_user_intent detects and that are applied without the LLM
+RULE_HANDLED_INTENTS = ("remove_day", "reduce_days", "remove_exercise", "replace_exercise", "add_restrictions")
+
+@traced("agent.routine_adjustment.apply_rule_based_adjustment")
+def apply_rule_based_adjustment(current_plan, user_request, request_intent, restrictions):
+    """
+    Apply a rule-handled intent directly to the plan text (no LLM).
+    `restrictions` is extended in place for "add_restrictions".
+    """
     modified_plan = current_plan
     
     # Handle different types of requests with direct plan modifications
@@ -86,30 +121,11 @@ def routine_adjustment_agent(state, llm):
         # Handle new restrictions like "remove all jumping"
         new_restrictions = extract_new_restrictions(user_request)
         restrictions.extend(new_restrictions)
-        modified_plan = current_plan
         print(f"➕ Added restrictions: {new_restrictions}")
     
-    else:
-        # For complex modifications, use LLM with strict formatting
-        modified_plan = handle_complex_modification(
-            current_plan, user_request, goal, equipment_str, restrictions, llm
-        )
-    
-    # Apply equipment and restriction filters
-    modified_plan = apply_equipment_and_restrictions(modified_plan, equipment_str, restrictions)
-    
-    # Ensure proper format matching the original generation
-    modified_plan = ensure_exact_generation_format(modified_plan, equipment_str, goal)
-    
-    # Update state with the modified plan
-    state["fitness_plan"] = modified_plan
-    
-    # Return ONLY the plan as the response
-    state["messages"].append(AIMessage(content=modified_plan))
-    
-    print("✅ Plan modified and returned")
-    return state
+    return modified_plan
 
+@traced("agent.routine_adjustment.handle_complex_modification")
 def handle_complex_modification(current_plan, user_request, goal, equipment_str, restrictions, llm):
     """Handle complex modifications using LLM with strict output control"""
     
@@ -458,210 +474,77 @@ def extract_clean_plan(response):
     
     return '\n'.join(plan_lines).strip()
 
+TRAINING_NOTES_HEADER = "## Training Notes:"
+
 def ensure_exact_generation_format(plan_text, equipment_str, goal):
     """Ensure the plan matches the exact format from generation agent"""
     if not plan_text:
         return plan_text
-    
-    # Extract key information
-    day_count = len(re.findall(r'### Day \d+:', plan_text))
-    if day_count == 0:
-        day_count = 4  # Default fallback
-    
-    # Extract or determine plan style
-    style_match = re.search(r'## \d+-Day ([^\\n]+?) Workout Plan', plan_text)
-    if style_match:
-        style = style_match.group(1).strip()
-    else:
-        style = "Cardio Focus"  # Default from your example
-    
-    # Create proper header with description
-    header_lines = [
-        f"## {day_count}-Day {style} Workout Plan for {goal}",
-        "",
-        f"This {day_count}-day workout plan is designed for {goal} using {equipment_str}. Each workout takes 30-45 minutes.",
-        ""
-    ]
-    
-    # Extract content starting from first day
-    content_start = plan_text.find('### Day 1:')
-    if content_start != -1:
-        content = plan_text[content_start:]
-    else:
-        # If no Day 1 found, try to preserve existing content
-        lines = plan_text.split('\n')
-        content_lines = []
-        for line in lines:
-            if line.startswith('### Day') or line.startswith('**') or line.startswith('- ') or line.startswith('## Training'):
-                content_lines.append(line)
-        content = '\n'.join(content_lines)
-    
-    # Ensure Training Notes section exists
-    if "## Training Notes:" not in content:
-        training_notes = [
-            "",
-            "## Training Notes:",
+    return render_generation_format(parse_plan(plan_text), equipment_str, goal)
+
+def render_generation_format(plan, equipment_str, goal):
+    """Rewrite the title/intro/notes of a parsed plan to the generation agent's format and render it"""
+    day_count = plan.day_count or 4  # Default fallback
+    style = plan.style or "Cardio Focus"  # Default from your example
+
+    plan.title = f"## {day_count}-Day {style} Workout Plan for {goal}"
+    # Without any day headers keep whatever exercise/section lines the intro had
+    kept_intro = [] if plan.days else [line for line in plan.intro if line.startswith(('**', '- '))]
+    plan.intro = [
+        f"This {day_count}-day workout plan is designed for {goal} using {equipment_str}. Each workout takes 30-45 minutes."
+    ] + kept_intro
+
+    if not any(line.strip() == TRAINING_NOTES_HEADER for line in plan.trailer):
+        if plan.trailer:
+            plan.trailer.append("")
+        plan.trailer.extend([
+            TRAINING_NOTES_HEADER,
             "- **Progression:** Increase reps by 2-3 each week",
             "- **Rest:** Take at least 1 day of rest between workout days",
             "- **Form:** Focus on proper form over speed",
             f"- **Frequency:** Perform {day_count} days per week with rest days in between"
-        ]
-        content += '\n'.join(training_notes)
+        ])
     else:
         # Update frequency in existing notes
-        content = re.sub(
-            r'- \*\*Frequency:\*\* Perform \d+ days per week',
-            f'- **Frequency:** Perform {day_count} days per week',
-            content
-        )
-    
-    # Combine header with content
-    final_plan = '\n'.join(header_lines) + content
-    
-    return final_plan
+        plan.trailer = [
+            re.sub(r'- \*\*Frequency:\*\* Perform \d+ days per week',
+                   f'- **Frequency:** Perform {day_count} days per week', line)
+            for line in plan.trailer
+        ]
+
+    return plan.render()
 
-# Keep all the existing helper functions (remove_day_from_plan, reduce_days_in_plan, etc.)
-# but ensure they call ensure_exact_generation_format at the end
+def _render_edited_plan(plan):
+    """Re-render an edited plan keeping its own goal/equipment"""
+    return render_generation_format(plan, plan.equipment or "bodyweight only", plan.goal or "General Fitness")
 
 def remove_day_from_plan(plan_text, day_number):
     """Remove a specific day from the workout plan and reformat"""
-    lines = plan_text.split('\n')
-    result_lines = []
-    skip_section = False
-    day_counter = 0
-    
-    for line in lines:
-        if re.match(r'###?\s*Day\s*\d+:', line, re.IGNORECASE):
-            day_match = re.search(r'Day\s*(\d+)', line, re.IGNORECASE)
-            if day_match and int(day_match.group(1)) == day_number:
-                skip_section = True
-                continue
-            else:
-                skip_section = False
-                if not skip_section:
-                    day_counter += 1
-                    day_parts = line.split(':', 1)
-                    if len(day_parts) > 1:
-                        day_name = day_parts[1].strip()
-                        line = f"### Day {day_counter}: {day_name}"
-                    else:
-                        line = f"### Day {day_counter}:"
-        elif line.startswith('##') and not line.startswith('###'):
-            skip_section = False
-        
-        if not skip_section:
-            result_lines.append(line)
-    
-    result_text = '\n'.join(result_lines)
-    
-    # Extract equipment and goal for proper formatting
-    equipment_match = re.search(r'using ([^\\n\\.]+?)\\. Each workout', result_text)
-    equipment = equipment_match.group(1).strip() if equipment_match else "bodyweight only"
-    
-    goal_match = re.search(r'Plan for ([^\\n\\.]+)', result_text)
-    goal = goal_match.group(1).strip() if goal_match else "General Fitness"
-    
-    return ensure_exact_generation_format(result_text, equipment, goal)
+    plan = parse_plan(plan_text)
+    plan.remove_day(day_number)
+    return _render_edited_plan(plan)
 
 def reduce_days_in_plan(plan_text, target_days):
     """Reduce the plan to a specific number of days"""
-    lines = plan_text.split('\n')
-    result_lines = []
-    current_day = 0
-    skip_section = False
-    day_counter = 0
-    
-    for line in lines:
-        if re.match(r'###?\s*Day\s*\d+:', line, re.IGNORECASE):
-            day_match = re.search(r'Day\s*(\d+)', line, re.IGNORECASE)
-            if day_match:
-                current_day = int(day_match.group(1))
-                if current_day > target_days:
-                    skip_section = True
-                    continue
-                else:
-                    skip_section = False
-                    day_counter += 1
-                    day_parts = line.split(':', 1)
-                    if len(day_parts) > 1:
-                        day_name = day_parts[1].strip()
-                        line = f"### Day {day_counter}: {day_name}"
-                    else:
-                        line = f"### Day {day_counter}:"
-        elif line.startswith('##') and not line.startswith('###'):
-            skip_section = False
-        
-        if not skip_section:
-            result_lines.append(line)
-    
-    result_text = '\n'.join(result_lines)
-    
-    # Extract equipment and goal for proper formatting
-    equipment_match = re.search(r'using ([^\\n\\.]+?)\\. Each workout', result_text)
-    equipment = equipment_match.group(1).strip() if equipment_match else "bodyweight only"
-    
-    goal_match = re.search(r'Plan for ([^\\n\\.]+)', result_text)
-    goal = goal_match.group(1).strip() if goal_match else "General Fitness"
-    
-    return ensure_exact_generation_format(result_text, equipment, goal)
+    plan = parse_plan(plan_text)
+    plan.keep_days(target_days)
+    return _render_edited_plan(plan)
 
 def remove_exercise_from_plan(plan_text, exercise_name):
     """Remove a specific exercise from the workout plan"""
-    lines = plan_text.split('\n')
-    result_lines = []
-    
-    # Create flexible pattern to match the exercise
-    exercise_patterns = []
+    plan = parse_plan(plan_text)
     if exercise_name:
-        # Handle different variations of the exercise name
-        base_name = exercise_name.lower().replace('-', '').replace(' ', '')
-        exercise_patterns = [
-            re.compile(re.escape(exercise_name), re.IGNORECASE),
-            re.compile(exercise_name.replace(' ', '[ -]'), re.IGNORECASE),
-            re.compile(exercise_name.replace('-', '[ -]'), re.IGNORECASE)
-        ]
-    
-    for line in lines:
-        should_remove = False
-        line_lower = line.lower()
-        
-        # Check if this line contains the target exercise
-        for pattern in exercise_patterns:
-            if pattern.search(line) and ('sets' in line_lower or 'reps' in line_lower or 'seconds' in line_lower):
-                should_remove = True
-                print(f"🗑️ Removing line: {line}")
-                break
-        
-        if not should_remove:
-            result_lines.append(line)
-    
-    result_text = '\n'.join(result_lines)
-    
-    # Clean up extra blank lines
-    result_text = re.sub(r'\n\n\n+', '\n\n', result_text)
-    
-    # Extract equipment and goal for proper formatting
-    equipment_match = re.search(r'using ([^\\n\\.]+?)\\. Each workout', result_text)
-    equipment = equipment_match.group(1).strip() if equipment_match else "bodyweight only"
-    
-    goal_match = re.search(r'Plan for ([^\\n\\.]+)', result_text)
-    goal = goal_match.group(1).strip() if goal_match else "General Fitness"
-    
-    return ensure_exact_generation_format(result_text, equipment, goal)
+        # Handle different variations of the exercise name ("push ups", "push-ups")
+        pattern = re.compile(re.escape(exercise_name.lower()).replace(r'\ ', '[ -]').replace(r'\-', '[ -]'),
+                             re.IGNORECASE)
+        plan.remove_exercise(lambda name: bool(pattern.search(name)))
+    return _render_edited_plan(plan)
 
 def replace_exercise_in_plan(plan_text, old_exercise, new_exercise):
     """Replace an exercise with another in the workout plan"""
-    old_pattern = re.compile(re.escape(old_exercise), re.IGNORECASE)
-    result_text = old_pattern.sub(new_exercise, plan_text)
-    
-    # Extract equipment and goal for proper formatting
-    equipment_match = re.search(r'using ([^\\n\\.]+?)\\. Each workout', result_text)
-    equipment = equipment_match.group(1).strip() if equipment_match else "bodyweight only"
-    
-    goal_match = re.search(r'Plan for ([^\\n\\.]+)', result_text)
-    goal = goal_match.group(1).strip() if goal_match else "General Fitness"
-    
-    return ensure_exact_generation_format(result_text, equipment, goal)
+    plan = parse_plan(plan_text)
+    plan.replace_exercise(old_exercise, new_exercise)
+    return _render_edited_plan(plan)
 
 def extract_day_from_feedback(feedback):
     """Extract which day the user wants to modify"""
@@ -1,6 +1,8 @@
 import re
 from langchain_core.messages import AIMessage
 from services.rag_pipeline import load_retriever, ask_rag_question
+from services.tracing import traced
+from services.structured_plan import PLAN_OUTPUT_MODE, generate_structured_plan
 
 # Define your valid options exactly as your frontend dropdowns
 VALID_GOALS = [
@@ -136,6 +138,7 @@ def create_fallback_plan(days, style, goal, equipment_raw):
     
     return plan
 
+@traced("agent.routine_generation.get_rag_based_exercises")
 def get_rag_based_exercises(goal, equipment_raw, experience, retriever):
     """Query RAG system for relevant exercises based on user requirements - OPTIMIZED"""
     
@@ -176,13 +179,15 @@ def get_rag_based_exercises(goal, equipment_raw, experience, retriever):
         print(f"❌ RAG retrieval failed: {e}")
         return None
 
-def generate_rag_based_plan(days, style, goal, equipment_raw, experience, retriever, llm):
+@traced("agent.routine_generation.generate_rag_based_plan")
+def generate_rag_based_plan(days, style, goal, equipment_raw, experience, retriever, llm, rag_context=None):
     """Generate workout plan using RAG-retrieved information - OPTIMIZED"""
     
     try:
-        # Get RAG-based context with optimized single call
-        print("🧠 Retrieving relevant fitness knowledge from RAG system...")
-        rag_context = get_rag_based_exercises(goal, equipment_raw, experience, retriever)
+        # Get RAG-based context with optimized single call (unless the caller already has it)
+        if rag_context is None:
+            print("🧠 Retrieving relevant fitness knowledge from RAG system...")
+            rag_context = get_rag_based_exercises(goal, equipment_raw, experience, retriever)
         
         if not rag_context:
             print("⚠️ No RAG context retrieved, falling back...")
@@ -266,6 +271,7 @@ Generate {days} workout days with exercises, sets, reps."""
         print(f"❌ RAG-based generation failed: {e}")
         return None, False
 
+@traced("agent.routine_generation.routine_generation_agent")
 def routine_generation_agent(state, retriever, llm):
     """
     Enhanced workout routine generator with RAG integration
@@ -341,14 +347,32 @@ def routine_generation_agent(state, retriever, llm):
             print("🔧 Loading RAG retriever...")
             retriever = load_retriever()
         
-        # Try RAG-based generation first
-        rag_plan, rag_success = generate_rag_based_plan(
-            days, style, goal, equipment_raw, experience, retriever, llm
-        )
+        plan_structure = None
+        rag_context = None
+        rag_plan, rag_success = None, False
+
+        # Schema-constrained JSON first: program_text is rendered from it and
+        # the exercise structure is kept, so the plan never needs parsing
+        if PLAN_OUTPUT_MODE == "structured":
+            print("🧱 Generating structured workout plan...")
+            rag_context = get_rag_based_exercises(goal, equipment_raw, experience, retriever)
+            full_plan, plan_structure = generate_structured_plan(
+                days, style, goal, equipment_raw, experience, llm, rag_context
+            )
+
+        if plan_structure is None:
+            # Free-text RAG generation
+            rag_plan, rag_success = generate_rag_based_plan(
+                days, style, goal, equipment_raw, experience, retriever, llm, rag_context
+            )
         
-        if rag_success and rag_plan:
+        if plan_structure is not None:
+            print("✅ Using structured workout plan")
+            plan_source = "rag" if rag_context else "llm"
+        elif rag_success and rag_plan:
             print("✅ Using RAG-enhanced workout plan")
             full_plan = rag_plan
+            plan_source = "rag"
         else:
             print("🔄 RAG generation failed, trying simple LLM approach...")
             
@@ -408,6 +432,7 @@ Generate all {days} days now."""
                         plan_text += f"- Perform {days} days per week\n"
                     
                     full_plan = plan_text
+                    plan_source = "llm"
                     
                 else:
                     print(f"⚠️ Simple LLM generation incomplete ({day_count} days), using fallback")
@@ -417,9 +442,10 @@ Generate all {days} days now."""
                 print(f"❌ Simple LLM generation failed: {e}")
                 print("🔧 Using emergency fallback plan generation...")
                 full_plan = create_fallback_plan(days, style, goal, equipment_raw)
+                plan_source = "fallback"
         
-        # Final equipment validation for bodyweight
-        if equipment_raw == "Bodyweight Only":
+        # Final equipment validation for bodyweight (structured plans are cleaned before rendering)
+        if equipment_raw == "Bodyweight Only" and plan_structure is None:
             forbidden_terms = ["dumbbell", "barbell", "machine", "weight", "kettlebell"]
             for term in forbidden_terms:
                 if term.lower() in full_plan.lower():
@@ -432,6 +458,8 @@ Generate all {days} days now."""
         
         # Save to state
         state["fitness_plan"] = full_plan
+        state["plan_source"] = plan_source
+        state["plan_structure"] = plan_structure
         state["messages"].append(AIMessage(content=full_plan))
         
         print("✅ RAG-ENHANCED WORKOUT PLAN GENERATION COMPLETE")
@@ -446,5 +474,7 @@ Generate all {days} days now."""
         emergency_plan = create_fallback_plan(days, style, goal, equipment_raw)
         
         state["fitness_plan"] = emergency_plan
+        state["plan_source"] = "fallback"
+        state["plan_structure"] = None
         state["messages"].append(AIMessage(content=emergency_plan))
         return state
\ No newline at end of file
@@ -1,6 +1,7 @@
 #routine_generation_no_rag.py
 import re
 from langchain_core.messages import AIMessage
+from services.tracing import traced
 
 # Define your valid options exactly as your frontend dropdowns
 VALID_GOALS = [
@@ -136,6 +137,7 @@ def create_fallback_plan(days, style, goal, equipment_raw):
     
     return plan
 
+@traced("agent.routine_generation_no_rag.routine_generation_agent")
 def routine_generation_agent(state, retriever, llm):
     """
     Generates a personalized workout routine - SIMPLIFIED OLLAMA VERSION
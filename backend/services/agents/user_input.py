@@ -1,18 +1,35 @@
 # 📄 services/agents/user_input.py
+import os
 import json
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from services.profile_normalizer import normalize_profile
+from services.tracing import traced
 
-def user_input_agent(state, llm):
-    prompt = ChatPromptTemplate.from_template(
-        "You are an AI fitness coach. Convert this user profile into structured JSON:\n{user_input}\nRespond only with valid JSON."
-    )
-    chain = prompt | llm | StrOutputParser()
-    user_profile = chain.invoke({"user_input": json.dumps(state["user_data"])})
+# Only genuinely free-text fields (restrictions, injuries, ...) are ever sent to the LLM,
+# and only when this flag is on. Closed-vocabulary fields are normalized deterministically.
+PROFILE_LLM_FREE_TEXT = os.getenv("PROFILE_LLM_FREE_TEXT", "false").lower() == "true"
 
-    try:
-        state["user_data"] = json.loads(user_profile)
-    except json.JSONDecodeError:
-        pass  # Keep original if JSON parsing fails
+@traced("agent.user_input.user_input_agent")
+def user_input_agent(state, llm, use_llm_for_free_text=None):
+    user_data, free_text = normalize_profile(state["user_data"])
 
+    if use_llm_for_free_text is None:
+        use_llm_for_free_text = PROFILE_LLM_FREE_TEXT
+
+    if free_text and use_llm_for_free_text:
+        prompt = ChatPromptTemplate.from_template(
+            "You are an AI fitness coach. From these free-text notes, list the workout restrictions "
+            "as short phrases (e.g. \"no jumping\", \"no running\", \"no dumbbell\"):\n{free_text}\n"
+            "Respond only with a valid JSON array of strings."
+        )
+        chain = prompt | llm | StrOutputParser()
+        try:
+            restrictions = json.loads(chain.invoke({"free_text": json.dumps(free_text)}))
+            if isinstance(restrictions, list):
+                user_data["restrictions"] = [str(r) for r in restrictions if r]
+        except Exception as e:
+            print(f"⚠️ Free-text profile interpretation failed: {e}")
+
+    state["user_data"] = user_data
     return state
@@ -1,13 +1,22 @@
 #coach.py
 import os
+import threading
+import time
+import contextvars
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from typing import TypedDict, List
+from typing import TypedDict, List, Optional
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import HumanMessage, BaseMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
+from flask import current_app, has_app_context
 import re
 from services.llm_engine import LLMEngine
 from services.rag_pipeline import load_retriever
 from models.user_profile import UserProfile
+from services.tracing import traced, span
+from services.plan_cache import get_plan_cache
 
 # Agents
 from services.agents.user_input import user_input_agent
@@ -15,6 +24,7 @@ from services.agents.routine_generation import routine_generation_agent
 from services.agents.feedback_collection import feedback_collection_agent
 from services.agents.routine_adjustment import routine_adjustment_agent
 from services.agents.progress_monitoring import progress_monitoring_agent
+from services.agents.followup_fused import fused_followup, rule_based_followup
 # Optionally available agents for future use
 # from services.agents.motivational import motivational_agent
 # from services.agents.progress_monitoring import progress_monitoring_agent
@@ -23,6 +33,10 @@ from services.agents.progress_monitoring import progress_monitoring_agent
 load_dotenv()
 api_key = os.getenv("OPENROUTER_API_KEY")
 
+# "fused": one structured LLM call per follow-up (default)
+# "multi_agent": feedback_collection | routine_adjustment | progress_monitoring (parallel)
+FOLLOWUP_PIPELINE = os.getenv("FOLLOWUP_PIPELINE", "fused").lower()
+
 # 🧠 Define shared state across agents
 class State(TypedDict):
     user_data: dict
@@ -30,30 +44,194 @@ class State(TypedDict):
     feedback: str
     progress: List[str]
     messages: List[BaseMessage]
+    plan_structure: Optional[dict]   # {"plan", "weeks"} when the plan came from structured output
+
+# 🧩 Compiled graph registry
+# Graphs are compiled once per process and shared by every AIFitnessCoach and
+# every request thread. Nodes never close over a coach instance: the LLM and
+# retriever are passed per invocation through config["configurable"], so a
+# compiled graph holds no mutable per-request state.
+_compiled_graphs = {}
+_compiled_graphs_lock = threading.Lock()
+graph_build_stats = {}
+
+def _user_input_node(state: State, config: RunnableConfig):
+    deps = config["configurable"]
+    return user_input_agent(state, deps["llm"])
+
+def _routine_generation_node(state: State, config: RunnableConfig):
+    deps = config["configurable"]
+    plan_cache = deps.get("plan_cache")
+    if plan_cache is None:
+        state = routine_generation_agent(state, deps["retriever"], deps["llm"])
+        state.pop("plan_source", None)
+        return state
+
+    def generate():
+        generated = routine_generation_agent(state, deps["retriever"], deps["llm"])
+        # Emergency fallback plans are cheap and should not be pinned for the TTL
+        return generated["fitness_plan"], generated.pop("plan_source", None) != "fallback"
+
+    with span("coach.plan_cache") as cache_span:
+        plan, status = plan_cache.get_or_generate(state["user_data"], generate)
+        cache_span.set(status=status)
+    if status != "miss":
+        # Cached entries hold text only; the background parser (via the parse cache) handles these
+        state["fitness_plan"] = plan
+        state["plan_structure"] = None
+        state["messages"].append(AIMessage(content=plan))
+    return state
+
+def build_initial_graph():
+    graph = StateGraph(State)
+
+    # 🔁 Basic flow: collect input ➜ generate routine ➜ end
+    graph.add_node("user_input", _user_input_node)
+    graph.add_node("routine_generation", _routine_generation_node)
+
+    graph.add_edge("user_input", "routine_generation")
+    graph.add_edge("routine_generation", END)
+
+    graph.set_entry_point("user_input")
+    return graph.compile()
+
+def get_compiled_graph(name, builder):
+    """Return the process-wide compiled graph for `name`, building it on first use"""
+    graph = _compiled_graphs.get(name)
+    if graph is not None:
+        return graph
+
+    with _compiled_graphs_lock:
+        graph = _compiled_graphs.get(name)
+        if graph is None:
+            start = time.perf_counter()
+            graph = builder()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            stats = graph_build_stats.setdefault(name, {"builds": 0, "total_ms": 0.0, "last_ms": 0.0})
+            stats["builds"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["last_ms"] = elapsed_ms
+            print(f"🧩 Compiled '{name}' graph in {elapsed_ms:.1f}ms")
+
+            _compiled_graphs[name] = graph
+    return graph
+
+def get_graph_build_stats():
+    """Snapshot of graph compile counts and timings (ms) per graph name"""
+    with _compiled_graphs_lock:
+        return {name: dict(stats) for name, stats in graph_build_stats.items()}
+
+# 🔀 Follow-up branches
+# Each branch gets its own copy of the state (fresh message list) so nothing is
+# shared between worker threads; join_followup_branches merges them in a fixed order.
+FOLLOWUP_BRANCHES = ("feedback_collection", "routine_adjustment", "progress_monitoring")
+
+def _branch_state(state):
+    branch = dict(state)
+    branch["messages"] = []
+    branch["progress"] = list(state.get("progress", []))
+    return branch
+
+def _feedback_branch(state, llm):
+    return feedback_collection_agent(_branch_state(state), llm)
+
+def _adjustment_branch(state, llm):
+    return routine_adjustment_agent(_branch_state(state), llm)
+
+def _progress_branch(state, llm):
+    # progress_monitoring_agent takes the profile, not the graph state
+    return progress_monitoring_agent(state["user_data"], llm)
+
+_FOLLOWUP_BRANCH_FUNCS = {
+    "feedback_collection": _feedback_branch,
+    "routine_adjustment": _adjustment_branch,
+    "progress_monitoring": _progress_branch,
+}
+
+def _timed_branch(name, func, state, llm, app):
+    # Worker threads need their own app context for the agents' DB queries
+    context = app.app_context() if app is not None else nullcontext()
+    start = time.perf_counter()
+    with context, span(f"coach.branch.{name}"):
+        try:
+            result = func(state, llm)
+        except Exception as e:
+            print(f"[run_followup] {name} error: {e}")
+            result = None
+    return result, (time.perf_counter() - start) * 1000
+
+def run_followup_branches(state, llm):
+    """
+    Run the independent follow-up agents concurrently.
+    Returns ({branch: result or None}, {branch: ms, "total": ms, "critical_path": branch}).
+    """
+    app = current_app._get_current_object() if has_app_context() else None
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(FOLLOWUP_BRANCHES), thread_name_prefix="followup") as pool:
+        futures = {
+            # copy_context() carries the active trace into each worker thread
+            name: pool.submit(contextvars.copy_context().run, _timed_branch,
+                              name, _FOLLOWUP_BRANCH_FUNCS[name], state, llm, app)
+            for name in FOLLOWUP_BRANCHES
+        }
+        outcomes = {name: future.result() for name, future in futures.items()}
+
+    results = {name: result for name, (result, _) in outcomes.items()}
+    timings = {name: round(ms, 1) for name, (_, ms) in outcomes.items()}
+    timings["critical_path"] = max(FOLLOWUP_BRANCHES, key=lambda name: timings[name])
+    timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+    print("⏱️ Follow-up branches: " + ", ".join(f"{name}={timings[name]}ms" for name in FOLLOWUP_BRANCHES)
+          + f" | total={timings['total']}ms (critical path: {timings['critical_path']})")
+    return results, timings
+
+def join_followup_branches(state, results):
+    """Merge branch results: feedback analysis, then the adjusted plan, then the progress report"""
+    joined = dict(state)
+    joined["messages"] = list(state.get("messages", []))
+    joined["progress"] = list(state.get("progress", []))
+
+    feedback_state = results.get("feedback_collection")
+    if feedback_state:
+        joined["messages"].extend(feedback_state.get("messages", []))
+        if "parsed_feedback" in feedback_state:
+            joined["parsed_feedback"] = feedback_state["parsed_feedback"]
+
+    adjusted_state = results.get("routine_adjustment")
+    if adjusted_state:
+        joined["messages"].extend(adjusted_state.get("messages", []))
+        adjusted_plan = adjusted_state.get("fitness_plan")
+        if adjusted_plan and adjusted_plan != state.get("fitness_plan"):
+            joined["fitness_plan"] = adjusted_plan
+            print(f"✅ routine_adjustment modified the plan (length: {len(adjusted_plan)} chars)")
+        else:
+            print("📋 routine_adjustment did not modify the plan")
+
+    report = (results.get("progress_monitoring") or {}).get("adherence_report")
+    if report:
+        joined["progress"].append(report)
+
+    return joined
 
 # 🤖 Main Fitness Coach Orchestrator
 class AIFitnessCoach:
-    def __init__(self):
-        self.llm = LLMEngine(provider="ollama", model="qwen2.5:3b-instruct", timeout=180)
-        self.retriever = load_retriever()
+    def __init__(self, llm=None, retriever=None, plan_cache=None):
+        self.llm = llm or LLMEngine(provider="ollama", model="qwen2.5:3b-instruct", timeout=180)
+        self.retriever = retriever if retriever is not None else load_retriever()
+        # None -> shared process cache (if enabled); False -> always generate
+        self.plan_cache = get_plan_cache() if plan_cache is None else (plan_cache or None)
         self.graph = self.create_graph()
+        self.last_followup_timings = {}
 
     def create_graph(self):
-        graph = StateGraph(State)
-
-        # 🔁 Basic flow: collect input ➜ generate routine ➜ end
-        graph.add_node("user_input", lambda state: user_input_agent(state, self.llm))
-        graph.add_node("routine_generation", lambda state: routine_generation_agent(state, self.retriever, self.llm))
+        return get_compiled_graph("initial", build_initial_graph)
 
-        graph.add_edge("user_input", "routine_generation")
-        graph.add_edge("routine_generation", END)
-
-        graph.set_entry_point("user_input")
-        return graph.compile()
+    def _graph_config(self):
+        return {"configurable": {"llm": self.llm, "retriever": self.retriever, "plan_cache": self.plan_cache}}
 
     # 🟢 Entry point for initial generation
+    @traced("coach.run_initial")
     def run_initial(self, user_input: dict):
-        fresh_graph = self.create_graph() 
         state = State(
             user_data=user_input,
             fitness_plan="",
@@ -61,23 +239,22 @@ class AIFitnessCoach:
             progress=[],
             messages=[HumanMessage(content=str(user_input))],
         )
-        result = fresh_graph.invoke(state)
+        result = self.graph.invoke(state, config=self._graph_config())
         return {
             "fitness_plan": result.get("fitness_plan", "").strip(),
             "feedback": result.get("feedback", "").strip(),
             "progress": result.get("progress", []),
+            "plan_structure": result.get("plan_structure"),
             "messages": result.get("messages", [])  # Enable if needed for debugging
         }
 
-    # 🔄 Entry point for follow-up (adjustments based on feedback)
-    # In acoach.py
-
-    def run_followup(self, user_id: str, current_plan: str, feedback: str):
+    @traced("coach.load_user_data")
+    def _load_user_data(self, user_id: str):
         user_profile = UserProfile.query.filter_by(firebase_uid=user_id).first()
         if not user_profile:
-            return [AIMessage(content="⚠️ Could not find your fitness profile. Please complete onboarding.")]
+            return None
 
-        user_data = {
+        return {
             "firebase_uid": user_id,
             "gender": user_profile.gender,
             "age": user_profile.age,
@@ -90,6 +267,41 @@ class AIFitnessCoach:
             "name": "athlete",
         }
 
+    # ⚡ Single-pass follow-up: at most one LLM call, structured result
+    @traced("coach.run_followup_fused")
+    def run_followup_fused(self, user_id: str, current_plan: str, feedback: str, user_data: dict = None):
+        if user_data is None:
+            user_data = self._load_user_data(user_id)
+        if not user_data:
+            return {
+                "intent": "other",
+                "response": "⚠️ Could not find your fitness profile. Please complete onboarding.",
+                "plan": current_plan,
+                "plan_changed": False,
+                "llm_calls": 0,
+            }
+        return fused_followup(user_data, current_plan, feedback, self.llm)
+
+    # 🚀 Rule-handled intents (remove_day, replace_exercise, ...): zero LLM calls
+    @traced("coach.run_followup_fast")
+    def run_followup_fast(self, user_id: str, current_plan: str, feedback: str, intent: str, user_data: dict = None):
+        if user_data is None:
+            user_data = self._load_user_data(user_id)
+        if not user_data:
+            return None
+        return rule_based_followup(user_data, current_plan, feedback, intent)
+
+    # 🔄 Entry point for follow-up (adjustments based on feedback)
+    # Feedback analysis, routine adjustment and progress monitoring only read the
+    # incoming plan/feedback/profile, so they run as parallel branches and are
+    # joined into one state at the end. Wall time is the slowest branch.
+    @traced("coach.run_followup")
+    def run_followup(self, user_id: str, current_plan: str, feedback: str, user_data: dict = None):
+        if user_data is None:
+            user_data = self._load_user_data(user_id)
+        if not user_data:
+            return [AIMessage(content="⚠️ Could not find your fitness profile. Please complete onboarding.")]
+
         state = State(
             user_data=user_data,
             fitness_plan=current_plan,
@@ -101,73 +313,14 @@ class AIFitnessCoach:
         print(f"🔄 Starting followup pipeline...")
         print(f"📋 Initial plan length: {len(current_plan)} chars")
 
-        # Store the original plan for comparison
-        original_plan = current_plan
-        plan_modified = False
-
-        # ⛓️ Feedback collection ➜ Routine adjustment ➜ Progress monitoring
-        for i, agent in enumerate([
-            lambda s: feedback_collection_agent(s, self.llm),
-            lambda s: routine_adjustment_agent(s, self.llm),
-            lambda s: progress_monitoring_agent(s, self.llm),
-        ]):
-            try:
-                print(f"🤖 Running agent {i+1}...")
-                
-                # Store state before agent
-                plan_before = state.get("fitness_plan", "")
-                
-                # Run the agent
-                new_state = agent(state)
-                if new_state:
-                    state = new_state
-                
-                # Check if plan was modified by this agent
-                plan_after = state.get("fitness_plan", "")
-                if plan_after != plan_before and plan_after != original_plan:
-                    plan_modified = True
-                    print(f"✅ Agent {i+1} modified the plan (length: {len(plan_after)} chars)")
-                    
-                    # If routine_adjustment_agent modified the plan, don't let future agents overwrite it
-                    if i == 1:  # routine_adjustment_agent is index 1
-                        print(f"🔒 Protecting plan changes from routine_adjustment_agent")
-                        # Store the modified plan
-                        modified_plan = plan_after
-                        
-                        # Continue with remaining agents but restore plan if they overwrite
-                        original_messages = state.get("messages", []).copy()
-                        
-                        # Run remaining agents
-                        for j, remaining_agent in enumerate([lambda s: progress_monitoring_agent(s, self.llm)][i-1:]):
-                            try:
-                                print(f"🤖 Running remaining agent {j+2}...")
-                                before_plan = state.get("fitness_plan", "")
-                                
-                                remaining_state = remaining_agent(state)
-                                if remaining_state:
-                                    state = remaining_state
-                                
-                                after_plan = state.get("fitness_plan", "")
-                                
-                                # If this agent overwrote our plan changes, restore them
-                                if after_plan != before_plan and before_plan == modified_plan:
-                                    print(f"⚠️ Agent {j+2} overwrote plan changes, restoring...")
-                                    state["fitness_plan"] = modified_plan
-                                
-                            except Exception as e:
-                                print(f"[run_followup] Remaining agent {j+2} error: {e}")
-                        
-                        break  # Don't run any more agents in the main loop
-                else:
-                    print(f"📋 Agent {i+1} did not modify the plan")
-                    
-            except Exception as e:
-                print(f"[run_followup] Agent {i+1} error: {e}")
+        results, timings = run_followup_branches(state, self.llm)
+        state = join_followup_branches(state, results)
+        self.last_followup_timings = timings
 
         # Final verification
         final_plan = state.get("fitness_plan", current_plan)
-        if final_plan != original_plan:
-            original_days = len(re.findall(r'### Day \d+:', original_plan))
+        if final_plan != current_plan:
+            original_days = len(re.findall(r'### Day \d+:', current_plan))
             final_days = len(re.findall(r'### Day \d+:', final_plan))
             print(f"🎯 FINAL RESULT: Plan changed from {original_days} days to {final_days} days")
         else:
@@ -183,4 +336,4 @@ class AIFitnessCoach:
             if hasattr(msg, 'content'):
                 print(f"📨 Message {i}: {str(msg.content)[:100]}...")
 
-        return messages
\ No newline at end of file
+        return messages
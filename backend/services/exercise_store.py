@@ -0,0 +1,266 @@
+# services/exercise_store.py - Set-based writes of WorkoutExercise rows
+#
+# Materializing a program or a generated week used to create one ORM object
+# per exercise (plus a print per row) and to delete old rows by loading and
+# deleting each object. These helpers issue one DELETE per replacement and
+# batched multi-row INSERT statements through SQLAlchemy Core, inside the
+# caller's transaction (nothing here commits).
+#
+# Generated ids come back through RETURNING where the dialect supports it
+# (SQLite 3.35+, PostgreSQL, MariaDB 10.5+); on MySQL they are read back with
+# one ordered SELECT of the rows just written.
+#
+# Every write marks its programs and exercises so services/plan_view.py bumps
+# their versions and rebuilds their cached views at commit.
+#
+# Clients address exercises by WorkoutExercise.id. The old positional ids
+# ("programid_week_day_index") are still resolved to a row id for old clients.
+
+from datetime import datetime
+
+from sqlalchemy import bindparam, func, insert, select, update
+
+from models.db import db
+from models.workout_program import WorkoutProgram
+from models.workoutLog_model import WorkoutExercise
+from services.plan_view import mark_program
+
+_table = WorkoutExercise.__table__
+
+
+def exercise_row(program_id, week, day, day_label, exercise, now=None):
+    """Insert mapping for one exercise dict ({"name", "sets", "reps", "rest_seconds", "notes"?})"""
+    return {
+        "program_id": program_id,
+        "week": week,
+        "day": day,
+        "day_label": day_label,
+        "name": exercise.get("name", "Unknown Exercise"),
+        "sets": exercise.get("sets", 3),
+        "reps": exercise.get("reps", 10),
+        "rest_seconds": exercise.get("rest_seconds", 60),
+        "notes": exercise.get("notes") or None,
+        "completed": False,
+        "created_at": now or datetime.utcnow(),
+    }
+
+
+def rows_from_plan_data(parsed_data, program_id):
+    """Insert mappings for the frontend structure {"Week n": {"Day n": {"label", "exercises"}}}"""
+    now = datetime.utcnow()
+    rows = []
+    for week_key, week_data in parsed_data.items():
+        if not week_key.startswith("Week "):
+            continue
+        try:
+            week_num = int(week_key.replace("Week ", ""))
+        except ValueError:
+            print(f"⚠️ Invalid week key: {week_key}")
+            continue
+
+        for day_key, day_data in week_data.items():
+            if not day_key.startswith("Day "):
+                continue
+            try:
+                day_num = int(day_key.replace("Day ", ""))
+            except ValueError:
+                print(f"⚠️ Invalid day key: {day_key}")
+                continue
+
+            day_label = day_data.get("label", f"Day {day_num}")
+            rows.extend(
+                exercise_row(program_id, week_num, day_num, day_label, exercise, now)
+                for exercise in day_data.get("exercises", [])
+            )
+    return rows
+
+
+def _supports_returning():
+    dialect = db.session.get_bind().dialect
+    return getattr(dialect, "insert_returning", None) or getattr(dialect, "full_returning", False)
+
+
+def insert_exercises(rows):
+    """
+    Batched INSERT of exercise mappings into (program, week) slices that are
+    empty (replaced or newly generated weeks); returns the ids in insertion order.
+    """
+    if not rows:
+        return []
+
+    # Passing the rows as executemany parameters lets SQLAlchemy batch them into
+    # multi-row INSERTs from one cached compiled statement; building them with
+    # .values(rows) recompiled a bind parameter per value on every call.
+    if _supports_returning():
+        # Autoincrement ids grow with insertion order; sorting avoids sort_by_parameter_order,
+        # which makes SQLite fall back to one INSERT per row
+        ids = sorted(db.session.execute(insert(_table).returning(_table.c.id), rows).scalars().all())
+        by_program = {}
+        for row, exercise_id in zip(rows, ids):
+            by_program.setdefault(row["program_id"], []).append(exercise_id)
+        for program_id, program_ids in by_program.items():
+            mark_program(program_id, program_ids)
+        return ids
+
+    db.session.execute(insert(_table), rows)
+    # The (program, week) slices were empty before this insert, so these are exactly the new rows
+    ids = []
+    for program_id, weeks in _weeks_by_program(rows).items():
+        program_ids = db.session.execute(
+            select(_table.c.id)
+            .where(_table.c.program_id == program_id, _table.c.week.in_(weeks))
+            .order_by(_table.c.id)
+        ).scalars().all()
+        mark_program(program_id, program_ids)
+        ids.extend(program_ids)
+    return ids
+
+
+def _weeks_by_program(rows):
+    weeks = {}
+    for row in rows:
+        weeks.setdefault(row["program_id"], set()).add(row["week"])
+    return {program_id: sorted(values) for program_id, values in weeks.items()}
+
+
+def delete_exercises(program_id, weeks=None):
+    """One DELETE for a program's exercises (optionally only some weeks); returns the row count"""
+    mark_program(program_id, reset=True)
+    query = WorkoutExercise.query.filter(WorkoutExercise.program_id == program_id)
+    if weeks is not None:
+        query = query.filter(WorkoutExercise.week.in_(list(weeks)))
+    return query.delete(synchronize_session=False)
+
+
+def replace_program_exercises(program_id, rows):
+    """Set-based replace of all of a program's exercises; returns the new ids"""
+    delete_exercises(program_id)
+    return insert_exercises(rows)
+
+
+def materialize_plan_data(parsed_data, program_id):
+    """Replace a program's exercises with the frontend plan structure; returns the new ids"""
+    return replace_program_exercises(program_id, rows_from_plan_data(parsed_data, program_id))
+
+
+def set_exercise_completed(exercise_id, completed):
+    """
+    One UPDATE of a single row by primary key. Returns (program_id, week, name,
+    completed_at) of the updated exercise, or None when the id does not exist.
+    """
+    statement = update(_table).where(_table.c.id == exercise_id).values(
+        completed=bool(completed),
+        completed_at=datetime.utcnow() if completed else None,
+    )
+    if _supports_returning():
+        updated = db.session.execute(
+            statement.returning(_table.c.program_id, _table.c.week, _table.c.name, _table.c.completed_at)
+        ).first()
+    elif db.session.execute(statement).rowcount == 0:
+        updated = None
+    else:
+        updated = db.session.execute(
+            select(_table.c.program_id, _table.c.week, _table.c.name, _table.c.completed_at)
+            .where(_table.c.id == exercise_id)
+        ).first()
+    if updated is not None:
+        mark_program(updated[0], {exercise_id})
+    return updated
+
+
+def parse_legacy_exercise_id(legacy_id):
+    """(program_id, week, day, index) from a "programid_week_day_index" id, or None"""
+    parts = str(legacy_id).split("_")
+    if len(parts) != 4:
+        return None
+    try:
+        return tuple(int(part) for part in parts)
+    except ValueError:
+        return None
+
+
+def resolve_legacy_exercise_id(program_id, week, day, index):
+    """Row id of the index-th exercise (by id) of a day, as the old positional ids counted them"""
+    if index < 0:
+        return None
+    return db.session.execute(
+        select(_table.c.id)
+        .where(_table.c.program_id == program_id, _table.c.week == week, _table.c.day == day)
+        .order_by(_table.c.id)
+        .offset(index)
+        .limit(1)
+    ).scalar()
+
+
+def resolve_legacy_exercise_ids(legacy_ids):
+    """{legacy_id: row id} for many positional ids, one query per (program, week, day)"""
+    by_day = {}
+    for legacy_id in legacy_ids:
+        parsed = parse_legacy_exercise_id(legacy_id)
+        if parsed is not None and parsed[3] >= 0:
+            by_day.setdefault(parsed[:3], []).append((parsed[3], legacy_id))
+
+    resolved = {}
+    for (program_id, week, day), wanted in by_day.items():
+        day_ids = db.session.execute(
+            select(_table.c.id)
+            .where(_table.c.program_id == program_id, _table.c.week == week, _table.c.day == day)
+            .order_by(_table.c.id)
+        ).scalars().all()
+        for index, legacy_id in wanted:
+            if index < len(day_ids):
+                resolved[legacy_id] = day_ids[index]
+    return resolved
+
+
+_COMPLETION_UPDATE = update(_table).where(_table.c.id == bindparam("b_id")).values(
+    completed=bindparam("b_completed"),
+    completed_at=bindparam("b_completed_at"),
+    # None keeps what is stored, so a change can omit the actual_* fields
+    actual_sets=func.coalesce(bindparam("b_actual_sets"), _table.c.actual_sets),
+    actual_reps=func.coalesce(bindparam("b_actual_reps"), _table.c.actual_reps),
+    weight_used=func.coalesce(bindparam("b_weight_used"), _table.c.weight_used),
+)
+
+
+def apply_completion_changes(changes, user_id=None):
+    """
+    Apply many completion changes ({"id", "completed", "actual_sets"?,
+    "actual_reps"?, "weight_used"?}, ids already resolved to row ids) with one
+    SELECT and one executemany UPDATE; caller commits. With user_id only
+    exercises of that user's programs are touched. Returns the
+    {id: (program_id, week, day, name)} of the rows found, unknown ids are skipped.
+    """
+    if not changes:
+        return {}
+
+    query = select(_table.c.id, _table.c.program_id, _table.c.week, _table.c.day, _table.c.name).where(
+        _table.c.id.in_({change["id"] for change in changes})
+    )
+    if user_id is not None:
+        query = query.join(WorkoutProgram, WorkoutProgram.id == _table.c.program_id).where(
+            WorkoutProgram.user_id == user_id
+        )
+    found = {
+        row.id: (row.program_id, row.week, row.day, row.name)
+        for row in db.session.execute(query)
+    }
+
+    now = datetime.utcnow()
+    params = [
+        {
+            "b_id": change["id"],
+            "b_completed": bool(change.get("completed", True)),
+            "b_completed_at": now if change.get("completed", True) else None,
+            "b_actual_sets": change.get("actual_sets"),
+            "b_actual_reps": change.get("actual_reps"),
+            "b_weight_used": change.get("weight_used"),
+        }
+        for change in changes
+        if change["id"] in found
+    ]
+    if params:
+        db.session.execute(_COMPLETION_UPDATE, params)
+        for exercise_id, (program_id, _week, _day, _name) in found.items():
+            mark_program(program_id, {exercise_id})
+    return found
@@ -1,7 +1,9 @@
 # services/handlers/check_handler.py
 
 from models.workout_program import WorkoutProgram
+from services.tracing import traced
 
+@traced("handler.check_handler.check_existing_program")
 def check_existing_program(data):
     uid = data.get("firebase_uid")
     if not uid:
@@ -1,16 +1,53 @@
 # services/handlers/followup_handler.py - ENHANCED VERSION WITH THANK YOU HANDLING
 
 from models.workout_program import WorkoutProgram
-from services.coach import AIFitnessCoach
+from services.coach import AIFitnessCoach, FOLLOWUP_PIPELINE
+from services.agents.routine_adjustment import analyze_user_intent, RULE_HANDLED_INTENTS
 from models.db import db
 from models.conversation_model import Conversation, Message
 from datetime import datetime
 import json
 import re
 import random
+import threading
+from services.tracing import traced, span
+from services.plan_ast import looks_like_plan
+from services.plan_store import save_plan_structure
 
 coach = AIFitnessCoach()
 
+# Pre-dispatch routing counters (gratitude / rule fast path / LLM pipeline)
+_route_counts = {"gratitude": 0, "fast_path": 0, "fast_path_fallback": 0, "llm": 0}
+_route_counts_lock = threading.Lock()
+
+def _record_route(route):
+    with _route_counts_lock:
+        _route_counts[route] += 1
+
+def get_followup_metrics():
+    """Follow-up routing counts and the share answered without any LLM call"""
+    with _route_counts_lock:
+        counts = dict(_route_counts)
+    total = sum(counts.values())
+    no_llm = counts["gratitude"] + counts["fast_path"]
+    rule_attempts = counts["fast_path"] + counts["fast_path_fallback"]
+    return {
+        "total_requests": total,
+        "routes": counts,
+        "fast_path_hit_rate": round(counts["fast_path"] / total, 3) if total else 0.0,
+        "fast_path_success_rate": round(counts["fast_path"] / rule_attempts, 3) if rule_attempts else 0.0,
+        "zero_llm_rate": round(no_llm / total, 3) if total else 0.0,
+    }
+
+def classify_followup(feedback):
+    """Route a follow-up before any agent runs: ("gratitude" | "rule" | "llm", intent)"""
+    if is_thanking_message(feedback):
+        return "gratitude", None
+    intent = analyze_user_intent(feedback)
+    if intent in RULE_HANDLED_INTENTS:
+        return "rule", intent
+    return "llm", intent
+
 def get_or_create_conversation(user_id, title="Workout Follow-up"):
     """Get existing conversation or create a new one"""
     # Try to find the most recent conversation for this user
@@ -129,26 +166,8 @@ def is_workout_plan(content):
     """Detect if content contains a workout plan"""
     if not content or len(content) < 100:
         return False
-    
-    # Look for workout plan indicators
-    plan_indicators = [
-        r'### Day \d+:',           # Day headers
-        r'\*\*Day \d+:',           # Alternative day headers  
-        r'## \d+-Day.*Plan',       # Plan titles
-        r'\*\*Main Workout',       # Workout sections
-        r'\*\*Warm-up',           # Warm-up sections
-        r'sets x \d+ reps',        # Exercise format
-        r'\d+ sets x \d+',         # Alternative exercise format
-        r'Rest: \d+ sec'           # Rest periods
-    ]
-    
-    indicator_count = 0
-    for pattern in plan_indicators:
-        if re.search(pattern, content, re.IGNORECASE):
-            indicator_count += 1
-    
-    # If we find multiple indicators, it's likely a workout plan
-    return indicator_count >= 3
+    # A plan has day headers with prescribed exercises under them
+    return looks_like_plan(content)
 
 def extract_plan_from_content(content):
     """Extract just the workout plan from the response"""
@@ -183,6 +202,52 @@ def extract_plan_from_content(content):
     
     return plan_content
 
+def extract_followup_outcome(messages, original_plan):
+    """Pick the adjusted plan and coaching reply out of multi-agent follow-up messages"""
+    print(f"🤖 Coach returned {len(messages)} messages")
+
+    # Extract the final adjusted plan from messages
+    adjusted_plan = None
+    coaching_response = None
+
+    # Look through all messages for plans and responses
+    for i, msg in enumerate(messages):
+        if hasattr(msg, "content") and isinstance(msg.content, str):
+            content = msg.content.strip()
+            if content:
+                print(f"📨 Message {i}: {content[:100]}...")
+
+                # Check if this message contains a workout plan
+                if is_workout_plan(content):
+                    extracted_plan = extract_plan_from_content(content)
+                    if extracted_plan:
+                        adjusted_plan = extracted_plan
+                        print(f"✅ Found workout plan in message {i}")
+
+                # Keep the last substantial response as coaching response
+                if len(content) > 20:
+                    coaching_response = content
+
+    # Determine if plan was actually changed
+    plan_changed = False
+    if adjusted_plan:
+        # Compare day counts to detect changes
+        original_days = len(re.findall(r'### Day \d+:|Day \d+:', original_plan))
+        new_days = len(re.findall(r'### Day \d+:|Day \d+:', adjusted_plan))
+
+        print(f"📊 Original days: {original_days}, New days: {new_days}")
+
+        if new_days != original_days:
+            plan_changed = True
+            print(f"✅ Plan changed: {original_days} days → {new_days} days")
+        elif len(adjusted_plan) != len(original_plan):
+            # Length changed, likely modified
+            plan_changed = True
+            print(f"✅ Plan changed: Length {len(original_plan)} → {len(adjusted_plan)}")
+    
+    return adjusted_plan, coaching_response, plan_changed
+
+@traced("handler.followup_handler.follow_up_workout")
 def follow_up_workout(data):
     """Enhanced follow-up handler with memory, context, and thank you responses"""
     uid = data.get("firebase_uid")
@@ -194,9 +259,16 @@ def follow_up_workout(data):
     print(f"🔄 Processing follow-up for user: {uid}")
     print(f"📝 Feedback: {feedback}")
     
+    # Classify intent up front so rule-handled requests never reach the LLM
+    with span("handler.followup_handler.classify") as classify_span:
+        route, intent = classify_followup(feedback)
+        classify_span.set(route=route, intent=intent)
+    print(f"🧭 Follow-up route: {route} (intent: {intent})")
+    
     # Check if this is a thanking message
-    if is_thanking_message(feedback):
+    if route == "gratitude":
         print("🙏 Detected thanking message, generating polite response...")
+        _record_route("gratitude")
         
         # Generate a nice thank you response
         thank_response = generate_thank_you_response()
@@ -232,53 +304,49 @@ def follow_up_workout(data):
     conversation_history = get_conversation_history(uid)
     
     try:
-        # Run the enhanced follow-up pipeline with memory
-        messages = coach.run_followup(
-            user_id=uid, 
-            current_plan=last_program.program_text, 
-            feedback=feedback
-        )
-        
-        print(f"🤖 Coach returned {len(messages)} messages")
-        
-        # Extract the final adjusted plan from messages
-        adjusted_plan = None
-        coaching_response = None
-        
-        # Look through all messages for plans and responses
-        for i, msg in enumerate(messages):
-            if hasattr(msg, "content") and isinstance(msg.content, str):
-                content = msg.content.strip()
-                if content:
-                    print(f"📨 Message {i}: {content[:100]}...")
-                    
-                    # Check if this message contains a workout plan
-                    if is_workout_plan(content):
-                        extracted_plan = extract_plan_from_content(content)
-                        if extracted_plan:
-                            adjusted_plan = extracted_plan
-                            print(f"✅ Found workout plan in message {i}")
-                    
-                    # Keep the last substantial response as coaching response
-                    if len(content) > 20:
-                        coaching_response = content
+        outcome = None
+        if route == "rule":
+            outcome = coach.run_followup_fast(
+                user_id=uid,
+                current_plan=last_program.program_text,
+                feedback=feedback,
+                intent=intent
+            )
+            if outcome and outcome["plan_changed"]:
+                _record_route("fast_path")
+                print(f"🚀 Fast path handled '{intent}' without the LLM")
+            else:
+                # Extraction failed (e.g. unknown exercise); let the full pipeline try
+                _record_route("fast_path_fallback")
+                outcome = None
+        else:
+            _record_route("llm")
         
-        # Determine if plan was actually changed
-        plan_changed = False
-        if adjusted_plan:
-            # Compare day counts to detect changes
-            original_days = len(re.findall(r'### Day \d+:|Day \d+:', last_program.program_text))
-            new_days = len(re.findall(r'### Day \d+:|Day \d+:', adjusted_plan))
-            
-            print(f"📊 Original days: {original_days}, New days: {new_days}")
-            
-            if new_days != original_days:
-                plan_changed = True
-                print(f"✅ Plan changed: {original_days} days → {new_days} days")
-            elif len(adjusted_plan) != len(last_program.program_text):
-                # Length changed, likely modified
-                plan_changed = True
-                print(f"✅ Plan changed: Length {len(last_program.program_text)} → {len(adjusted_plan)}")
+        if outcome:
+            plan_changed = outcome["plan_changed"]
+            adjusted_plan = outcome["plan"]
+            coaching_response = outcome["response"]
+        elif FOLLOWUP_PIPELINE == "multi_agent":
+            # Run the enhanced follow-up pipeline with memory
+            messages = coach.run_followup(
+                user_id=uid, 
+                current_plan=last_program.program_text, 
+                feedback=feedback
+            )
+            adjusted_plan, coaching_response, plan_changed = extract_followup_outcome(
+                messages, last_program.program_text
+            )
+        else:
+            # Single structured LLM call (or none for rule-handled edits)
+            outcome = coach.run_followup_fused(
+                user_id=uid,
+                current_plan=last_program.program_text,
+                feedback=feedback
+            )
+            plan_changed = outcome["plan_changed"]
+            adjusted_plan = outcome["plan"] if plan_changed else None
+            coaching_response = outcome["response"]
+            print(f"⚡ Fused follow-up: intent={outcome['intent']}, LLM calls={outcome['llm_calls']}")
         
         # Choose appropriate response
         if plan_changed and adjusted_plan:
@@ -316,8 +384,11 @@ def follow_up_workout(data):
             if hasattr(WorkoutProgram, 'name'):
                 updated_program.name = "Adjusted Workout Plan"
             
-            db.session.add(updated_program)
-            db.session.commit()
+            with span("db.save_program"):
+                db.session.add(updated_program)
+                db.session.flush()
+                save_plan_structure(updated_program.id, adjusted_plan)
+                db.session.commit()
             
             print(f"✅ Saved new program: {updated_program.id}")
             
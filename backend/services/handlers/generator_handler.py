@@ -4,12 +4,20 @@ from models.user_profile import UserProfile
 from models.workout_program import WorkoutProgram
 from services.coach import AIFitnessCoach
 from models.db import db
+from services.tracing import traced, span
+from services.template_pregen import find_template, materialize_template
+from services.plan_store import save_plan_structure
+from services.plan_ast import Plan
+from services.plan_parser import to_frontend_structure
+from services.program_materializer import save_parsed_exercises
 
 coach = AIFitnessCoach()
 
+REQUIRED_KEYS = ["firebase_uid", "gender", "age", "goal", "experience", "days_per_week", "equipment", "style"]
+
+@traced("handler.generator_handler.generate_workout")
 def generate_workout(data):
-    required_keys = ["firebase_uid", "gender", "age", "goal", "experience", "days_per_week", "equipment", "style"]
-    missing_keys = [key for key in required_keys if key not in data]
+    missing_keys = [key for key in REQUIRED_KEYS if key not in data]
     if missing_keys:
         return {"error": f"Missing fields: {', '.join(missing_keys)}"}, 400
 
@@ -28,25 +36,43 @@ def generate_workout(data):
         "firebase_uid": uid
     }
 
-    result = coach.run_initial(user_input)
-    fitness_plan = result.get("fitness_plan")
+    # Common profiles are served from a pre-generated template (see services/template_pregen.py)
+    template = find_template(user_input)
+    if template:
+        print(f"⚡ Serving pre-generated template {template.template_id} for {uid}")
+        fitness_plan = template.plan_text
+        plan_structure = None
+    else:
+        result = coach.run_initial(user_input)
+        fitness_plan = result.get("fitness_plan")
+        plan_structure = result.get("plan_structure")
 
     if not fitness_plan:
         return {"error": "Failed to generate workout plan."}, 500
 
-    # Save or update profile
-    profile = UserProfile.query.filter_by(firebase_uid=uid).first()
-    if profile:
-        for key, value in user_input.items():
-            if hasattr(profile, key):
-                setattr(profile, key, value)
-    else:
-        profile = UserProfile(**user_input)
-        db.session.add(profile)
+    with span("db.save_program"):
+        # Save or update profile
+        profile = UserProfile.query.filter_by(firebase_uid=uid).first()
+        if profile:
+            for key, value in user_input.items():
+                if hasattr(profile, key):
+                    setattr(profile, key, value)
+        else:
+            profile = UserProfile(**user_input)
+            db.session.add(profile)
 
-    # Save workout program
-    new_program = WorkoutProgram(user_id=uid, program_text=fitness_plan)
-    db.session.add(new_program)
-    db.session.commit()
+        # Save workout program
+        new_program = WorkoutProgram(user_id=uid, program_text=fitness_plan)
+        db.session.add(new_program)
+        db.session.flush()
+        save_plan_structure(new_program.id, fitness_plan,
+                            Plan.from_dict(plan_structure["plan"]) if plan_structure else None)
+        if template:
+            # Exercises are already parsed: write them now so /workout/current needs no parsing
+            materialize_template(template, new_program.id)
+        elif plan_structure:
+            # Structured generation output carries the exercises too: no parse stage
+            save_parsed_exercises(to_frontend_structure(plan_structure["weeks"], new_program.id), new_program.id)
+        db.session.commit()
 
-    return {"program": fitness_plan}, 200
+    return {"program": fitness_plan, "program_id": new_program.id, "source": "template" if template else "generated"}, 200
@@ -0,0 +1,255 @@
+# services/job_queue.py - Background plan-generation jobs
+#
+# /generate/generate-workout and /generate/chat-follow-up run the full agent
+# pipeline (minutes with 180s LLM timeouts). The job queue lets the HTTP layer
+# answer 202 immediately while a small worker pool runs the same handlers.
+#
+# Two stores are available:
+#   - DatabaseJobStore (default): GenerationJob rows, works with MySQL or a
+#     SQLite DATABASE_URL and lets any worker process answer status polls.
+#   - InMemoryJobStore (JOB_STORE=memory): process-local, for tests and dev.
+
+import os
+import json
+import uuid
+import queue
+import hashlib
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from models.db import db
+from models.generation_job import GenerationJob
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_STORE = os.getenv("JOB_STORE", "database").lower()
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("succeeded", "failed")
+
+JOB_FIELDS = (
+    "id", "user_id", "kind", "request_hash", "status", "progress", "payload",
+    "result", "status_code", "error", "program_id", "created_at", "updated_at",
+)
+
+
+def request_hash(kind, payload):
+    """Stable hash of a job request, used for (uid, request hash) dedupe"""
+    canonical = json.dumps({"kind": kind, "payload": payload}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def job_to_response(job):
+    """Public view of a job (no raw payload / hash)"""
+    response = {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "created_at": job["created_at"].isoformat() if job.get("created_at") else None,
+        "updated_at": job["updated_at"].isoformat() if job.get("updated_at") else None,
+    }
+    if job["status"] in FINISHED_STATUSES:
+        response["status_code"] = job.get("status_code")
+        response["result"] = job.get("result")
+        response["error"] = job.get("error")
+        response["program_id"] = job.get("program_id")
+    return response
+
+
+class InMemoryJobStore:
+    """Process-local job store"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def find_active(self, user_id, req_hash, since):
+        with self._lock:
+            for job in self._jobs.values():
+                if (job["user_id"] == user_id and job["request_hash"] == req_hash
+                        and job["status"] in ACTIVE_STATUSES and job["created_at"] >= since):
+                    return dict(job)
+        return None
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields, updated_at=datetime.utcnow())
+            return dict(job)
+
+
+class DatabaseJobStore:
+    """GenerationJob-backed store; callers must be inside an app context"""
+
+    def _to_dict(self, row):
+        job = {field: getattr(row, field) for field in JOB_FIELDS}
+        for field in ("payload", "result"):
+            if job[field]:
+                try:
+                    job[field] = json.loads(job[field])
+                except (TypeError, ValueError):
+                    pass
+        return job
+
+    def create(self, job):
+        row = GenerationJob(**{
+            **job,
+            "payload": json.dumps(job.get("payload"), default=str),
+            "result": json.dumps(job["result"], default=str) if job.get("result") is not None else None,
+        })
+        db.session.add(row)
+        db.session.commit()
+        return self._to_dict(row)
+
+    def get(self, job_id):
+        row = db.session.get(GenerationJob, job_id)
+        return self._to_dict(row) if row else None
+
+    def find_active(self, user_id, req_hash, since):
+        row = GenerationJob.query.filter(
+            GenerationJob.user_id == user_id,
+            GenerationJob.request_hash == req_hash,
+            GenerationJob.status.in_(ACTIVE_STATUSES),
+            GenerationJob.created_at >= since,
+        ).order_by(GenerationJob.created_at.desc()).first()
+        return self._to_dict(row) if row else None
+
+    def update(self, job_id, **fields):
+        row = db.session.get(GenerationJob, job_id)
+        for key, value in fields.items():
+            if key == "result" and value is not None:
+                value = json.dumps(value, default=str)
+            setattr(row, key, value)
+        row.updated_at = datetime.utcnow()
+        db.session.commit()
+        return self._to_dict(row)
+
+
+class JobQueue:
+    """Thread-pool job runner with dedupe, status polling and push notifications"""
+
+    def __init__(self, store=None, max_workers=JOB_WORKERS, app=None):
+        if store is None:
+            store = InMemoryJobStore() if JOB_STORE == "memory" else DatabaseJobStore()
+        self.store = store
+        self.app = app
+        self.runners = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="plan-job")
+        self._submit_lock = threading.Lock()
+        self._listeners = {}
+        self._listeners_lock = threading.Lock()
+        self._done = {}
+
+    def register(self, kind, runner):
+        """runner(payload) -> (result_dict, status_code), e.g. generate_workout"""
+        self.runners[kind] = runner
+
+    def submit(self, kind, payload, app=None):
+        """Enqueue a job; returns (job, created). Identical in-flight requests share one job."""
+        if kind not in self.runners:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        user_id = str(payload.get("firebase_uid") or payload.get("user_id") or "")
+        req_hash = request_hash(kind, payload)
+        since = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+
+        with self._submit_lock:
+            existing = self.store.find_active(user_id, req_hash, since)
+            if existing:
+                print(f"♻️ Reusing in-flight job {existing['id']} for {user_id}")
+                return existing, False
+
+            now = datetime.utcnow()
+            job = self.store.create({
+                "id": uuid.uuid4().hex,
+                "user_id": user_id,
+                "kind": kind,
+                "request_hash": req_hash,
+                "status": "queued",
+                "progress": "waiting for a worker",
+                "payload": payload,
+                "result": None,
+                "status_code": None,
+                "error": None,
+                "program_id": None,
+                "created_at": now,
+                "updated_at": now,
+            })
+            self._done[job["id"]] = threading.Event()
+
+        self._executor.submit(self._run, job["id"], kind, payload, app or self.app)
+        print(f"📥 Queued {kind} job {job['id']} for {user_id}")
+        return job, True
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job submitted by this process finishes; returns the job"""
+        done = self._done.get(job_id)
+        if done is not None:
+            done.wait(timeout)
+        return self.store.get(job_id)
+
+    def subscribe(self, job_id):
+        """Queue that receives a job snapshot on every status change"""
+        listener = queue.Queue()
+        with self._listeners_lock:
+            self._listeners.setdefault(job_id, []).append(listener)
+        return listener
+
+    def unsubscribe(self, job_id, listener):
+        with self._listeners_lock:
+            listeners = self._listeners.get(job_id, [])
+            if listener in listeners:
+                listeners.remove(listener)
+            if not listeners:
+                self._listeners.pop(job_id, None)
+
+    def _update(self, job_id, **fields):
+        job = self.store.update(job_id, **fields)
+        with self._listeners_lock:
+            listeners = list(self._listeners.get(job_id, []))
+        for listener in listeners:
+            listener.put(job)
+        return job
+
+    def _run(self, job_id, kind, payload, app):
+        context = app.app_context() if app is not None else nullcontext()
+        with context:
+            try:
+                self._update(job_id, status="running", progress=f"running {kind} pipeline")
+                result, status_code = self.runners[kind](dict(payload))
+                result = result or {}
+                self._update(
+                    job_id,
+                    status="succeeded" if status_code < 400 else "failed",
+                    progress="done",
+                    result=result,
+                    status_code=status_code,
+                    error=result.get("error"),
+                    program_id=result.get("program_id"),
+                )
+                print(f"✅ Job {job_id} finished with {status_code}")
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {e}")
+                if app is not None:
+                    db.session.rollback()
+                self._update(job_id, status="failed", progress="error", error=str(e), status_code=500)
+            finally:
+                done = self._done.pop(job_id, None)
+                if done is not None:
+                    done.set()
@@ -5,6 +5,7 @@ import random
 import requests
 from dotenv import load_dotenv
 from langchain_core.runnables import Runnable
+from services.tracing import span
 
 load_dotenv()
 
@@ -61,7 +62,7 @@ class LLMEngine(Runnable):
         }
         return mapping.get(key, model_name)
 
-    def _call_openrouter(self, prompt, *, system=None, temperature=None, max_tokens=None, user=None):
+    def _call_openrouter(self, prompt, *, system=None, temperature=None, max_tokens=None, user=None, format=None):
         messages = []
         if system:
             messages.append({"role": "system", "content": system})
@@ -75,6 +76,15 @@ class LLMEngine(Runnable):
         }
         if user:
             payload["user"] = str(user)
+        if format:
+            # "json" -> JSON mode; a dict is treated as a JSON schema
+            if isinstance(format, dict):
+                payload["response_format"] = {
+                    "type": "json_schema",
+                    "json_schema": {"name": "response", "schema": format},
+                }
+            else:
+                payload["response_format"] = {"type": "json_object"}
 
         backoff = 1.0
         for attempt in range(3):
@@ -94,7 +104,7 @@ class LLMEngine(Runnable):
 
         raise RuntimeError("OpenRouter retry loop exhausted (429).")
 
-    def _call_ollama(self, prompt, *, system=None, temperature=None, max_tokens=None, options=None):
+    def _call_ollama(self, prompt, *, system=None, temperature=None, max_tokens=None, options=None, format=None):
         temp = self.default_temperature if temperature is None else float(temperature)
         max_tok = self.default_max_tokens if max_tokens is None else int(max_tokens)
 
@@ -110,6 +120,9 @@ class LLMEngine(Runnable):
             "stream": False,
             "options": opts,
         }
+        if format:
+            # Ollama accepts "json" or a JSON schema for constrained decoding
+            chat_payload["format"] = format
         
         try:
             print(f"🤖 Calling Ollama chat endpoint (timeout: {self.timeout}s)...")
@@ -122,7 +135,7 @@ class LLMEngine(Runnable):
             
             if res.status_code == 404:
                 print("⚠️ Chat endpoint not supported, trying generate...")
-                return self._call_ollama_generate(prompt, system=system, options=opts)
+                return self._call_ollama_generate(prompt, system=system, options=opts, format=format)
             elif res.status_code != 200:
                 raise RuntimeError(f"Ollama chat error {res.status_code}: {res.text}")
             
@@ -135,7 +148,7 @@ class LLMEngine(Runnable):
                 return data["messages"][-1].get("content", "")
             else:
                 print("⚠️ Unexpected chat response format, trying generate...")
-                return self._call_ollama_generate(prompt, system=system, options=opts)
+                return self._call_ollama_generate(prompt, system=system, options=opts, format=format)
                 
         except requests.exceptions.Timeout:
             print(f"❌ Ollama chat timeout after {self.timeout}s")
@@ -147,9 +160,9 @@ class LLMEngine(Runnable):
             if "timeout" in str(e).lower():
                 raise RuntimeError(f"Ollama request timed out: {e}")
             print(f"⚠️ Chat endpoint error: {e}, trying generate...")
-            return self._call_ollama_generate(prompt, system=system, options=opts)
+            return self._call_ollama_generate(prompt, system=system, options=opts, format=format)
 
-    def _call_ollama_generate(self, prompt, *, system=None, options=None):
+    def _call_ollama_generate(self, prompt, *, system=None, options=None, format=None):
         """Separate method for generate endpoint"""
         gen_payload = {
             "model": self.model_id,
@@ -157,6 +170,8 @@ class LLMEngine(Runnable):
             "stream": False,
             "options": options or {},
         }
+        if format:
+            gen_payload["format"] = format
         
         try:
             print(f"🤖 Calling Ollama generate endpoint (timeout: {self.timeout}s)...")
@@ -195,7 +210,10 @@ class LLMEngine(Runnable):
             prompt = input.to_string()
         else:
             prompt = str(input)
-        return self._call(prompt, **kwargs)
+        with span("llm.invoke", provider=self.provider, model=self.model_id, prompt_chars=len(prompt)) as llm_span:
+            output = self._call(prompt, **kwargs)
+            llm_span.set(output_chars=len(output or ""))
+            return output
 
     def quick_invoke(self, prompt, max_tokens=50, timeout=10):
         """Quick method for fast responses"""
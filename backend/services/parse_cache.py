@@ -0,0 +1,149 @@
+# services/parse_cache.py - Persistent cache of parsed program_text
+#
+# Parsing can end in an LLM call, and the same text is parsed again whenever a
+# program's exercises are rebuilt or a plan is re-created from a conversation.
+# Templated plans (create_fallback_plan, pre-generated templates, plan cache
+# hits) also give many programs byte-identical text. Results are stored in
+# ParseCacheEntry keyed by (sha256(program_text), PARSER_VERSION), without
+# program ids, so identical text is parsed once for all programs.
+#
+# Bumping PARSER_VERSION makes every older row a miss; those rows are deleted
+# the first time the cache is used in a process.
+#
+# Config:
+#   PARSE_CACHE_ENABLED   "true" (default) / "false"
+
+import os
+import json
+import threading
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from models.db import db
+from models.parse_cache_entry import ParseCacheEntry
+from services.plan_parser import PARSER_VERSION, PARSE_LLM_THRESHOLD, ParseResult, parse_program
+from services.plan_store import text_hash
+
+PARSE_CACHE_ENABLED = os.getenv("PARSE_CACHE_ENABLED", "true").lower() == "true"
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "llm_calls_saved": 0, "errors": 0}
+_purged = False
+
+
+def _count(name, amount=1):
+    with _lock:
+        _stats[name] += amount
+
+
+def _cacheable(result, threshold):
+    # A fallback, or a low-confidence rules parse made without (or despite) the LLM,
+    # should be retried next time rather than pinned
+    if result.source == "fallback":
+        return False
+    return result.source != "rules" or result.confidence >= threshold
+
+
+def purge_stale_entries():
+    """Delete rows written by other parser versions; returns the number removed"""
+    removed = ParseCacheEntry.query.filter(
+        ParseCacheEntry.parser_version != PARSER_VERSION
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    if removed:
+        print(f"🧹 Removed {removed} parse cache entries from older parser versions")
+    return removed
+
+
+def _purge_once():
+    global _purged
+    with _lock:
+        if _purged:
+            return
+        _purged = True
+    purge_stale_entries()
+
+
+def _lookup(key):
+    row = db.session.get(ParseCacheEntry, (key, PARSER_VERSION))
+    if row is None:
+        return None
+    ParseCacheEntry.query.filter_by(text_hash=key, parser_version=PARSER_VERSION).update(
+        {"hits": ParseCacheEntry.hits + 1, "last_hit_at": datetime.utcnow()},
+        synchronize_session=False,
+    )
+    db.session.commit()
+    return ParseResult(json.loads(row.weeks_json), row.confidence, row.source)
+
+
+def _store(key, result):
+    try:
+        with db.session.begin_nested():
+            db.session.add(ParseCacheEntry(
+                text_hash=key,
+                parser_version=PARSER_VERSION,
+                source=result.source,
+                confidence=result.confidence,
+                weeks_json=json.dumps(result.weeks),
+            ))
+        db.session.commit()
+        _count("stores")
+    except IntegrityError:
+        # Another request parsed the same text at the same time; its row is equivalent
+        pass
+
+
+def cached_parse_program(program_text, llm=None, threshold=PARSE_LLM_THRESHOLD):
+    """parse_program() behind the persistent cache; needs an app context"""
+    if not PARSE_CACHE_ENABLED or not program_text:
+        return parse_program(program_text, llm, threshold)
+
+    key = text_hash(program_text)
+    try:
+        _purge_once()
+        cached = _lookup(key)
+    except Exception as e:
+        db.session.rollback()
+        _count("errors")
+        print(f"⚠️ Parse cache unavailable: {e}")
+        return parse_program(program_text, llm, threshold)
+
+    if cached is not None:
+        _count("hits")
+        if cached.source == "llm":
+            _count("llm_calls_saved")
+        print(f"📦 Parse cache hit ({cached.source}) for {key[:12]}")
+        return cached
+
+    _count("misses")
+    result = parse_program(program_text, llm, threshold)
+    if _cacheable(result, threshold):
+        try:
+            _store(key, result)
+        except Exception as e:
+            db.session.rollback()
+            _count("errors")
+            print(f"⚠️ Could not store parse result: {e}")
+    return result
+
+
+def parse_workout_text_cached(program_text, program_id, llm=None):
+    """Cached drop-in for plan_parser.parse_workout_text"""
+    return cached_parse_program(program_text, llm).to_frontend(program_id)
+
+
+def stats():
+    """Process counters plus the size of the persistent cache"""
+    with _lock:
+        result = dict(_stats)
+    lookups = result["hits"] + result["misses"]
+    result["hit_rate"] = round(result["hits"] / lookups, 3) if lookups else 0.0
+    result["enabled"] = PARSE_CACHE_ENABLED
+    result["parser_version"] = PARSER_VERSION
+    if PARSE_CACHE_ENABLED:
+        result["entries"] = ParseCacheEntry.query.filter_by(parser_version=PARSER_VERSION).count()
+        result["stored_hits"] = db.session.query(
+            db.func.coalesce(db.func.sum(ParseCacheEntry.hits), 0)
+        ).filter(ParseCacheEntry.parser_version == PARSER_VERSION).scalar()
+    return result
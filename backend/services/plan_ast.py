@@ -0,0 +1,376 @@
+# services/plan_ast.py - Typed workout plan structure
+#
+# Plan -> Day -> Section -> Exercise, parsed from the markdown the generator
+# produces in a single pass over the lines and rendered back to that same
+# format. Consumers (routine adjustment, follow-up detection, parsers) work on
+# this structure instead of re-scanning program_text with their own regexes.
+#
+# Canonical format:
+#   ## 3-Day Circuit Training Workout Plan for General Fitness
+#
+#   This 3-day workout plan is designed for ... using Bodyweight Only. Each workout takes 30-45 minutes.
+#
+#   ### Day 1: Upper Body
+#   **Warm-up (5-10 min):**
+#   - Jumping jacks: 30 seconds
+#
+#   **Main Workout (30-35 min):**
+#   - Push-ups: 3 sets x 10 reps, Rest: 60 sec
+#
+#   ## Training Notes:
+#   - **Progression:** Increase reps by 2-3 each week
+
+import re
+
+PLAN_AST_VERSION = 3
+
+_DAY_HEADER = re.compile(r"^(?:#{1,4}\s*|\*\*\s*)?Day\s+(\d+)\s*[:\-–]?\s*(.*?)\s*(?:\*\*)?\s*$", re.IGNORECASE)
+_HEADING = re.compile(r"^#{1,4}\s+\S")
+_SECTION_HEADER = re.compile(r"^\*\*([^*]+?)\*\*\s*(.*)$")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.*)$")
+_TITLE = re.compile(r"^#{1,2}\s*(\d+)-Day\s+(.+?)\s+Workout Plan(?:\s+for\s+(.+?))?\s*$", re.IGNORECASE)
+_EQUIPMENT = re.compile(r"\busing\s+(.+?)\.\s+Each workout", re.IGNORECASE)
+
+_COMPACT = re.compile(r"\b(\d+)\s*[x×]\s*(\d+)(?:\s*-\s*\d+)?\b(?!\s*(?:sec|min))", re.IGNORECASE)
+_SETS = re.compile(r"(\d+)\s*sets?\b", re.IGNORECASE)
+_REPS = re.compile(r"\bx\s*(\d+)(?:\s*-\s*\d+)?\s*(?:reps?\b|each|per\b|$|,)", re.IGNORECASE)
+_REPS_ONLY = re.compile(r"(\d+)\s*reps?\b", re.IGNORECASE)
+_DURATION = re.compile(r"(?<!Rest:\s)\b(\d+)\s*(seconds?|secs?|minutes?|mins?)\b", re.IGNORECASE)
+_REST = re.compile(r"Rest:\s*(\d+)\s*(seconds?|secs?|minutes?|mins?)?", re.IGNORECASE)
+
+SECTION_KINDS = (
+    ("warmup", ("warm",)),
+    ("main", ("main", "workout", "circuit", "strength", "conditioning", "wod")),
+    ("cooldown", ("cool", "stretch")),
+)
+
+
+def _seconds(value, unit):
+    value = int(value)
+    return value * 60 if unit and unit.lower().startswith("min") else value
+
+
+def _section_kind(title):
+    lowered = title.lower()
+    for kind, keywords in SECTION_KINDS:
+        if any(keyword in lowered for keyword in keywords):
+            return kind
+    return "other"
+
+
+class Exercise:
+    __slots__ = ("name", "detail", "sets", "reps", "duration_seconds", "rest_seconds")
+
+    def __init__(self, name, detail="", sets=None, reps=None, duration_seconds=None, rest_seconds=None):
+        self.name = name
+        self.detail = detail
+        self.sets = sets
+        self.reps = reps
+        self.duration_seconds = duration_seconds
+        self.rest_seconds = rest_seconds
+
+    @classmethod
+    def from_text(cls, text):
+        """Parse the text of one bullet, e.g. "Push-ups: 3 sets x 10 reps, Rest: 60 sec" """
+        text = text.strip()
+        # "Push-ups: 3 sets x 10 reps" or "Bench Press (Barbell) - 3x8-10, Rest: 90 seconds"
+        cuts = [(text.find(sep), sep) for sep in (":", " - ") if sep in text]
+        name, detail = text, ""
+        if cuts:
+            index, sep = min(cuts)
+            if index <= 80 and "**" not in text[:index]:
+                name, detail = text[:index], text[index + len(sep):]
+        name, detail = name.strip(), detail.strip()
+
+        compact = _COMPACT.search(detail)
+        sets = _SETS.search(detail)
+        reps = _REPS.search(detail) or _REPS_ONLY.search(detail)
+        duration = _DURATION.search(detail)
+        rest = _REST.search(detail)
+        if compact and not sets:
+            sets_value, reps_value = int(compact.group(1)), int(compact.group(2))
+        else:
+            sets_value = int(sets.group(1)) if sets else None
+            reps_value = int(reps.group(1)) if reps else None
+        return cls(
+            name=name,
+            detail=detail,
+            sets=sets_value,
+            reps=reps_value,
+            duration_seconds=_seconds(*duration.groups()) if duration else None,
+            rest_seconds=_seconds(rest.group(1), rest.group(2)) if rest else None,
+        )
+
+    @property
+    def is_prescribed(self):
+        """True for lines that carry a sets/reps/time prescription"""
+        return self.sets is not None or self.reps is not None or self.duration_seconds is not None
+
+    def render(self):
+        return f"- {self.name}: {self.detail}" if self.detail else f"- {self.name}"
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{slot: data.get(slot) for slot in cls.__slots__})
+
+
+class Section:
+    __slots__ = ("header", "title", "kind", "items")
+
+    def __init__(self, header=None, title="", kind="other", items=None):
+        self.header = header      # raw "**Main Workout (30-35 min):**" line, None for an implicit section
+        self.title = title
+        self.kind = kind
+        self.items = items if items is not None else []   # Exercise or raw str lines
+
+    @classmethod
+    def from_header(cls, line, title):
+        title = title.strip().rstrip(":").strip()
+        return cls(header=line.strip(), title=title, kind=_section_kind(title))
+
+    @property
+    def exercises(self):
+        return [item for item in self.items if isinstance(item, Exercise)]
+
+    def render(self):
+        lines = [self.header] if self.header else []
+        lines.extend(item.render() if isinstance(item, Exercise) else item for item in self.items)
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "header": self.header,
+            "title": self.title,
+            "kind": self.kind,
+            "items": [item.to_dict() if isinstance(item, Exercise) else item for item in self.items],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        items = [Exercise.from_dict(item) if isinstance(item, dict) else item for item in data.get("items", [])]
+        return cls(header=data.get("header"), title=data.get("title", ""), kind=data.get("kind", "other"), items=items)
+
+
+class Day:
+    __slots__ = ("number", "label", "sections")
+
+    def __init__(self, number, label="", sections=None):
+        self.number = number
+        self.label = label
+        self.sections = sections if sections is not None else []
+
+    @property
+    def exercises(self):
+        return [exercise for section in self.sections for exercise in section.exercises]
+
+    @property
+    def main_exercises(self):
+        """Exercises of the main section(s), or all prescribed exercises when there is none"""
+        main = [e for s in self.sections if s.kind == "main" for e in s.exercises]
+        return main or [e for e in self.exercises if e.is_prescribed]
+
+    def render(self):
+        header = f"### Day {self.number}: {self.label}" if self.label else f"### Day {self.number}:"
+        return "\n\n".join([header + ("\n" + self.sections[0].render() if self.sections else "")]
+                           + [section.render() for section in self.sections[1:]])
+
+    def to_dict(self):
+        return {"number": self.number, "label": self.label, "sections": [s.to_dict() for s in self.sections]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["number"], data.get("label", ""), [Section.from_dict(s) for s in data.get("sections", [])])
+
+
+class Plan:
+    __slots__ = ("title", "intro", "days", "trailer")
+
+    def __init__(self, title=None, intro=None, days=None, trailer=None):
+        self.title = title                  # "## 3-Day ... Workout Plan for ..." line
+        self.intro = intro or []            # lines between the title and Day 1
+        self.days = days or []
+        self.trailer = trailer or []        # "## Training Notes:" and anything after the last day
+
+    # ---------- metadata ----------
+
+    @property
+    def day_count(self):
+        return len(self.days)
+
+    def exercises(self):
+        return [exercise for day in self.days for exercise in day.exercises]
+
+    def _title_match(self):
+        return _TITLE.match(self.title or "")
+
+    @property
+    def style(self):
+        match = self._title_match()
+        return match.group(2).strip() if match else None
+
+    @property
+    def goal(self):
+        match = self._title_match()
+        return match.group(3).strip() if match and match.group(3) else None
+
+    @property
+    def equipment(self):
+        match = _EQUIPMENT.search(" ".join(self.intro))
+        return match.group(1).strip() if match else None
+
+    # ---------- edits ----------
+
+    def renumber(self):
+        for index, day in enumerate(self.days, start=1):
+            day.number = index
+
+    def remove_day(self, number):
+        """Drop day `number` and renumber; returns True if a day was removed"""
+        kept = [day for day in self.days if day.number != number]
+        removed = len(kept) != len(self.days)
+        self.days = kept
+        self.renumber()
+        return removed
+
+    def keep_days(self, count):
+        """Keep the first `count` days"""
+        removed = len(self.days) > count
+        self.days = self.days[:count]
+        self.renumber()
+        return removed
+
+    def remove_exercise(self, matches):
+        """Remove prescribed exercises whose name satisfies matches(name); returns the count"""
+        removed = 0
+        for day in self.days:
+            for section in day.sections:
+                kept = []
+                for item in section.items:
+                    if isinstance(item, Exercise) and item.is_prescribed and matches(item.name):
+                        print(f"🗑️ Removing exercise: {item.name}")
+                        removed += 1
+                        continue
+                    kept.append(item)
+                section.items = kept
+        return removed
+
+    def replace_exercise(self, old_name, new_name):
+        """Rename every exercise containing old_name (case-insensitive); returns the count"""
+        pattern = re.compile(re.escape(old_name), re.IGNORECASE)
+        replaced = 0
+        for exercise in self.exercises():
+            if pattern.search(exercise.name):
+                exercise.name = pattern.sub(new_name, exercise.name)
+                replaced += 1
+        return replaced
+
+    # ---------- (de)serialization ----------
+
+    def render(self):
+        blocks = []
+        if self.title:
+            blocks.append(self.title)
+        if self.intro:
+            blocks.append("\n".join(self.intro))
+        blocks.extend(day.render() for day in self.days)
+        if self.trailer:
+            blocks.append("\n".join(self.trailer))
+        return "\n\n".join(blocks)
+
+    def to_dict(self):
+        return {
+            "version": PLAN_AST_VERSION,
+            "title": self.title,
+            "intro": self.intro,
+            "days": [day.to_dict() for day in self.days],
+            "trailer": self.trailer,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            title=data.get("title"),
+            intro=list(data.get("intro", [])),
+            days=[Day.from_dict(day) for day in data.get("days", [])],
+            trailer=list(data.get("trailer", [])),
+        )
+
+
+def _strip_blank_edges(lines):
+    while lines and not lines[0].strip():
+        lines.pop(0)
+    while lines and not lines[-1].strip():
+        lines.pop()
+    return lines
+
+
+def parse_plan(text):
+    """Single pass over the markdown lines; never raises, unknown lines are kept verbatim"""
+    plan = Plan()
+    day = None
+    section = None
+    in_trailer = False
+
+    for raw_line in (text or "").splitlines():
+        line = raw_line.rstrip()
+        stripped = line.strip()
+
+        day_match = _DAY_HEADER.match(stripped)
+        if day_match:
+            day = Day(int(day_match.group(1)), day_match.group(2).strip().rstrip("*").strip())
+            plan.days.append(day)
+            section = None
+            in_trailer = False
+            continue
+
+        if in_trailer:
+            plan.trailer.append(line)
+            continue
+
+        if _HEADING.match(stripped):
+            if day is None and plan.title is None and not plan.intro:
+                plan.title = stripped
+            elif day is None:
+                plan.intro.append(line)
+            else:
+                in_trailer = True
+                plan.trailer.append(line)
+            continue
+
+        if day is None:
+            plan.intro.append(line)
+            continue
+
+        if not stripped:
+            continue
+
+        section_match = _SECTION_HEADER.match(stripped)
+        if section_match and not _BULLET.match(stripped):
+            section = Section.from_header(stripped, section_match.group(1))
+            day.sections.append(section)
+            trailing = section_match.group(2).strip()
+            if trailing:
+                section.items.append(Exercise.from_text(trailing))
+            continue
+
+        if section is None:
+            section = Section()
+            day.sections.append(section)
+
+        bullet = _BULLET.match(line)
+        section.items.append(Exercise.from_text(bullet.group(1)) if bullet else stripped)
+
+    _strip_blank_edges(plan.intro)
+    _strip_blank_edges(plan.trailer)
+    return plan
+
+
+def looks_like_plan(text, min_exercises=3):
+    """Cheap structural check: at least one day header and a few prescribed exercises"""
+    if not text or "Day" not in text:
+        return False
+    plan = parse_plan(text)
+    return plan.day_count > 0 and sum(1 for e in plan.exercises() if e.is_prescribed) >= min_exercises
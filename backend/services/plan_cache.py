@@ -0,0 +1,186 @@
+# services/plan_cache.py - Reuse generated plans across identical profiles
+#
+# routine_generation_agent only looks at goal, experience, days_per_week,
+# equipment and style, so two users with the same normalized values get an
+# equivalent plan. The cache keys plans on that tuple, expires them with a
+# freshness policy and holds a per-key lock while generating so concurrent
+# identical signups share one RAG + LLM run.
+#
+# Config:
+#   PLAN_CACHE_ENABLED      "true" (default) / "false"
+#   PLAN_CACHE_TTL_SECONDS  age after which a cached plan is regenerated (default 7 days)
+#   PLAN_CACHE_MAX_SERVES   regenerate after a plan was served this many times (0 = no limit)
+#   PLAN_CACHE_MAX_ENTRIES  LRU bound on distinct profile keys
+#   PLAN_CACHE_VARIATION    "true" to reorder main-workout exercises per user (deterministic)
+
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+PLAN_CACHE_TTL_SECONDS = int(os.getenv("PLAN_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+PLAN_CACHE_MAX_SERVES = int(os.getenv("PLAN_CACHE_MAX_SERVES", "0"))
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "512"))
+PLAN_CACHE_VARIATION = os.getenv("PLAN_CACHE_VARIATION", "false").lower() == "true"
+
+KEY_FIELDS = ("goal", "experience", "days_per_week", "equipment", "style")
+
+_MAIN_WORKOUT = re.compile(r"(\*\*Main Workout[^\n]*\n)((?:- [^\n]*\n?)+)")
+
+
+def profile_key(profile):
+    """Cache key for a normalized profile (see services.profile_normalizer)"""
+    key = []
+    for field in KEY_FIELDS:
+        value = profile.get(field)
+        if isinstance(value, (list, tuple)):
+            value = ",".join(sorted(str(v) for v in value))
+        key.append(str(value or "").strip().lower())
+    return tuple(key)
+
+
+def vary_plan(plan_text, seed):
+    """
+    Light deterministic variation: rotate each day's main-workout exercise list
+    by an offset derived from `seed`. Sets, reps and day structure are untouched.
+    """
+    digest = int(hashlib.sha256(str(seed).encode("utf-8")).hexdigest(), 16)
+
+    def rotate(match):
+        lines = match.group(2).rstrip("\n").split("\n")
+        trailing = match.group(2)[len(match.group(2).rstrip("\n")):]
+        if len(lines) < 2:
+            return match.group(0)
+        offset = digest % len(lines)
+        return match.group(1) + "\n".join(lines[offset:] + lines[:offset]) + trailing
+
+    return _MAIN_WORKOUT.sub(rotate, plan_text)
+
+
+class PlanCache:
+    """In-process LRU of generated plans with per-key generation locks"""
+
+    def __init__(self, ttl_seconds=PLAN_CACHE_TTL_SECONDS, max_serves=PLAN_CACHE_MAX_SERVES,
+                 max_entries=PLAN_CACHE_MAX_ENTRIES, variation=PLAN_CACHE_VARIATION):
+        self.ttl_seconds = ttl_seconds
+        self.max_serves = max_serves
+        self.max_entries = max_entries
+        self.variation = variation
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}  # key -> [lock, threads holding or waiting]; only while in use
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "expired": 0, "uncacheable": 0}
+
+    def _is_fresh(self, entry):
+        if self.ttl_seconds and time.time() - entry["created_at"] > self.ttl_seconds:
+            return False
+        if self.max_serves and entry["serves"] >= self.max_serves:
+            return False
+        return True
+
+    def _lookup(self, key):
+        """Fresh cached plan for key (counting the serve), or None; caller holds self._lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not self._is_fresh(entry):
+            del self._entries[key]
+            self._stats["expired"] += 1
+            return None
+        entry["serves"] += 1
+        self._entries.move_to_end(key)
+        return entry["plan"]
+
+    @contextmanager
+    def _locked_key(self, key):
+        """
+        Hold the key's generation lock. Locks are reference-counted and dropped
+        when the last holder or waiter leaves, so the table only holds keys being
+        generated and a key never has two live locks.
+        """
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+    def _personalize(self, plan, profile, key):
+        if not self.variation:
+            return plan
+        return vary_plan(plan, f"{profile.get('firebase_uid', '')}|{'|'.join(key)}")
+
+    def get_or_generate(self, profile, generate):
+        """
+        Return (plan, status) for a normalized profile.
+
+        `generate()` must return (plan_text, cacheable). status is "hit",
+        "coalesced" (another thread generated it while we waited) or "miss".
+        """
+        key = profile_key(profile)
+
+        with self._lock:
+            plan = self._lookup(key)
+            if plan is not None:
+                self._stats["hits"] += 1
+        if plan is not None:
+            print(f"📦 Plan cache hit for {key}")
+            return self._personalize(plan, profile, key), "hit"
+
+        with self._locked_key(key):
+            # Someone holding the key lock before us may have just filled it
+            with self._lock:
+                plan = self._lookup(key)
+                if plan is not None:
+                    self._stats["coalesced"] += 1
+            if plan is not None:
+                print(f"📦 Plan cache coalesced request for {key}")
+                return self._personalize(plan, profile, key), "coalesced"
+
+            with self._lock:
+                self._stats["misses"] += 1
+            plan, cacheable = generate()
+
+            with self._lock:
+                if plan and cacheable:
+                    self._entries[key] = {"plan": plan, "created_at": time.time(), "serves": 0}
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                else:
+                    self._stats["uncacheable"] += 1
+        return plan, "miss"
+
+    def invalidate(self, profile=None):
+        """Drop one profile's plan, or everything when profile is None"""
+        with self._lock:
+            if profile is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(profile_key(profile), None)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["key_locks"] = len(self._key_locks)
+        lookups = stats["hits"] + stats["coalesced"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["coalesced"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_plan_cache = PlanCache() if PLAN_CACHE_ENABLED else None
+
+
+def get_plan_cache():
+    """Process-wide plan cache, or None when PLAN_CACHE_ENABLED is off"""
+    return _plan_cache
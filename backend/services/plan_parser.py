@@ -0,0 +1,236 @@
+# services/plan_parser.py - Single parsing engine for program_text
+#
+# Replaces WorkoutTextParser (LLM first, then regex) and CrossFitWorkoutParser.
+# The text is tokenized once, line by line, by the plan AST state machine
+# (services/plan_ast.py; all patterns compiled at import). Each parse gets a
+# confidence score and the LLM is only asked when that score is below
+# PARSE_LLM_THRESHOLD.
+#
+# Output is the frontend structure used by /workout/current:
+#   {"Week 1": {"Day 1": {"label": ..., "exercises": [{"id", "name", "sets", "reps", "rest_seconds", ...}]}}}
+
+import os
+import re
+import json
+
+from services.plan_ast import parse_plan
+from utils.json_parser import extract_json_from_response
+
+# Bump when parsing output changes so cached parses are invalidated
+PARSER_VERSION = 2
+
+PARSE_LLM_THRESHOLD = float(os.getenv("PARSE_LLM_THRESHOLD", "0.5"))
+
+DEFAULT_SETS = 3
+DEFAULT_REPS = 10
+DEFAULT_REST_SECONDS = 60
+
+_WEEK_HEADER = re.compile(r"^\s*(?:#{1,4}\s*|\*\*\s*)?Week\s+(\d+)\b[^\n]*$", re.IGNORECASE)
+_TITLE_DAYS = re.compile(r"(\d+)-Day\b", re.IGNORECASE)
+_PARENTHESES = re.compile(r"\s*\([^)]*\)\s*")
+
+LLM_PARSE_PROMPT = """You are an expert fitness program parser. Extract workout data from the text below and return ONLY valid JSON.
+
+REQUIRED JSON STRUCTURE:
+{{"weeks": [{{"week": 1, "days": [{{"day": 1, "label": "Push Day", "exercises": [{{"name": "Bench Press", "sets": 3, "reps": 10, "rest_seconds": 90}}]}}]}}]}}
+
+PARSING RULES:
+1. Each "Day X:" or "### Day X:" starts a new day
+2. Extract ONLY exercises from workout/training sections; IGNORE warm-up, cool-down and notes
+3. For sets/reps like "3x8-10", use: sets=3, reps=8
+4. For rest like "Rest: 90 seconds", use: rest_seconds=90; if no rest is specified use 60
+5. Clean exercise names (remove equipment specifications in parentheses)
+
+TEXT TO PARSE:
+{program_text}
+
+Return ONLY the JSON structure. No explanations or additional text."""
+
+BASIC_FALLBACK_DAYS = [{
+    "day": 1,
+    "label": "Full Body",
+    "exercises": [
+        {"name": "Push Ups", "sets": 3, "reps": 10, "rest_seconds": 60},
+        {"name": "Squats", "sets": 3, "reps": 12, "rest_seconds": 60},
+        {"name": "Plank", "sets": 3, "reps": 30, "rest_seconds": 60},
+    ],
+}]
+
+
+class ParseResult:
+    __slots__ = ("weeks", "confidence", "source")
+
+    def __init__(self, weeks, confidence, source):
+        self.weeks = weeks            # [{"week": n, "days": [{"day", "label", "exercises": [...]}]}]
+        self.confidence = confidence  # 0.0 - 1.0
+        self.source = source          # "rules" | "llm" | "json" | "fallback"
+
+    def to_frontend(self, program_id):
+        return to_frontend_structure(self.weeks, program_id)
+
+
+def _clean_name(name):
+    return _PARENTHESES.sub(" ", name).strip(" -*")
+
+
+def _exercise_dict(exercise):
+    # Time-based work ("Plank: 3 sets x 30 seconds") keeps its seconds in reps, as before
+    reps = exercise.reps if exercise.reps is not None else exercise.duration_seconds
+    return {
+        "name": _clean_name(exercise.name),
+        "sets": exercise.sets if exercise.sets is not None else DEFAULT_SETS,
+        "reps": reps if reps is not None else DEFAULT_REPS,
+        "rest_seconds": exercise.rest_seconds if exercise.rest_seconds is not None else DEFAULT_REST_SECONDS,
+    }
+
+
+def _split_weeks(program_text):
+    """[(week_number, text)] in one pass; text without week headers is week 1"""
+    chunks = []
+    week, lines = 1, []
+    for line in program_text.splitlines():
+        match = _WEEK_HEADER.match(line)
+        if match:
+            if any(l.strip() for l in lines) or chunks:
+                chunks.append((week, "\n".join(lines)))
+            week, lines = int(match.group(1)), []
+            continue
+        lines.append(line)
+    chunks.append((week, "\n".join(lines)))
+    return [(n, text) for n, text in chunks if "day" in text.lower()] or chunks[:1]
+
+
+def _score(days, expected_days):
+    """Share of days with exercises x share of exercises with an explicit prescription"""
+    if not days:
+        return 0.0
+    with_exercises = [day for day in days if day["exercises"]]
+    if not with_exercises:
+        return 0.0
+    explicit = [flag for day in with_exercises for flag in day["_explicit"]]
+    score = (len(with_exercises) / len(days)) * (sum(explicit) / len(explicit))
+    if expected_days and expected_days != len(days):
+        score *= 0.8
+    return round(score, 3)
+
+
+def _plan_days(plan):
+    days = []
+    for day in plan.days:
+        exercises = [e for e in day.main_exercises if len(_clean_name(e.name)) >= 2]
+        days.append({
+            "day": day.number,
+            "label": day.label or f"Day {day.number}",
+            "exercises": [_exercise_dict(e) for e in exercises],
+            "_explicit": [e.sets is not None and (e.reps is not None or e.duration_seconds is not None)
+                          for e in exercises],
+        })
+    return days
+
+
+def plan_to_weeks(plan, week_number=1):
+    """Weeks structure straight from a plan AST, e.g. one built from structured LLM output"""
+    days = _plan_days(plan)
+    for day in days:
+        day.pop("_explicit")
+    return [{"week": week_number, "days": [day for day in days if day["exercises"]]}]
+
+
+def parse_rules(program_text):
+    """Deterministic parse; returns ParseResult with source "rules" """
+    weeks = []
+    scores = []
+    for week_number, text in _split_weeks(program_text or ""):
+        plan = parse_plan(text)
+        title_days = _TITLE_DAYS.search(plan.title or "")
+        days = _plan_days(plan)
+        scores.append(_score(days, int(title_days.group(1)) if title_days else None))
+        for day in days:
+            day.pop("_explicit")
+        weeks.append({"week": week_number, "days": [day for day in days if day["exercises"]]})
+
+    confidence = min(scores) if scores else 0.0
+    return ParseResult(weeks, confidence, "rules")
+
+
+def _valid_weeks(data):
+    if not isinstance(data, dict) or not isinstance(data.get("weeks"), list) or not data["weeks"]:
+        return False
+    for week in data["weeks"]:
+        if not isinstance(week, dict) or not isinstance(week.get("days"), list):
+            return False
+        for day in week["days"]:
+            if not isinstance(day, dict) or not isinstance(day.get("exercises"), list):
+                return False
+            if not any(isinstance(ex, dict) and ex.get("name") for ex in day["exercises"]):
+                return False
+    return True
+
+
+def parse_with_llm(program_text, llm):
+    """One JSON-mode LLM call; returns ParseResult or None when the output is unusable"""
+    try:
+        raw = llm.invoke(LLM_PARSE_PROMPT.format(program_text=program_text), format="json")
+        data = extract_json_from_response(raw)
+    except Exception as e:
+        print(f"❌ LLM parsing error: {e}")
+        return None
+    if not _valid_weeks(data):
+        return None
+    return ParseResult(data["weeks"], 1.0, "llm")
+
+
+def parse_program(program_text, llm=None, threshold=PARSE_LLM_THRESHOLD):
+    """Parse program text; the LLM is only consulted when the rule-based confidence is low"""
+    try:
+        data = json.loads(program_text)
+        if _valid_weeks(data):
+            return ParseResult(data["weeks"], 1.0, "json")
+    except (TypeError, ValueError):
+        pass
+
+    result = parse_rules(program_text)
+    if result.confidence < threshold and llm is not None:
+        print(f"🤔 Low parse confidence ({result.confidence}), asking the LLM")
+        llm_result = parse_with_llm(program_text, llm)
+        if llm_result is not None:
+            result = llm_result
+
+    if not any(week["days"] for week in result.weeks):
+        print("⚠️ Nothing parseable in program text, using basic fallback")
+        return ParseResult([{"week": 1, "days": BASIC_FALLBACK_DAYS}], 0.0, "fallback")
+
+    print(f"✅ Parsed program ({result.source}, confidence {result.confidence}): "
+          f"{sum(len(w['days']) for w in result.weeks)} days")
+    return result
+
+
+def to_frontend_structure(weeks, program_id):
+    """[{"week", "days"}] -> {"Week n": {"Day n": {"label", "exercises"}}} with positional ids"""
+    result = {}
+    for week_data in weeks:
+        week_num = week_data.get("week", 1)
+        week = result.setdefault(f"Week {week_num}", {})
+        for day_data in week_data.get("days", []):
+            day_num = day_data.get("day", 1)
+            week[f"Day {day_num}"] = {
+                "label": day_data.get("label", f"Day {day_num}"),
+                "exercises": [
+                    {
+                        "id": f"{program_id}_{week_num}_{day_num}_{idx}",
+                        "name": exercise.get("name", "Unknown Exercise"),
+                        "sets": exercise.get("sets", DEFAULT_SETS),
+                        "reps": exercise.get("reps", DEFAULT_REPS),
+                        "rest_seconds": exercise.get("rest_seconds", DEFAULT_REST_SECONDS),
+                        "completed": False,
+                        "notes": "",
+                    }
+                    for idx, exercise in enumerate(day_data.get("exercises", []))
+                ],
+            }
+    return result
+
+
+def parse_workout_text(program_text, program_id, llm=None):
+    """Drop-in for the old parse_crossfit_workout_text / parse_workout_text_enhanced"""
+    return parse_program(program_text, llm).to_frontend(program_id)
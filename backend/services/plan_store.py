@@ -0,0 +1,44 @@
+# services/plan_store.py - Persist and load the plan AST next to program_text
+#
+# save_plan_structure() is called wherever a WorkoutProgram is written;
+# load_plan() returns the stored structure and only re-parses when the text
+# changed or PLAN_AST_VERSION was bumped.
+
+import json
+import hashlib
+
+from models.db import db
+from models.program_structure import ProgramStructure
+from services.plan_ast import PLAN_AST_VERSION, Plan, parse_plan
+
+
+def text_hash(program_text):
+    return hashlib.sha256((program_text or "").encode("utf-8")).hexdigest()
+
+
+def save_plan_structure(program_id, program_text, plan=None):
+    """Add/refresh the ProgramStructure row in the current session (caller commits)"""
+    if plan is None:
+        plan = parse_plan(program_text)
+    row = db.session.get(ProgramStructure, program_id)
+    if row is None:
+        row = ProgramStructure(program_id=program_id)
+        db.session.add(row)
+    row.version = PLAN_AST_VERSION
+    row.text_hash = text_hash(program_text)
+    row.plan_json = json.dumps(plan.to_dict())
+    return plan
+
+
+def load_plan(program):
+    """Plan for a WorkoutProgram, from the stored structure when it is current"""
+    row = db.session.get(ProgramStructure, program.id)
+    if row is not None and row.version == PLAN_AST_VERSION and row.text_hash == text_hash(program.program_text):
+        try:
+            return Plan.from_dict(json.loads(row.plan_json))
+        except (TypeError, ValueError, KeyError) as e:
+            print(f"⚠️ Stored plan structure for program {program.id} is unreadable: {e}")
+
+    plan = save_plan_structure(program.id, program.program_text)
+    db.session.commit()
+    return plan
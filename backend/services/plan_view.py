@@ -0,0 +1,368 @@
+# services/plan_view.py - Materialized GET /workout/current bodies
+#
+# The workout screen's response is a pure function of the user's latest
+# program and its WorkoutExercise rows. It is kept serialized per program in
+# an in-process LRU (and optionally a shared PlanView table), so a read is a
+# key lookup instead of a query plus JSON encoding.
+#
+# Views are written through, not expired: writers mark the programs they touch
+# (exercise_store does this for its Core statements, an after_flush hook for
+# ORM changes) and a before_commit hook rebuilds those views with one query in
+# the same transaction. The LRU takes the new bodies only once the commit
+# succeeded; a rollback discards them.
+#
+# The hooks only see this process's commits, so a local view is served only
+# while its version matches the program's committed ProgramVersion. A read
+# fetches the user's latest program id and that version with one indexed
+# query; views written by another worker fail the check and are re-read from
+# the store or rebuilt.
+#
+# The same hook bumps the program's version (services/program_version.py)
+# for exercise and workout log writes (each view carries the version it was
+# built at as "plan_version") and updates its ProgressSummary row
+# (services/progress_summary.py) from the rows it just loaded.
+#
+# Config:
+#   PLAN_VIEW_CACHE_ENABLED   "true" (default) / "false" to build every read from the database
+#   PLAN_VIEW_MAX_ENTRIES     LRU bound on cached programs
+#   PLAN_VIEW_STORE           "memory" (default) or "database" to share views through PlanView rows
+
+import os
+import json
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import desc, event, func
+from sqlalchemy.orm import Session
+
+from models.db import db
+from models.plan_view import PlanView
+from models.program_version import ProgramVersion
+from models.workout_program import WorkoutProgram
+from models.workoutLog_model import WorkoutExercise, WorkoutLog
+from services.program_version import bump, current_version
+from services.progress_summary import on_program_write
+
+PLAN_VIEW_CACHE_ENABLED = os.getenv("PLAN_VIEW_CACHE_ENABLED", "true").lower() == "true"
+PLAN_VIEW_MAX_ENTRIES = int(os.getenv("PLAN_VIEW_MAX_ENTRIES", "2048"))
+PLAN_VIEW_STORE = os.getenv("PLAN_VIEW_STORE", "memory").lower()
+
+_DIRTY_KEY = "plan_views_dirty"
+_BUILT_KEY = "plan_views_built"
+
+
+def load_plan_data(program_id):
+    """
+    Frontend plan structure for a program from ONE ordered query.
+    Returns (plan_data, total_exercises, completed_exercises); plan_data is {} without exercises.
+    """
+    rows = db.session.query(
+        WorkoutExercise.id, WorkoutExercise.week, WorkoutExercise.day, WorkoutExercise.day_label,
+        WorkoutExercise.name, WorkoutExercise.sets, WorkoutExercise.reps,
+        WorkoutExercise.rest_seconds, WorkoutExercise.completed,
+    ).filter(WorkoutExercise.program_id == program_id).order_by(
+        WorkoutExercise.week, WorkoutExercise.day, WorkoutExercise.id
+    ).all()
+
+    plan_data = {}
+    completed_exercises = 0
+    for exercise_id, week, day, day_label, name, sets, reps, rest_seconds, completed in rows:
+        week_data = plan_data.setdefault(f"Week {week}", {})
+        day_data = week_data.get(f"Day {day}")
+        if day_data is None:
+            # The day's label comes from its first exercise
+            day_data = week_data[f"Day {day}"] = {"label": day_label or "Full Body", "exercises": []}
+        exercises = day_data["exercises"]
+        exercises.append({
+            "id": exercise_id,
+            "legacy_id": f"{program_id}_{week}_{day}_{len(exercises)}",
+            "name": name,
+            "sets": sets,
+            "reps": reps,
+            "rest_seconds": rest_seconds,
+            "completed": bool(completed),
+            "notes": ""
+        })
+        if completed:
+            completed_exercises += 1
+
+    return plan_data, len(rows), completed_exercises
+
+
+def load_exercises(program_id, exercise_ids):
+    """Exercises of a program by id, in plan order, with their week/day placement"""
+    if not exercise_ids:
+        return []
+    rows = db.session.query(
+        WorkoutExercise.id, WorkoutExercise.week, WorkoutExercise.day, WorkoutExercise.day_label,
+        WorkoutExercise.name, WorkoutExercise.sets, WorkoutExercise.reps,
+        WorkoutExercise.rest_seconds, WorkoutExercise.completed,
+    ).filter(
+        WorkoutExercise.program_id == program_id, WorkoutExercise.id.in_(list(exercise_ids))
+    ).order_by(WorkoutExercise.week, WorkoutExercise.day, WorkoutExercise.id).all()
+    return [{
+        "id": exercise_id,
+        "week": week,
+        "day": day,
+        "day_label": day_label or "Full Body",
+        "name": name,
+        "sets": sets,
+        "reps": reps,
+        "rest_seconds": rest_seconds,
+        "completed": bool(completed),
+        "notes": ""
+    } for exercise_id, week, day, day_label, name, sets, reps, rest_seconds, completed in rows]
+
+
+def build_view(program, version, loaded=None):
+    """
+    Serialized /workout/current body for a program at `version`, or None while
+    it has no exercises. `loaded` is a load_plan_data() result already at hand.
+    """
+    plan_data, total_exercises, completed_exercises = loaded or load_plan_data(program.id)
+    if not plan_data:
+        return None
+
+    completion_percentage = (completed_exercises / total_exercises) * 100 if total_exercises > 0 else 0
+    body = {
+        "user_id": program.user_id,
+        "program_id": program.id,
+        "program_name": getattr(program, "name", "Workout Plan"),
+        "plan": plan_data,
+        "completion_percentage": round(completion_percentage, 1),
+        "is_latest": True,
+        "total_exercises": total_exercises,
+        "completed_exercises": completed_exercises,
+        "total_days": sum(len(week_data) for week_data in plan_data.values()),
+        "plan_version": version,
+    }
+    if getattr(program, "created_at", None):
+        body["created_at"] = program.created_at.isoformat()
+    return json.dumps(body)
+
+
+class _LRU:
+    """Thread-safe LRU"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_views = _LRU(PLAN_VIEW_MAX_ENTRIES)
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "store_hits": 0, "misses": 0, "writes": 0}
+_write_generation = {}  # program_id -> committed view writes seen by this process
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def _shared():
+    return PLAN_VIEW_STORE == "database"
+
+
+# ---------- write side ----------
+
+def mark_program(program_id, exercise_ids=(), reset=False, session=None):
+    """
+    Record a program this transaction wrote: the exercises it changed, or
+    reset=True when rows were deleted. At commit its version is bumped and its
+    view rebuilt.
+    """
+    if not program_id:
+        return
+    session = session or db.session
+    entry = session.info.setdefault(_DIRTY_KEY, {}).setdefault(
+        program_id, {"exercises": set(), "reset": False, "logs": [], "logs_changed": False}
+    )
+    entry["exercises"].update(exercise_ids)
+    entry["reset"] = entry["reset"] or reset
+    return entry
+
+
+def _after_flush(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, WorkoutExercise):
+            mark_program(obj.program_id, {obj.id}, session=session)
+        elif isinstance(obj, WorkoutLog) and obj.program_id:
+            mark_program(obj.program_id, session=session)["logs"].append((obj.date, obj.duration))
+    for obj in session.dirty:
+        if isinstance(obj, WorkoutExercise):
+            mark_program(obj.program_id, {obj.id}, session=session)
+        elif isinstance(obj, WorkoutLog) and obj.program_id:
+            mark_program(obj.program_id, session=session)["logs_changed"] = True
+    for obj in session.deleted:
+        if isinstance(obj, WorkoutExercise):
+            mark_program(obj.program_id, reset=True, session=session)
+        elif isinstance(obj, WorkoutLog) and obj.program_id:
+            mark_program(obj.program_id, session=session)["logs_changed"] = True
+
+
+def _write_store(session, program, body, version):
+    row = session.get(PlanView, program.id)
+    if body is None:
+        if row is not None:
+            session.delete(row)
+        return
+    if row is None:
+        session.add(PlanView(program_id=program.id, user_id=program.user_id, body=body, version=version))
+    else:
+        row.body, row.version = body, version
+
+
+def _before_commit(session):
+    session.flush()
+    dirty = session.info.pop(_DIRTY_KEY, None)
+    if not dirty:
+        return
+    built = session.info.setdefault(_BUILT_KEY, {})
+    for program_id, entry in dirty.items():
+        version = bump(session, program_id, entry["exercises"], entry["reset"])
+        program = session.get(WorkoutProgram, program_id)
+        if program is None:
+            built[program_id] = (None, version)
+            continue
+        loaded = load_plan_data(program_id)
+        on_program_write(session, program, version, loaded[0], entry["logs"], entry["logs_changed"])
+        if not PLAN_VIEW_CACHE_ENABLED:
+            continue
+        body = build_view(program, version, loaded)
+        built[program_id] = (body, version)
+        if _shared():
+            _write_store(session, program, body, version)
+    session.flush()
+
+
+def _after_commit(session):
+    for program_id, (body, version) in session.info.pop(_BUILT_KEY, {}).items():
+        with _stats_lock:
+            _write_generation[program_id] = _write_generation.get(program_id, 0) + 1
+            _stats["writes"] += 1
+        if body is None:
+            _views.pop(program_id)
+        else:
+            _views.put(program_id, (body, version))
+
+
+def _after_soft_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        for key in (_DIRTY_KEY, _BUILT_KEY):
+            session.info.pop(key, None)
+
+
+def register_view_hooks():
+    """Install the session hooks once per process (versions are tracked even with the cache off)"""
+    if event.contains(Session, "after_commit", _after_commit):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_soft_rollback", _after_soft_rollback)
+
+
+# ---------- read side ----------
+
+def latest_program(user_id):
+    """(id, committed version) of the user's most recent program from one indexed query, or (None, None)"""
+    row = db.session.query(
+        WorkoutProgram.id, func.coalesce(ProgramVersion.version, 0)
+    ).outerjoin(ProgramVersion, ProgramVersion.program_id == WorkoutProgram.id).filter(
+        WorkoutProgram.user_id == user_id
+    ).order_by(desc(WorkoutProgram.created_at), desc(WorkoutProgram.id)).limit(1).first()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def latest_program_id(user_id):
+    """Id of the user's most recent program, or None"""
+    return latest_program(user_id)[0]
+
+
+def get_view(program_id, version=None):
+    """
+    (serialized /workout/current body, version) for a program; (None, version)
+    while it has no exercises. `version` is its committed version when the
+    caller already read it (latest_program); cached views at another version
+    are not served.
+    """
+    if version is None:
+        version = current_version(program_id)
+    if PLAN_VIEW_CACHE_ENABLED:
+        cached = _views.get(program_id)
+        if cached is not None and cached[1] == version:
+            _count("hits")
+            return cached
+        if _shared():
+            row = db.session.get(PlanView, program_id)
+            if row is not None and row.version == version:
+                _count("store_hits")
+                _views.put(program_id, (row.body, row.version))
+                return row.body, row.version
+
+    _count("misses")
+    with _stats_lock:
+        generation = _write_generation.get(program_id, 0)
+    program = db.session.get(WorkoutProgram, program_id)
+    if program is None:
+        return None, None
+    body = build_view(program, version)
+    if body is not None and PLAN_VIEW_CACHE_ENABLED:
+        if _shared():
+            _write_store(db.session, program, body, version)
+            db.session.commit()
+        with _stats_lock:
+            # A write committed while we were building; its view is newer than ours
+            current = _write_generation.get(program_id, 0) == generation
+        if current:
+            _views.put(program_id, (body, version))
+    return body, version
+
+
+def invalidate(program_id=None):
+    """Drop one program's local view, or every local view"""
+    if program_id is None:
+        _views.clear()
+    else:
+        _views.pop(program_id)
+
+
+def stats():
+    with _stats_lock:
+        result = dict(_stats)
+    lookups = result["hits"] + result["store_hits"] + result["misses"]
+    result["hit_rate"] = round((result["hits"] + result["store_hits"]) / lookups, 3) if lookups else 0.0
+    result["entries"] = len(_views)
+    result["enabled"] = PLAN_VIEW_CACHE_ENABLED
+    result["store"] = PLAN_VIEW_STORE
+    return result
+
+
+register_view_hooks()
@@ -0,0 +1,235 @@
+# services/profile_normalizer.py - Deterministic user profile normalization
+#
+# Replaces the "convert this profile into structured JSON" LLM round-trip in
+# user_input_agent. Every closed-vocabulary field is snapped onto the same
+# VALID_* lists routine_generation_agent validates against, using exact,
+# synonym, substring and finally difflib fuzzy matching.
+
+import re
+from difflib import get_close_matches
+from functools import lru_cache
+
+from services.agents.routine_generation import (
+    VALID_GOALS,
+    VALID_EXPERIENCE,
+    VALID_EQUIPMENT,
+    VALID_STYLES,
+    get_default_style_for_goal,
+)
+
+VALID_GENDERS = ["Male", "Female", "Other"]
+
+# Common phrasings the mobile app / older clients send that fuzzy matching alone gets wrong
+SYNONYMS = {
+    "goal": {
+        "lose weight": "Fat Loss",
+        "weight loss": "Fat Loss",
+        "fat burn": "Fat Loss",
+        "cut": "Fat Loss",
+        "build muscle": "Muscle Gain",
+        "hypertrophy": "Muscle Gain",
+        "bulk": "Muscle Gain",
+        "strength": "Strength Building",
+        "get stronger": "Strength Building",
+        "stamina": "Endurance",
+        "cardio": "Endurance",
+        "flexibility": "Flexibility & Mobility",
+        "mobility": "Flexibility & Mobility",
+        "recomp": "Body Recomposition",
+        "sport": "Athletic Performance",
+        "athletic": "Athletic Performance",
+        "stay fit": "General Fitness",
+        "health": "General Fitness",
+    },
+    "experience": {
+        "none": "Complete Beginner",
+        "new": "Complete Beginner",
+        "beginner": "Beginner (1-6 months)",
+        "novice": "Beginner (1-6 months)",
+        "intermediate": "Intermediate (6 months - 2 years)",
+        "advanced": "Advanced (2-5 years)",
+        "expert": "Expert (5+ years)",
+        "pro": "Expert (5+ years)",
+    },
+    "equipment": {
+        "gym": "Full Gym Access",
+        "full gym": "Full Gym Access",
+        "home gym": "Home Gym (Weights & Machines)",
+        "none": "Bodyweight Only",
+        "no equipment": "Bodyweight Only",
+        "bodyweight": "Bodyweight Only",
+        "dumbbells": "Minimal Equipment (Dumbbells Only)",
+        "dumbbell": "Minimal Equipment (Dumbbells Only)",
+        "bands": "Resistance Bands Only",
+        "resistance bands": "Resistance Bands Only",
+        "kettlebell": "Kettlebells Only",
+        "kettlebells": "Kettlebells Only",
+        "park": "Outdoor/Park Equipment",
+        "outdoor": "Outdoor/Park Equipment",
+    },
+    "style": {
+        "hiit": "HIIT (High Intensity Interval Training)",
+        "interval": "HIIT (High Intensity Interval Training)",
+        "cardio": "Cardio Focus",
+        "crossfit": "CrossFit Style",
+        "yoga": "Yoga & Flexibility",
+        "circuit": "Circuit Training",
+        "functional": "Functional Training",
+        "sports": "Sports-Specific Training",
+        "strength": "Strength Training",
+    },
+    "gender": {
+        "m": "Male",
+        "man": "Male",
+        "f": "Female",
+        "woman": "Female",
+    },
+}
+
+# Field name -> (choices, default). A default of None means "derive from other fields".
+PROFILE_SCHEMA = {
+    "goal": (VALID_GOALS, "General Fitness"),
+    "experience": (VALID_EXPERIENCE, "Beginner (1-6 months)"),
+    "equipment": (VALID_EQUIPMENT, "Bodyweight Only"),
+    "style": (VALID_STYLES, None),
+    "gender": (VALID_GENDERS, "Other"),
+}
+
+NUMERIC_FIELDS = ("age", "height", "weight")
+
+# Fields that carry genuinely free-form user text; only these may go to the LLM
+FREE_TEXT_FIELDS = ("restrictions", "injuries", "notes", "preferences")
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_FIRST_INT = re.compile(r"\d+")
+_NUMBER_WITH_UNIT = re.compile(r"^(\d+(?:\.\d+)?)\s*([a-z\"']*(?:\s+old)?)\.?$")
+_FEET_INCHES = re.compile(
+    r"^(\d+)\s*(?:'|ft|feet|foot)\s*(?:(\d+(?:\.\d+)?)\s*(?:\"|''|in|inch|inches)?)?$"
+)
+
+# Unit -> factor to the units the app asks for (years, cm, kg); "" is a bare number
+NUMBER_UNITS = {
+    "age": {"": 1, "y": 1, "yr": 1, "yrs": 1, "year": 1, "years": 1, "yo": 1, "years old": 1},
+    "height": {"": 1, "cm": 1, "m": 100, "in": 2.54, "inch": 2.54, "inches": 2.54, '"': 2.54},
+    "weight": {"": 1, "kg": 1, "kgs": 1, "kilo": 1, "kilos": 1, "kilograms": 1,
+               "lb": 0.45359237, "lbs": 0.45359237, "pound": 0.45359237, "pounds": 0.45359237},
+}
+
+
+def _key(value):
+    return _NON_ALNUM.sub(" ", str(value).lower()).strip()
+
+
+def _contains_words(text, phrase):
+    return re.search(rf"\b{re.escape(phrase)}\b", text) is not None
+
+
+@lru_cache(maxsize=1024)
+def match_choice(field, raw_value):
+    """Snap a raw value onto the field's vocabulary; returns None when nothing is close enough"""
+    choices, _ = PROFILE_SCHEMA[field]
+    wanted = _key(raw_value)
+    if not wanted:
+        return None
+
+    by_key = {_key(choice): choice for choice in choices}
+
+    # 1. Exact (case/punctuation-insensitive)
+    if wanted in by_key:
+        return by_key[wanted]
+
+    # 2. Known synonyms
+    synonyms = SYNONYMS.get(field, {})
+    if wanted in synonyms:
+        return synonyms[wanted]
+
+    # 3. Whole words either way ("full gym" in "full gym access", "hiit training" ⊃ "hiit"),
+    #    longest first so "a female" is "Female" rather than "Male"
+    if len(wanted) >= 3:
+        matches = [
+            (len(choice_key), choice) for choice_key, choice in by_key.items()
+            if _contains_words(choice_key, wanted) or _contains_words(wanted, choice_key)
+        ]
+        if matches:
+            return max(matches, key=lambda match: match[0])[1]
+    for phrase in sorted(synonyms, key=len, reverse=True):
+        if _contains_words(wanted, phrase):
+            return synonyms[phrase]
+
+    # 4. Fuzzy spelling match
+    close = get_close_matches(wanted, list(by_key), n=1, cutoff=0.6)
+    if close:
+        return by_key[close[0]]
+
+    return None
+
+
+def _normalize_days(raw_value):
+    match = _FIRST_INT.search(str(raw_value or ""))
+    days = int(match.group()) if match else 3
+    days = min(max(days, 1), 7)
+    return f"{days} days"
+
+
+def _normalize_number(field, raw_value):
+    """
+    A number in the field's unit (years, cm, kg), converting the other units in
+    NUMBER_UNITS and feet/inches heights; None when it cannot be read exactly.
+    """
+    if isinstance(raw_value, bool):
+        return None
+    if isinstance(raw_value, (int, float)):
+        value = float(raw_value)
+    else:
+        text = str(raw_value or "").strip().lower()
+        feet_inches = _FEET_INCHES.match(text) if field == "height" else None
+        match = _NUMBER_WITH_UNIT.match(text)
+        if feet_inches:
+            value = (int(feet_inches.group(1)) * 12 + float(feet_inches.group(2) or 0)) * 2.54
+        elif match and match.group(2).strip() in NUMBER_UNITS[field]:
+            value = float(match.group(1)) * NUMBER_UNITS[field][match.group(2).strip()]
+        else:
+            return None
+    value = round(value, 1)
+    return int(value) if value.is_integer() else value
+
+
+def normalize_profile(user_data):
+    """
+    Deterministically normalize a raw profile dict.
+
+    Returns (normalized_profile, free_text) where free_text holds any
+    non-empty FREE_TEXT_FIELDS that still need interpretation.
+    """
+    raw = dict(user_data or {})
+    profile = dict(raw)
+
+    for field, (_, default) in PROFILE_SCHEMA.items():
+        value = raw.get(field)
+        # str(): match_choice is cached, so its arguments must be hashable
+        if isinstance(value, (list, tuple)):
+            matched = next((m for m in (match_choice(field, str(v)) for v in value if v) if m), None)
+        else:
+            matched = match_choice(field, str(value)) if value else None
+
+        if matched is None and value:
+            print(f"⚠️ Could not match {field}='{value}', using default")
+        profile[field] = matched or default
+
+    if not profile.get("style"):
+        profile["style"] = get_default_style_for_goal(profile["goal"])
+
+    profile["days_per_week"] = _normalize_days(raw.get("days_per_week"))
+    for field in NUMERIC_FIELDS:
+        value = raw.get(field)
+        number = _normalize_number(field, value)
+        if number is None and value not in (None, "", "N/A"):
+            print(f"⚠️ Could not read {field}='{value}', using N/A")
+        profile[field] = "N/A" if number is None else number
+
+    free_text = {
+        field: raw[field]
+        for field in FREE_TEXT_FIELDS
+        if isinstance(raw.get(field), str) and raw[field].strip()
+    }
+    return profile, free_text
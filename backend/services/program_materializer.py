@@ -0,0 +1,223 @@
+# services/program_materializer.py - Parse new programs in the background
+#
+# WorkoutExercise rows used to be created on the first GET /workout/current,
+# which made that screen pay for parsing (maybe an LLM call) plus the inserts.
+# A SQLAlchemy commit hook now notices every committed WorkoutProgram insert
+# (or program_text change), records a "pending" ProgramParseJob in the same
+# transaction and, once the commit succeeded, hands the program to a small
+# worker pool that parses it and writes its exercises.
+#
+# /workout/current only reads: while the job is pending or running it answers
+# 202 with status "parsing_pending" so clients can poll.
+#
+# Config:
+#   PARSE_ON_COMMIT        "true" (default) / "false" to disable the hook
+#   PARSE_WORKERS          worker threads
+#   PARSE_STALE_SECONDS    a pending/running job older than this is re-queued
+#   PARSE_MAX_ATTEMPTS     failed jobs are re-queued by readers until this many attempts
+
+import os
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.db import db
+from models.workout_program import WorkoutProgram
+from models.workoutLog_model import WorkoutExercise
+from models.program_parse_job import ProgramParseJob
+from services.parse_cache import parse_workout_text_cached
+from services.exercise_store import materialize_plan_data
+
+PARSE_ON_COMMIT = os.getenv("PARSE_ON_COMMIT", "true").lower() == "true"
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))
+PARSE_STALE_SECONDS = int(os.getenv("PARSE_STALE_SECONDS", "300"))
+PARSE_MAX_ATTEMPTS = int(os.getenv("PARSE_MAX_ATTEMPTS", "3"))
+
+ACTIVE_PARSE_STATUSES = ("pending", "running")
+
+_SESSION_KEY = "programs_to_parse"
+
+_executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="program-parse")
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+_llm = None
+_llm_lock = threading.Lock()
+
+
+def _get_llm():
+    """LLM for low-confidence parses, created on first use"""
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            from services.llm_engine import LLMEngine
+            _llm = LLMEngine(provider="ollama", model="qwen2.5:3b-instruct", timeout=180)
+        return _llm
+
+
+def save_parsed_exercises(parsed_data, program_id):
+    """Replace a program's WorkoutExercise rows with the frontend structure; caller commits"""
+    return len(materialize_plan_data(parsed_data, program_id))
+
+
+# ---------- commit hook ----------
+
+def _text_changed(program):
+    return inspect(program).attrs.program_text.history.has_changes()
+
+
+def _after_flush(session, flush_context):
+    programs = [obj for obj in session.new if isinstance(obj, WorkoutProgram)]
+    programs += [obj for obj in session.dirty if isinstance(obj, WorkoutProgram) and _text_changed(obj)]
+    if programs:
+        session.info.setdefault(_SESSION_KEY, set()).update(p.id for p in programs)
+
+
+def _before_commit(session):
+    # Flush first so programs added since the last flush get their ids
+    session.flush()
+    program_ids = session.info.get(_SESSION_KEY)
+    if not program_ids:
+        return
+    for program_id in program_ids:
+        job = session.get(ProgramParseJob, program_id)
+        if job is None:
+            session.add(ProgramParseJob(program_id=program_id, status="pending"))
+        else:
+            job.status, job.error, job.attempts = "pending", None, 0
+
+
+def _after_commit(session):
+    program_ids = session.info.pop(_SESSION_KEY, None)
+    if not program_ids or not has_app_context():
+        return
+    app = current_app._get_current_object()
+    for program_id in program_ids:
+        enqueue_materialization(program_id, app)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    # A rolled back savepoint leaves the outer transaction (and its programs) alive
+    if not previous_transaction.nested:
+        session.info.pop(_SESSION_KEY, None)
+
+
+def register_commit_hooks():
+    """Install the session hooks once per process"""
+    if not PARSE_ON_COMMIT or event.contains(Session, "after_commit", _after_commit):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_soft_rollback", _after_soft_rollback)
+
+
+# ---------- worker ----------
+
+def enqueue_materialization(program_id, app):
+    """Queue parsing of one program unless this process is already on it"""
+    with _in_flight_lock:
+        if program_id in _in_flight:
+            return False
+        _in_flight.add(program_id)
+    _executor.submit(_run, program_id, app)
+    print(f"📥 Queued parsing of program {program_id}")
+    return True
+
+
+def _set_status(program_id, status, **fields):
+    job = db.session.get(ProgramParseJob, program_id)
+    if job is None:
+        job = ProgramParseJob(program_id=program_id)
+        db.session.add(job)
+    job.status = status
+    for key, value in fields.items():
+        setattr(job, key, value)
+    db.session.commit()
+    return job
+
+
+def materialize_program(program_id):
+    """Parse a program and write its exercises; returns the number of exercises"""
+    job = db.session.get(ProgramParseJob, program_id)
+    _set_status(program_id, "running", attempts=((job.attempts or 0) if job else 0) + 1)
+
+    program = db.session.get(WorkoutProgram, program_id)
+    if program is None:
+        raise ValueError(f"Program {program_id} not found")
+
+    existing = WorkoutExercise.query.filter_by(program_id=program_id).count()
+    if existing:
+        # Template and structured-output programs get their exercises in the creating transaction
+        print(f"ℹ️ Program {program_id} already has {existing} exercises")
+        count = existing
+    else:
+        parsed = parse_workout_text_cached(program.program_text, program_id, _get_llm())
+        count = save_parsed_exercises(parsed, program_id)
+
+    _set_status(program_id, "ready", exercise_count=count, error=None)
+    return count
+
+
+def _run(program_id, app):
+    try:
+        with app.app_context():
+            try:
+                count = materialize_program(program_id)
+                print(f"✅ Program {program_id} materialized with {count} exercises")
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Parsing program {program_id} failed: {e}")
+                _set_status(program_id, "failed", error=str(e))
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(program_id)
+
+
+# ---------- read side ----------
+
+def parse_status(program_id):
+    """{"status", "attempts", "exercise_count", "error", "updated_at"} or None when untracked"""
+    job = db.session.get(ProgramParseJob, program_id)
+    if job is None:
+        return None
+    return {
+        "program_id": program_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "exercise_count": job.exercise_count,
+        "error": job.error,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+def ensure_materialization(program_id):
+    """
+    Called by readers that found no exercises. Hands programs the hook never saw
+    (created before it existed), jobs abandoned by a dead worker, failed jobs with
+    attempts left and "ready" programs whose exercises were deleted back to the
+    worker pool. Writes nothing itself: the worker records the job's progress.
+    Returns the parse status dict as the reader should report it.
+    """
+    job = db.session.get(ProgramParseJob, program_id)
+    stale_before = datetime.utcnow() - timedelta(seconds=PARSE_STALE_SECONDS)
+    requeue = (
+        job is None
+        or job.status == "ready"  # marked ready but the exercises are gone
+        or (job.status in ACTIVE_PARSE_STATUSES and program_id not in _in_flight
+            and (job.updated_at is None or job.updated_at < stale_before))
+        or (job.status == "failed" and (job.attempts or 0) < PARSE_MAX_ATTEMPTS)
+    )
+    status = parse_status(program_id) or {
+        "program_id": program_id, "attempts": 0, "exercise_count": None, "error": None, "updated_at": None,
+    }
+    if requeue:
+        enqueue_materialization(program_id, current_app._get_current_object())
+        status.update(status="pending", error=None)
+    return status
+
+
+register_commit_hooks()
@@ -0,0 +1,111 @@
+# services/program_version.py - Program versions, ETags and exercise deltas
+#
+# Every commit that writes a program's exercises or workout logs bumps its
+# ProgramVersion by one (services/plan_view.py calls bump() from its
+# before_commit hook, in the same transaction as the writes). The exercises it
+# wrote are recorded in ExerciseChange at that version, so a client holding
+# version N can fetch only what changed after N. Replacing a program's
+# exercises raises floor_version: older clients must reload in full.
+#
+# The same versions give the read endpoints stable ETags, so a refresh with
+# If-None-Match answers 304 without building the body.
+#
+# Config:
+#   PROGRAM_CHANGE_RETAIN   versions of ExerciseChange history kept per program
+
+import os
+import hashlib
+from datetime import date
+
+from flask import request
+from sqlalchemy import func
+
+from models.db import db
+from models.program_version import ProgramVersion, ExerciseChange
+from models.workout_program import WorkoutProgram
+
+PROGRAM_CHANGE_RETAIN = int(os.getenv("PROGRAM_CHANGE_RETAIN", "200"))
+
+
+def bump(session, program_id, exercise_ids=(), reset=False):
+    """Next version of a program inside the current transaction; records the exercises it wrote"""
+    row = session.query(ProgramVersion).filter_by(program_id=program_id).with_for_update().first()
+    if row is None:
+        row = ProgramVersion(program_id=program_id, version=0, floor_version=0)
+        session.add(row)
+    row.version = (row.version or 0) + 1
+
+    if reset:
+        # Deleted rows cannot be expressed as a delta
+        row.floor_version = row.version
+        session.query(ExerciseChange).filter(
+            ExerciseChange.program_id == program_id
+        ).delete(synchronize_session=False)
+    elif exercise_ids:
+        session.execute(ExerciseChange.__table__.insert(), [
+            {"program_id": program_id, "version": row.version, "exercise_id": exercise_id}
+            for exercise_id in exercise_ids
+        ])
+
+    prune_below = row.version - PROGRAM_CHANGE_RETAIN
+    if prune_below > (row.floor_version or 0):
+        row.floor_version = prune_below
+        session.query(ExerciseChange).filter(
+            ExerciseChange.program_id == program_id,
+            ExerciseChange.version <= prune_below,
+        ).delete(synchronize_session=False)
+    return row.version
+
+
+def current_version(program_id):
+    """Committed version of a program (0 before its first tracked write)"""
+    return db.session.query(ProgramVersion.version).filter_by(program_id=program_id).scalar() or 0
+
+
+def user_version(user_id):
+    """(sum of versions, program count) over a user's programs; changes whenever any of them does"""
+    total, programs = db.session.query(
+        func.coalesce(func.sum(ProgramVersion.version), 0), func.count(WorkoutProgram.id)
+    ).select_from(WorkoutProgram).outerjoin(
+        ProgramVersion, ProgramVersion.program_id == WorkoutProgram.id
+    ).filter(WorkoutProgram.user_id == user_id).one()
+    return int(total), int(programs)
+
+
+def changed_exercise_ids(program_id, since):
+    """
+    (version, ids) of the exercises written after version `since`, or
+    (version, None) when a delta from there is not possible.
+    """
+    row = db.session.get(ProgramVersion, program_id)
+    if row is None:
+        return 0, (None if since else [])
+    if since < (row.floor_version or 0) or since > row.version:
+        return row.version, None
+    ids = db.session.query(ExerciseChange.exercise_id).filter(
+        ExerciseChange.program_id == program_id,
+        ExerciseChange.version > since,
+    ).distinct().all()
+    return row.version, [exercise_id for (exercise_id,) in ids]
+
+
+# ---------- conditional GET ----------
+
+def make_etag(*parts, daily=False):
+    """Weak-comparison ETag value for the given state; `daily` adds today's date (streaks, "this week")"""
+    if daily:
+        parts += (date.today().isoformat(),)
+    return hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+
+
+def not_modified(etag):
+    """True when the request's If-None-Match already names this ETag"""
+    return request.if_none_match.contains_weak(etag)
+
+
+def with_etag(response, etag):
+    """Attach a weak ETag to a response (or a (response, status) tuple) and make clients revalidate"""
+    target = response[0] if isinstance(response, tuple) else response
+    target.set_etag(etag, weak=True)
+    target.headers["Cache-Control"] = "no-cache"
+    return response
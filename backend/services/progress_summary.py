@@ -0,0 +1,192 @@
+# services/progress_summary.py - Per-program progress counters
+#
+# GET /workout/progress used to load the program's exercises and logs and
+# recompute totals, completed days, streak and the current week on every
+# call. A ProgressSummary row now holds those numbers and is updated by the
+# plan_view before_commit hook, in the same transaction as the writes:
+#   - exercise counters are taken from the rows that hook already reads to
+#     rebuild the plan view (no extra query)
+#   - new workout logs are applied incrementally (count, minutes); edited or
+#     deleted logs recount them
+# The endpoint reads this row and the user's streak row (services/streaks.py).
+#
+# reconcile() rebuilds rows from WorkoutExercise and WorkoutLog, for rows
+# that are missing and as a periodic check against drift.
+#
+# Run from backend/:  python -m services.progress_summary [--program ID] [--user UID]
+
+import argparse
+from datetime import datetime
+
+from models.db import db
+from models.progress_summary import ProgressSummary
+from models.workout_program import WorkoutProgram
+from models.workoutLog_model import WorkoutExercise, WorkoutLog
+from services.program_version import current_version
+
+MINUTES_PER_EXERCISE_ESTIMATE = 2.5
+
+_COUNTER_FIELDS = ("total_exercises", "completed_exercises", "completed_days", "current_week",
+                   "log_count", "log_minutes")
+
+
+def exercise_states(plan_data):
+    """(week, day, completed) for every exercise of a load_plan_data() structure"""
+    for week_key, week_data in plan_data.items():
+        week = int(week_key.replace("Week ", ""))
+        for day_key, day_data in week_data.items():
+            day = int(day_key.replace("Day ", ""))
+            for exercise in day_data["exercises"]:
+                yield week, day, exercise["completed"]
+
+
+def _set_exercise_counters(row, states):
+    weeks = {}
+    completed_days = set()
+    for week, day, completed in states:
+        counts = weeks.setdefault(week, [0, 0])
+        counts[0] += 1
+        if completed:
+            counts[1] += 1
+            completed_days.add((week, day))
+
+    row.total_exercises = sum(total for total, _ in weeks.values())
+    row.completed_exercises = sum(completed for _, completed in weeks.values())
+    row.completed_days = len(completed_days)
+    # First week that is not fully completed; the week after the last one when all are
+    row.current_week = next(
+        (week for week in sorted(weeks) if weeks[week][1] < weeks[week][0]),
+        max(weeks) + 1 if weeks else 1,
+    )
+
+
+def _recount_logs(session, row):
+    count, minutes = session.query(
+        db.func.count(WorkoutLog.id), db.func.coalesce(db.func.sum(WorkoutLog.duration), 0)
+    ).filter(WorkoutLog.program_id == row.program_id, WorkoutLog.user_id == row.user_id).one()
+    row.log_count = int(count)
+    row.log_minutes = int(minutes)
+
+
+def _locked_row(session, program):
+    return session.query(ProgressSummary).filter_by(program_id=program.id).with_for_update().first()
+
+
+def reconcile_program(program, session=None, version=None):
+    """Rebuild one program's row from the source tables; returns the row (caller commits)"""
+    session = session or db.session
+    row = _locked_row(session, program)
+    if row is None:
+        row = ProgressSummary(program_id=program.id, user_id=program.user_id)
+        session.add(row)
+    row.user_id = program.user_id
+    _set_exercise_counters(row, session.query(
+        WorkoutExercise.week, WorkoutExercise.day, WorkoutExercise.completed
+    ).filter(WorkoutExercise.program_id == program.id).all())
+    _recount_logs(session, row)
+    if version is not None:
+        row.version = version
+    row.reconciled_at = datetime.utcnow()
+    return row
+
+
+def on_program_write(session, program, version, plan_data, new_logs=(), logs_changed=False):
+    """
+    Called by the plan_view before_commit hook for every program the
+    transaction wrote, with its freshly loaded plan_data and the
+    (date, duration) of workout logs it inserted.
+    """
+    row = _locked_row(session, program)
+    if row is None:
+        # First write since the summary existed: the source tables already hold this transaction's rows
+        reconcile_program(program, session, version)
+        return
+    _set_exercise_counters(row, exercise_states(plan_data))
+    if logs_changed:
+        _recount_logs(session, row)
+    else:
+        for _log_date, duration in new_logs:
+            row.log_count = (row.log_count or 0) + 1
+            row.log_minutes = (row.log_minutes or 0) + (duration or 0)
+    row.version = version
+
+
+def get_summary(program_id):
+    """The program's row, built (and committed) on first use"""
+    row = db.session.get(ProgressSummary, program_id)
+    if row is None:
+        program = db.session.get(WorkoutProgram, program_id)
+        if program is None:
+            return None
+        row = reconcile_program(program, version=current_version(program_id))
+        db.session.commit()
+    return row
+
+
+def progress_payload(row, streak):
+    """The "progress" object of GET /workout/progress; `streak` is streaks.get_streak() of the user"""
+    if not row.total_exercises:
+        return {
+            "completion_percentage": 0,
+            "total_workouts": 0,
+            "current_streak": 0,
+            "total_time": 0,
+            "total_exercises": 0,
+            "completed_exercises": 0
+        }
+
+    completion_percentage = (row.completed_exercises / row.total_exercises) * 100
+    # Estimate 2.5 minutes per completed exercise when nothing was logged
+    estimated_time = (row.completed_exercises * MINUTES_PER_EXERCISE_ESTIMATE
+                      if not row.log_minutes and row.completed_exercises else 0)
+    return {
+        "completion_percentage": round(completion_percentage, 1),
+        "total_workouts": int(max(row.log_count, row.completed_days)),
+        "current_streak": streak["current_streak"],
+        "longest_streak": streak["longest_streak"],
+        "total_time": int(max(row.log_minutes, estimated_time)),  # in minutes
+        "total_exercises": row.total_exercises,
+        "completed_exercises": row.completed_exercises,
+        "current_week": row.current_week,
+        "program_id": row.program_id,
+        "workouts_from_logs": row.log_count,
+        "workouts_from_exercises": row.completed_days
+    }
+
+
+def reconcile(program_ids=None, user_id=None):
+    """Rebuild rows for the given programs (default: all); returns {"checked", "drifted"}"""
+    query = WorkoutProgram.query
+    if program_ids:
+        query = query.filter(WorkoutProgram.id.in_(list(program_ids)))
+    if user_id:
+        query = query.filter(WorkoutProgram.user_id == user_id)
+
+    checked = drifted = 0
+    for program in query.order_by(WorkoutProgram.id).all():
+        existing = db.session.get(ProgressSummary, program.id)
+        before = tuple(getattr(existing, field) for field in _COUNTER_FIELDS) if existing else None
+        row = reconcile_program(program, version=current_version(program.id))
+        if before is not None and before != tuple(getattr(row, field) for field in _COUNTER_FIELDS):
+            drifted += 1
+            print(f"⚠️ Progress summary of program {program.id} had drifted; rebuilt")
+        db.session.commit()
+        checked += 1
+    return {"checked": checked, "drifted": drifted}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild progress summaries from exercises and workout logs")
+    parser.add_argument("--program", type=int, action="append", help="program id (repeatable); default all")
+    parser.add_argument("--user", help="only this user's programs")
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        db.create_all()
+        result = reconcile(args.program, args.user)
+    print(f"✅ Reconciled {result['checked']} programs ({result['drifted']} had drifted)")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from services.llm_engine import LLMEngine
 import time
+from services.tracing import traced
 
 load_dotenv()
 
@@ -45,6 +46,7 @@ def split_documents(docs, chunk_size=500, overlap=50):
     splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=overlap)
     return splitter.split_documents(docs)
 
+@traced("rag.create_vectorstore")
 def create_vectorstore(persist_path="faiss_index"):
     docs = load_documents()
     chunks = split_documents(docs)
@@ -54,6 +56,7 @@ def create_vectorstore(persist_path="faiss_index"):
     print(f"✅ FAISS index saved at {persist_path}")
     return vectorstore
 
+@traced("rag.load_retriever")
 def load_retriever(persist_path="faiss_index", k=6):
     """Load retriever with optimized parameters"""
     path = os.path.abspath(persist_path)
@@ -61,6 +64,7 @@ def load_retriever(persist_path="faiss_index", k=6):
     vectorstore = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
     return vectorstore.as_retriever(search_kwargs={"k": k})
 
+@traced("rag.ask_rag_question")
 def ask_rag_question(query, retriever, max_context_length=1500, timeout_seconds=45):
     """Optimized RAG question with timeout handling and context limiting"""
     
@@ -125,6 +129,7 @@ Answer briefly and focus on key points."""
         print(f"❌ RAG question failed: {e}")
         return "Unable to retrieve fitness information from database."
 
+@traced("rag.get_relevant_fitness_context")
 def get_relevant_fitness_context(query, retriever, max_length=1000):
     """Direct context retrieval without LLM processing - faster for workout generation"""
     
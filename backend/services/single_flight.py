@@ -0,0 +1,173 @@
+# services/single_flight.py - Coalesce concurrent duplicate coach requests
+#
+# Mobile double-taps and client retries resend /generate/generate-workout and
+# /generate/chat-follow-up while the first call is still running. Calls are
+# keyed by (uid, endpoint, payload hash); the first caller runs the handler and
+# every concurrent duplicate waits for it and shares its (body, status_code).
+#
+# Modes (SINGLE_FLIGHT_MODE):
+#   "memory"   (default) threads of one process share the in-flight call
+#   "database" additionally coordinates workers through SingleFlightLock rows:
+#              the worker whose INSERT wins runs the handler, others poll the row
+#   "off"      no coalescing
+#
+# Config:
+#   SINGLE_FLIGHT_WAIT_SECONDS   how long a duplicate waits before running the handler itself
+#   SINGLE_FLIGHT_LOCK_TTL       a "running" row older than this is considered abandoned
+#   SINGLE_FLIGHT_RESULT_GRACE   finished results stay readable this long for late retries
+#   SINGLE_FLIGHT_POLL_SECONDS   database-mode polling interval
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from models.db import db
+from models.single_flight_lock import SingleFlightLock
+from services.job_queue import request_hash
+
+SINGLE_FLIGHT_MODE = os.getenv("SINGLE_FLIGHT_MODE", "memory").lower()
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", "300"))
+SINGLE_FLIGHT_LOCK_TTL = int(os.getenv("SINGLE_FLIGHT_LOCK_TTL", "600"))
+SINGLE_FLIGHT_RESULT_GRACE = int(os.getenv("SINGLE_FLIGHT_RESULT_GRACE", "10"))
+SINGLE_FLIGHT_POLL_SECONDS = float(os.getenv("SINGLE_FLIGHT_POLL_SECONDS", "0.5"))
+
+
+def flight_key(uid, endpoint, payload):
+    raw = f"{uid}|{endpoint}|{request_hash(endpoint, payload)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run fn once per key while it is in flight; duplicates share the result"""
+
+    def __init__(self, mode=SINGLE_FLIGHT_MODE, wait_seconds=SINGLE_FLIGHT_WAIT_SECONDS):
+        self.mode = mode
+        self.wait_seconds = wait_seconds
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "shared": 0, "timeouts": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def do(self, endpoint, payload, fn):
+        """Returns (fn_result, shared) where shared means another request computed it"""
+        if self.mode == "off" or not isinstance(payload, dict):
+            return fn(), False
+
+        uid = str(payload.get("firebase_uid") or payload.get("user_id") or "")
+        key = flight_key(uid, endpoint, payload)
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            print(f"🔁 Duplicate {endpoint} request for {uid}, waiting for the in-flight call")
+            if not flight.event.wait(self.wait_seconds):
+                self._count("timeouts")
+                print(f"⏰ In-flight {endpoint} call for {uid} still running, handling this request directly")
+                return fn(), False
+            if flight.error is not None:
+                raise flight.error
+            self._count("shared")
+            return flight.result, True
+
+        try:
+            if self.mode == "database":
+                flight.result, shared = self._do_database(key, fn)
+            else:
+                flight.result, shared = fn(), False
+            self._count("shared" if shared else "leaders")
+            return flight.result, shared
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    # ---------- cross-worker coordination ----------
+
+    def _try_acquire(self, key, owner):
+        now = datetime.utcnow()
+        SingleFlightLock.query.filter(
+            SingleFlightLock.key == key,
+            SingleFlightLock.expires_at < now,
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        try:
+            db.session.add(SingleFlightLock(
+                key=key,
+                owner=owner,
+                status="running",
+                created_at=now,
+                expires_at=now + timedelta(seconds=SINGLE_FLIGHT_LOCK_TTL),
+            ))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    def _do_database(self, key, fn):
+        owner = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+        deadline = time.monotonic() + self.wait_seconds
+
+        while True:
+            if self._try_acquire(key, owner):
+                break
+
+            db.session.expire_all()
+            row = db.session.get(SingleFlightLock, key)
+            if row is not None and row.status == "done" and row.result:
+                body, status_code = json.loads(row.result)
+                print(f"🔁 Reusing result of {row.owner} for flight {key[:12]}")
+                return (body, status_code), True
+            if time.monotonic() > deadline:
+                self._count("timeouts")
+                print(f"⏰ Flight {key[:12]} held by another worker too long, running locally")
+                return fn(), False
+            time.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+
+        try:
+            result = fn()
+        except Exception:
+            db.session.rollback()
+            SingleFlightLock.query.filter_by(key=key, owner=owner).delete(synchronize_session=False)
+            db.session.commit()
+            raise
+
+        row = db.session.get(SingleFlightLock, key)
+        if row is not None and row.owner == owner:
+            row.status = "done"
+            row.result = json.dumps(list(result), default=str)
+            row.expires_at = datetime.utcnow() + timedelta(seconds=SINGLE_FLIGHT_RESULT_GRACE)
+            db.session.commit()
+        return result, False
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._flights)
+        stats["mode"] = self.mode
+        return stats
@@ -0,0 +1,178 @@
+# services/streaks.py - Workout streaks per user
+#
+# One definition everywhere: a streak is a run of consecutive calendar days
+# with at least one WorkoutLog. The current streak is the run ending at the
+# last workout day, as long as that day is today or yesterday (today's workout
+# may still be ahead); the longest streak is the longest run ever.
+#
+# A UserStreak row holds (last_workout_date, run_days, longest_streak).
+# A session hook applies each new WorkoutLog in O(1) inside the transaction
+# that writes it: same day, next day or a later day. Backdated, edited or
+# deleted logs and users without a row fall back to recompute(), which
+# rebuilds the row from the user's log history. The batch job runs that for
+# every user.
+#
+# Run from backend/:  python -m services.streaks [--user UID]
+
+import argparse
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models.db import db
+from models.user_streak import UserStreak
+from models.workoutLog_model import WorkoutLog
+
+_NEW_KEY = "streak_new_logs"
+_RECOMPUTE_KEY = "streak_recompute_users"
+
+
+def runs(dates):
+    """(run ending at the latest date, longest run, latest date) for any iterable of dates"""
+    ordered = sorted(set(day for day in dates if day is not None))
+    if not ordered:
+        return 0, 0, None
+    longest = run = 1
+    for previous, day in zip(ordered, ordered[1:]):
+        run = run + 1 if (day - previous).days == 1 else 1
+        longest = max(longest, run)
+    return run, longest, ordered[-1]
+
+
+def current_from(last_workout_date, run_days, today=None):
+    """Current streak for a run ending at last_workout_date, as seen on `today`"""
+    if last_workout_date is None:
+        return 0
+    today = today or datetime.utcnow().date()
+    return run_days if (today - last_workout_date).days <= 1 else 0
+
+
+def streaks_from_dates(dates, today=None):
+    """{"current_streak", "longest_streak"} for a set of workout dates (same definition as the stored rows)"""
+    run, longest, last = runs(dates)
+    return {"current_streak": current_from(last, run, today), "longest_streak": longest}
+
+
+# ---------- write side ----------
+
+def _locked_row(session, user_id):
+    return session.query(UserStreak).filter_by(user_id=user_id).with_for_update().first()
+
+
+def recompute(user_id, session=None):
+    """Rebuild a user's row from all of their logs (caller commits); returns the row"""
+    session = session or db.session
+    dates = [day for (day,) in session.query(WorkoutLog.date).filter(
+        WorkoutLog.user_id == user_id, WorkoutLog.date.isnot(None)
+    ).distinct().all()]
+    run, longest, last = runs(dates)
+
+    row = _locked_row(session, user_id)
+    if row is None:
+        row = UserStreak(user_id=user_id)
+        session.add(row)
+    row.last_workout_date, row.run_days, row.longest_streak = last, run, longest
+    row.recomputed_at = datetime.utcnow()
+    return row
+
+
+def apply_workout(session, user_id, workout_date):
+    """O(1) update for one new workout day; returns False when the row needs a recompute"""
+    row = _locked_row(session, user_id)
+    if row is None:
+        return False
+    last = row.last_workout_date
+    if last is None or (workout_date - last).days > 1:
+        row.last_workout_date, row.run_days = workout_date, 1
+    elif (workout_date - last).days == 1:
+        row.last_workout_date, row.run_days = workout_date, (row.run_days or 0) + 1
+    elif workout_date < last:
+        # Backdated: it may bridge or extend earlier runs
+        return False
+    row.longest_streak = max(row.longest_streak or 0, row.run_days)
+    return True
+
+
+def _after_flush(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, WorkoutLog) and obj.user_id:
+            session.info.setdefault(_NEW_KEY, []).append((obj.user_id, obj.date))
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, WorkoutLog) and obj.user_id:
+            session.info.setdefault(_RECOMPUTE_KEY, set()).add(obj.user_id)
+
+
+def _before_commit(session):
+    session.flush()
+    new_logs = session.info.pop(_NEW_KEY, [])
+    recompute_users = session.info.pop(_RECOMPUTE_KEY, set())
+    for user_id, workout_date in sorted(new_logs, key=lambda item: (item[0], item[1] or datetime.min.date())):
+        if user_id in recompute_users or workout_date is None:
+            continue
+        if not apply_workout(session, user_id, workout_date):
+            recompute_users.add(user_id)
+    for user_id in recompute_users:
+        recompute(user_id, session)
+
+
+def _after_soft_rollback(session, previous_transaction):
+    if not previous_transaction.nested:
+        session.info.pop(_NEW_KEY, None)
+        session.info.pop(_RECOMPUTE_KEY, None)
+
+
+def register_streak_hooks():
+    """Install the session hooks once per process"""
+    if event.contains(Session, "before_commit", _before_commit):
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_soft_rollback", _after_soft_rollback)
+
+
+# ---------- read side ----------
+
+def get_streak(user_id, today=None):
+    """{"current_streak", "longest_streak", "last_workout_date"} for a user, building the row on first use"""
+    row = db.session.get(UserStreak, user_id)
+    if row is None:
+        row = recompute(user_id)
+        db.session.commit()
+    return {
+        "current_streak": current_from(row.last_workout_date, row.run_days, today),
+        "longest_streak": row.longest_streak,
+        "last_workout_date": row.last_workout_date.isoformat() if row.last_workout_date else None,
+    }
+
+
+def recompute_all(user_id=None):
+    """Batch fallback: rebuild every user's row (or one user's) from their logs; returns the count"""
+    query = db.session.query(WorkoutLog.user_id).filter(WorkoutLog.user_id.isnot(None)).distinct()
+    if user_id:
+        query = query.filter(WorkoutLog.user_id == user_id)
+    count = 0
+    for (uid,) in query.all():
+        recompute(uid)
+        db.session.commit()
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute workout streaks from the full log history")
+    parser.add_argument("--user", help="only this user")
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        db.create_all()
+        count = recompute_all(args.user)
+    print(f"✅ Recomputed streaks for {count} users")
+
+
+if __name__ == "__main__":
+    main()
+else:
+    # Not as a script: app import would install a second copy of the hooks
+    register_streak_hooks()
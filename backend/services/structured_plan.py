@@ -0,0 +1,239 @@
+# services/structured_plan.py - Schema-constrained plan generation
+#
+# In "structured" mode the generator asks the model for JSON that must match
+# plan_schema(days) (Ollama's `format` option / OpenRouter json_schema), builds
+# the plan AST from it and renders program_text deterministically. The same
+# AST gives the exercise structure directly, so the program never goes
+# through a text -> JSON parse stage afterwards.
+#
+# Config:
+#   PLAN_OUTPUT_MODE   "structured" (default) or "markdown" for the free-text prompts only
+
+import os
+import re
+import json
+import threading
+
+from services.plan_ast import Plan, Day, Section, Exercise
+from services.plan_parser import plan_to_weeks
+
+PLAN_OUTPUT_MODE = os.getenv("PLAN_OUTPUT_MODE", "structured").lower()
+
+MIN_EXERCISES_PER_DAY = 3
+MAX_EXERCISES_PER_DAY = 8
+
+# Output budget: a day at MAX_EXERCISES_PER_DAY with warm-up and cool-down is
+# roughly 400 tokens of JSON; the base covers the notes and the object itself.
+# The engine default (512) truncates anything beyond one or two days.
+STRUCTURED_BASE_TOKENS = 300
+STRUCTURED_TOKENS_PER_DAY = 450
+
+DEFAULT_WARMUP = ["Jumping jacks: 30 seconds", "Arm circles: 30 seconds", "Leg swings: 10 each leg"]
+DEFAULT_COOLDOWN = ["Full body stretch: 30 seconds per muscle group", "Deep breathing: 1 minute"]
+
+_BODYWEIGHT_FORBIDDEN = re.compile(r"\b(?:dumbbells?|barbells?|machines?|kettlebells?|weighted)\b", re.IGNORECASE)
+
+
+_stats_lock = threading.Lock()
+_stats = {"attempts": 0, "fallbacks": 0}
+
+
+def structured_max_tokens(days):
+    return STRUCTURED_BASE_TOKENS + STRUCTURED_TOKENS_PER_DAY * max(int(days or 1), 1)
+
+
+def _record(fallback, reason=None):
+    with _stats_lock:
+        _stats["attempts"] += 1
+        if fallback:
+            _stats["fallbacks"] += 1
+        attempts, fallbacks = _stats["attempts"], _stats["fallbacks"]
+    if fallback:
+        print(f"⚠️ Structured output fell back to free text ({reason}); "
+              f"fallback rate {fallbacks}/{attempts} ({fallbacks / attempts:.0%})")
+
+
+def stats():
+    with _stats_lock:
+        result = dict(_stats)
+    result["fallback_rate"] = round(result["fallbacks"] / result["attempts"], 3) if result["attempts"] else 0.0
+    return result
+
+
+def plan_schema(days):
+    """JSON schema for a `days`-day plan"""
+    exercise = {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "sets": {"type": "integer", "minimum": 1, "maximum": 10},
+            "reps": {"type": "integer", "minimum": 1, "maximum": 100},
+            "duration_seconds": {"type": "integer", "minimum": 5, "maximum": 3600},
+            "rest_seconds": {"type": "integer", "minimum": 0, "maximum": 600},
+        },
+        "required": ["name", "sets", "rest_seconds"],
+    }
+    day = {
+        "type": "object",
+        "properties": {
+            "label": {"type": "string"},
+            "warmup": {"type": "array", "items": {"type": "string"}},
+            "exercises": {
+                "type": "array",
+                "items": exercise,
+                "minItems": MIN_EXERCISES_PER_DAY,
+                "maxItems": MAX_EXERCISES_PER_DAY,
+            },
+            "cooldown": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["label", "warmup", "exercises", "cooldown"],
+    }
+    return {
+        "type": "object",
+        "properties": {
+            "days": {"type": "array", "items": day, "minItems": days, "maxItems": days},
+            "notes": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["days"],
+    }
+
+
+def structured_prompt(days, style, goal, equipment_raw, experience, rag_context=None):
+    knowledge = f"\nFITNESS KNOWLEDGE BASE:\n{rag_context}\n" if rag_context else ""
+    return f"""Create a {days}-day {style} workout plan for {goal}.
+{knowledge}
+USER SPECS:
+- Experience: {experience}
+- Equipment: {equipment_raw} (use only exercises possible with this equipment)
+- Days: exactly {days}
+
+Return JSON only, matching the schema:
+- "days": {days} objects with "label" (the day's focus, e.g. "Upper Body"), "warmup" and "cooldown" (short lines like "Arm circles: 30 seconds") and 5-6 "exercises"
+- each exercise: "name", "sets", "reps" (or "duration_seconds" for timed holds), "rest_seconds"
+- "notes": 3-4 short coaching notes"""
+
+
+def _int(value, low, high):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if low <= value <= high else None
+
+
+def _clean_text(value, bodyweight):
+    text = re.sub(r"\s+", " ", str(value or "")).replace("**", "").strip(" -:")
+    if bodyweight:
+        text = _BODYWEIGHT_FORBIDDEN.sub("bodyweight", text)
+    return text
+
+
+def normalize_structured_plan(data, days, bodyweight=False):
+    """Validated, cleaned copy of the model's JSON, or None when it is not a usable plan"""
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            return None
+    if not isinstance(data, dict) or not isinstance(data.get("days"), list) or len(data["days"]) < days:
+        return None
+
+    clean_days = []
+    for index, day in enumerate(data["days"][:days], start=1):
+        if not isinstance(day, dict):
+            return None
+        exercises = []
+        for exercise in day.get("exercises") or []:
+            if not isinstance(exercise, dict):
+                continue
+            # The name is rendered before a ":" separator, so it cannot contain one
+            name = _clean_text(str(exercise.get("name") or "").replace(":", " "), bodyweight)
+            if len(name) < 2:
+                continue
+            reps = _int(exercise.get("reps"), 1, 100)
+            duration = _int(exercise.get("duration_seconds"), 5, 3600)
+            exercises.append({
+                "name": name,
+                "sets": _int(exercise.get("sets"), 1, 10) or 3,
+                "reps": reps if reps is not None or duration is not None else 10,
+                "duration_seconds": duration if reps is None else None,
+                "rest_seconds": _int(exercise.get("rest_seconds"), 0, 600) or 60,
+            })
+        if len(exercises) < MIN_EXERCISES_PER_DAY:
+            return None
+
+        def lines(key, default):
+            kept = [_clean_text(line, bodyweight) for line in day.get(key) or [] if isinstance(line, str)]
+            return [line for line in kept if line] or list(default)
+
+        clean_days.append({
+            "label": _clean_text(day.get("label"), bodyweight) or f"Day {index}",
+            "warmup": lines("warmup", DEFAULT_WARMUP),
+            "exercises": exercises[:MAX_EXERCISES_PER_DAY],
+            "cooldown": lines("cooldown", DEFAULT_COOLDOWN),
+        })
+
+    notes = [_clean_text(note, bodyweight) for note in data.get("notes") or [] if isinstance(note, str)]
+    return {"days": clean_days, "notes": [note for note in notes if note]}
+
+
+def _prescription(exercise):
+    volume = (f"{exercise['reps']} reps" if exercise["reps"] is not None
+              else f"{exercise['duration_seconds']} seconds")
+    return f"{exercise['sets']} sets x {volume}, Rest: {exercise['rest_seconds']} sec"
+
+
+def build_plan(data, style, goal, equipment_raw):
+    """Plan AST in the generation format for a normalized structured plan"""
+    day_count = len(data["days"])
+    plan = Plan(
+        title=f"## {day_count}-Day {style} Workout Plan for {goal}",
+        intro=[f"This {day_count}-day workout plan is designed for {goal} using {equipment_raw}. "
+               f"Each workout takes 30-45 minutes."],
+        trailer=["## Training Notes:"] + [f"- {note}" for note in data["notes"]] + [
+            f"- **Frequency:** Perform {day_count} days per week with rest days in between"
+        ],
+    )
+    for number, day in enumerate(data["days"], start=1):
+        plan.days.append(Day(number, day["label"], [
+            Section("**Warm-up (5-10 min):**", "Warm-up (5-10 min)", "warmup",
+                    [Exercise.from_text(line) for line in day["warmup"]]),
+            Section("**Main Workout (30-35 min):**", "Main Workout (30-35 min)", "main", [
+                Exercise(
+                    name=exercise["name"],
+                    detail=_prescription(exercise),
+                    sets=exercise["sets"],
+                    reps=exercise["reps"],
+                    duration_seconds=exercise["duration_seconds"],
+                    rest_seconds=exercise["rest_seconds"],
+                )
+                for exercise in day["exercises"]
+            ]),
+            Section("**Cool-down (5 min):**", "Cool-down (5 min)", "cooldown",
+                    [Exercise.from_text(line) for line in day["cooldown"]]),
+        ]))
+    return plan
+
+
+def generate_structured_plan(days, style, goal, equipment_raw, experience, llm, rag_context=None):
+    """
+    One schema-constrained LLM call. Returns (program_text, plan_structure) where
+    plan_structure is {"plan": Plan.to_dict(), "weeks": [...]}, or (None, None)
+    when the model output does not validate.
+    """
+    prompt = structured_prompt(days, style, goal, equipment_raw, experience, rag_context)
+    try:
+        raw = llm.invoke(prompt, format=plan_schema(days), max_tokens=structured_max_tokens(days))
+    except Exception as e:
+        print(f"❌ Structured generation failed: {e}")
+        _record(True, "LLM error")
+        return None, None
+
+    data = normalize_structured_plan(raw, days, bodyweight=equipment_raw == "Bodyweight Only")
+    if data is None:
+        _record(True, "output did not match the plan schema")
+        return None, None
+
+    _record(False)
+    plan = build_plan(data, style, goal, equipment_raw)
+    return plan.render(), {"plan": plan.to_dict(), "weeks": plan_to_weeks(plan)}
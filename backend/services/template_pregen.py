@@ -0,0 +1,222 @@
+# services/template_pregen.py - Pre-generated plans for common profiles
+#
+# Offline batch job: count normalized UserProfile combinations, generate and
+# validate a plan for the most frequent ones and store it as a WorkoutTemplate
+# with its plan in a PlanTemplate row and its exercises already parsed into
+# WorkoutTemplateExercise rows. The pre-generation columns live in their own
+# table so existing workout_template tables keep working (create_all does not
+# add columns).
+# generate_workout serves a matching template instantly and copies those rows
+# into WorkoutExercise, so the new program never needs LLM generation or parsing.
+#
+# Run from backend/:  python -m services.template_pregen [--limit 20] [--min-users 3] [--refresh]
+#
+# Config:
+#   PLAN_TEMPLATES_ENABLED    serve templates from generate_workout (default "true")
+#   TEMPLATE_MIN_USERS        minimum users sharing a profile before it gets a template
+#   TEMPLATE_LIMIT            number of most frequent profiles to pre-generate
+#   TEMPLATE_MAX_AGE_DAYS     templates older than this are regenerated by the job
+
+import os
+import re
+import hashlib
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+
+from models.db import db
+from models.user_profile import UserProfile
+from models.workoutLog_model import WorkoutTemplate, WorkoutTemplateExercise
+from models.plan_template import PlanTemplate
+from services.profile_normalizer import normalize_profile
+from services.plan_cache import KEY_FIELDS, profile_key
+from services.parse_cache import parse_workout_text_cached
+from services.exercise_store import exercise_row, insert_exercises
+
+PLAN_TEMPLATES_ENABLED = os.getenv("PLAN_TEMPLATES_ENABLED", "true").lower() == "true"
+TEMPLATE_MIN_USERS = int(os.getenv("TEMPLATE_MIN_USERS", "3"))
+TEMPLATE_LIMIT = int(os.getenv("TEMPLATE_LIMIT", "20"))
+TEMPLATE_MAX_AGE_DAYS = int(os.getenv("TEMPLATE_MAX_AGE_DAYS", "30"))
+
+MIN_EXERCISES_PER_DAY = 3
+
+_DAY_HEADER = re.compile(r"### Day \d+:")
+
+
+def template_key(profile):
+    """Stable 64-char key for a normalized profile (same fields as the plan cache)"""
+    return hashlib.sha256("|".join(profile_key(profile)).encode("utf-8")).hexdigest()
+
+
+def _days(profile):
+    match = re.match(r"(\d+)", str(profile.get("days_per_week", "")))
+    return int(match.group(1)) if match else 3
+
+
+def frequent_profile_combinations(limit=TEMPLATE_LIMIT, min_users=TEMPLATE_MIN_USERS):
+    """[(normalized_profile, user_count)] for the most common profile combinations"""
+    rows = UserProfile.query.with_entities(
+        UserProfile.goal, UserProfile.experience, UserProfile.days_per_week,
+        UserProfile.equipment, UserProfile.style,
+    ).all()
+
+    counts = Counter()
+    examples = {}
+    for row in rows:
+        profile, _ = normalize_profile(dict(zip(KEY_FIELDS, row)))
+        key = profile_key(profile)
+        counts[key] += 1
+        examples.setdefault(key, {field: profile[field] for field in KEY_FIELDS})
+
+    return [(examples[key], count) for key, count in counts.most_common(limit) if count >= min_users]
+
+
+def validate_plan(plan_text, days):
+    """Parse a generated plan and check it is complete; returns (parsed_days, reason or None)"""
+    if not plan_text:
+        return None, "empty plan"
+
+    headers = len(_DAY_HEADER.findall(plan_text))
+    if headers != days:
+        return None, f"expected {days} day headers, found {headers}"
+
+    parsed = parse_workout_text_cached(plan_text, 0).get("Week 1", {})
+    if len(parsed) != days:
+        return None, f"parsed {len(parsed)} of {days} days"
+
+    for day_key, day_data in parsed.items():
+        if len(day_data.get("exercises", [])) < MIN_EXERCISES_PER_DAY:
+            return None, f"{day_key} has fewer than {MIN_EXERCISES_PER_DAY} exercises"
+    return parsed, None
+
+
+def save_template(profile, plan_text, parsed_days, profile_count):
+    """Insert or replace the template for this profile together with its exercise rows"""
+    key = template_key(profile)
+    plan = PlanTemplate.query.filter_by(profile_key=key).first()
+    if plan is None:
+        template = WorkoutTemplate(created_by="system", weeks_duration=1)
+        db.session.add(template)
+    else:
+        template = db.session.get(WorkoutTemplate, plan.template_id)
+        WorkoutTemplateExercise.query.filter_by(template_id=template.id).delete(synchronize_session=False)
+
+    template.name = f"{profile['days_per_week']} {profile['style']} for {profile['goal']}"
+    template.description = f"Pre-generated for {profile['experience']} with {profile['equipment']}"
+    template.target_goal = profile["goal"]
+    template.experience_level = profile["experience"]
+    template.days_per_week = _days(profile)
+    db.session.flush()
+
+    if plan is None:
+        plan = PlanTemplate(template_id=template.id, profile_key=key)
+        db.session.add(plan)
+    plan.equipment = profile["equipment"]
+    plan.style = profile["style"]
+    plan.plan_text = plan_text
+    plan.profile_count = profile_count
+    plan.updated_at = datetime.utcnow()
+
+    rows = []
+    for day_key, day_data in parsed_days.items():
+        day_num = int(day_key.replace("Day ", ""))
+        for position, exercise in enumerate(day_data.get("exercises", [])):
+            rows.append(WorkoutTemplateExercise(
+                template_id=template.id,
+                day=day_num,
+                day_label=day_data.get("label", day_key),
+                position=position,
+                name=exercise.get("name", "Unknown Exercise"),
+                sets=exercise.get("sets", 3),
+                reps=exercise.get("reps", 10),
+                rest_seconds=exercise.get("rest_seconds", 60),
+                notes=exercise.get("notes") or None,
+            ))
+    db.session.add_all(rows)
+    db.session.commit()
+    return plan
+
+
+def pregenerate_templates(coach=None, limit=TEMPLATE_LIMIT, min_users=TEMPLATE_MIN_USERS, refresh=False):
+    """Generate templates for the most frequent profiles; returns one summary dict per profile"""
+    if coach is None:
+        from services.coach import AIFitnessCoach
+        # Bypass the in-process plan cache: every template gets its own generation
+        coach = AIFitnessCoach(plan_cache=False)
+
+    stale_before = datetime.utcnow() - timedelta(days=TEMPLATE_MAX_AGE_DAYS)
+    summary = []
+
+    for profile, count in frequent_profile_combinations(limit, min_users):
+        key = template_key(profile)
+        existing = PlanTemplate.query.filter_by(profile_key=key).first()
+        if existing and not refresh and existing.updated_at and existing.updated_at >= stale_before:
+            summary.append({"profile": profile, "users": count, "status": "fresh", "template_id": existing.template_id})
+            continue
+
+        print(f"🏗️ Pre-generating template for {profile} ({count} users)")
+        try:
+            plan_text = coach.run_initial(dict(profile)).get("fitness_plan", "")
+            parsed_days, reason = validate_plan(plan_text, _days(profile))
+            if reason:
+                print(f"⚠️ Rejected generated plan: {reason}")
+                summary.append({"profile": profile, "users": count, "status": "rejected", "reason": reason})
+                continue
+
+            template = save_template(profile, plan_text, parsed_days, count)
+            print(f"✅ Saved template {template.template_id}")
+            summary.append({"profile": profile, "users": count, "status": "saved", "template_id": template.template_id})
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Template generation failed for {profile}: {e}")
+            summary.append({"profile": profile, "users": count, "status": "error", "reason": str(e)})
+
+    return summary
+
+
+def find_template(user_data):
+    """Ready-to-serve PlanTemplate for a raw or normalized profile, or None"""
+    if not PLAN_TEMPLATES_ENABLED:
+        return None
+    profile, _ = normalize_profile(user_data)
+    return PlanTemplate.query.filter_by(profile_key=template_key(profile)).first()
+
+
+def materialize_template(template, program_id):
+    """Copy a PlanTemplate's pre-parsed exercises into WorkoutExercise rows (week 1) for a new program"""
+    now = datetime.utcnow()
+    rows = [
+        exercise_row(program_id, 1, exercise.day, exercise.day_label, {
+            "name": exercise.name,
+            "sets": exercise.sets,
+            "reps": exercise.reps,
+            "rest_seconds": exercise.rest_seconds,
+            "notes": exercise.notes,
+        }, now)
+        for exercise in WorkoutTemplateExercise.query.filter_by(template_id=template.template_id).order_by(
+            WorkoutTemplateExercise.day, WorkoutTemplateExercise.position
+        ).all()
+    ]
+    insert_exercises(rows)
+    template.times_served = (template.times_served or 0) + 1
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate workout templates for common profiles")
+    parser.add_argument("--limit", type=int, default=TEMPLATE_LIMIT)
+    parser.add_argument("--min-users", type=int, default=TEMPLATE_MIN_USERS)
+    parser.add_argument("--refresh", action="store_true", help="regenerate templates that are still fresh")
+    args = parser.parse_args()
+
+    from app import app
+    with app.app_context():
+        db.create_all()
+        summary = pregenerate_templates(limit=args.limit, min_users=args.min_users, refresh=args.refresh)
+
+    for item in summary:
+        print(f"{item['status']:<9} {item['users']:>4} users  {item['profile']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# services/tracing.py - Lightweight nested timing spans for the coach pipeline
+#
+# A trace is started by the outermost span (usually a handler or a coach entry
+# point). Nested spans attach to it through context variables, so every span
+# on the same thread / copied context shares one trace id. Finished traces go
+# to an in-memory ring buffer (GET /generate/debug/traces) and, optionally, a
+# JSON-lines file.
+#
+# Config:
+#   TRACE_SAMPLE_RATE  fraction of root spans that are recorded (0 disables, default 0)
+#   TRACE_EXPORT       "memory" (default), "jsonl" or "both"
+#   TRACE_FILE         JSON-lines path for the jsonl exporter
+#   TRACE_BUFFER_SIZE  number of traces kept in memory
+
+import os
+import json
+import time
+import uuid
+import random
+import threading
+import functools
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_EXPORT = os.getenv("TRACE_EXPORT", "memory").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "200"))
+
+# Sentinel for "inside a root span that was not sampled": children stay no-ops
+_NOT_SAMPLED = object()
+
+_current_trace = contextvars.ContextVar("zenfit_trace", default=None)
+_current_span = contextvars.ContextVar("zenfit_span", default=None)
+
+_buffer = deque(maxlen=TRACE_BUFFER_SIZE)
+_buffer_lock = threading.Lock()
+_file_lock = threading.Lock()
+
+
+class _Trace:
+    __slots__ = ("trace_id", "spans", "lock")
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self.lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "attrs", "start", "duration_ms", "error")
+
+    def __init__(self, name, parent_id, attrs):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.start = time.time()
+        self.duration_ms = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+
+class _NullSpan:
+    """Returned by span() when tracing is off so callers can always call .set()"""
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+def current_trace_id():
+    trace = _current_trace.get()
+    return trace.trace_id if isinstance(trace, _Trace) else None
+
+
+def _export(trace, root):
+    record = {
+        "trace_id": trace.trace_id,
+        "name": root.name,
+        "start": root.start,
+        "duration_ms": root.duration_ms,
+        "error": root.error,
+        "spans": [s.to_dict() for s in sorted(trace.spans, key=lambda s: s.start)],
+    }
+
+    if TRACE_EXPORT in ("memory", "both"):
+        with _buffer_lock:
+            _buffer.append(record)
+
+    if TRACE_EXPORT in ("jsonl", "both"):
+        try:
+            with _file_lock, open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write trace {trace.trace_id}: {e}")
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    Time a block as a span. The outermost span decides sampling and owns the trace;
+    everything nested (including other threads that copied the context) joins it.
+    """
+    trace = _current_trace.get()
+    if trace is _NOT_SAMPLED:
+        yield NULL_SPAN
+        return
+
+    root = trace is None
+    if root:
+        if TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE:
+            token = _current_trace.set(_NOT_SAMPLED)
+            try:
+                yield NULL_SPAN
+            finally:
+                _current_trace.reset(token)
+            return
+        trace = _Trace()
+
+    parent = _current_span.get()
+    current = Span(name, parent.span_id if parent else None, attrs)
+    trace_token = _current_trace.set(trace) if root else None
+    span_token = _current_span.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        _current_span.reset(span_token)
+        with trace.lock:
+            trace.spans.append(current)
+        if root:
+            _current_trace.reset(trace_token)
+            _export(trace, current)
+
+
+def traced(name=None):
+    """Decorator form of span(); defaults to module.function as the span name"""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_recent_traces(limit=20):
+    """Most recent traces from the ring buffer, newest first"""
+    with _buffer_lock:
+        traces = list(_buffer)
+    return traces[::-1][:limit]
+
+
+def get_trace(trace_id):
+    with _buffer_lock:
+        for record in _buffer:
+            if record["trace_id"] == trace_id:
+                return record
+    return None
+
+
+def summarize_trace(record):
+    """Total milliseconds per span name, slowest first"""
+    totals = {}
+    for s in record["spans"]:
+        totals[s["name"]] = totals.get(s["name"], 0.0) + (s["duration_ms"] or 0.0)
+    return dict(sorted(((k, round(v, 2)) for k, v in totals.items()), key=lambda kv: -kv[1]))
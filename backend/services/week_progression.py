@@ -0,0 +1,251 @@
+# services/week_progression.py - Event-driven week auto-generation
+#
+# New weeks are cloned from the week before with progressive overload once that
+# week is fully completed. This used to run on every GET /workout/current by
+# scanning all weeks and loading every exercise of each. Now only completion
+# writes call on_completion_write(program_id, week): one COUNT over the touched
+# week, compared against the program's ProgramWeekMarker.highest_completed_week,
+# so the cost no longer grows with program length and reads have no side effects.
+#
+# Completion reads (progress, current week, "Week N Completed" achievements)
+# share week_stats(): one grouped (week, total, completed) aggregate per program.
+
+from datetime import datetime
+
+from sqlalchemy import case, func
+
+from models.db import db
+from models.workoutLog_model import WorkoutExercise
+from models.program_week_marker import ProgramWeekMarker
+from services.exercise_store import exercise_row, insert_exercises
+
+
+def get_week_structure(program_id, week_number):
+    """Get the structure of a specific week for cloning"""
+    try:
+        week_exercises = WorkoutExercise.query.filter_by(
+            program_id=program_id, 
+            week=week_number
+        ).order_by(WorkoutExercise.day, WorkoutExercise.id).all()
+        
+        if not week_exercises:
+            return None
+        
+        # Group by day
+        from collections import defaultdict
+        week_structure = defaultdict(list)
+        
+        for exercise in week_exercises:
+            week_structure[exercise.day].append({
+                "name": exercise.name,
+                "sets": exercise.sets,
+                "reps": exercise.reps,
+                "rest_seconds": exercise.rest_seconds,
+                "day_label": exercise.day_label
+            })
+        
+        return dict(week_structure)
+        
+    except Exception as e:
+        print(f"❌ Error getting week structure: {e}")
+        return None
+
+def apply_progression_logic(exercise_data, week_number):
+    """Apply progression logic to exercises for the new week"""
+    try:
+        # Clone the exercise data
+        new_exercise = exercise_data.copy()
+        
+        # Progressive overload logic
+        progression_factor = (week_number - 1) * 0.1  # 10% increase per week
+        
+        # Increase reps slightly (1-2 reps per week)
+        if isinstance(new_exercise["reps"], (int, str)):
+            try:
+                current_reps = int(new_exercise["reps"])
+                # Add 1-2 reps every 2 weeks
+                additional_reps = max(1, (week_number - 1) // 2)
+                new_exercise["reps"] = current_reps + additional_reps
+            except ValueError:
+                pass  # Keep original reps if not numeric
+        
+        # Optionally increase sets after week 3
+        if week_number > 3 and isinstance(new_exercise["sets"], (int, str)):
+            try:
+                current_sets = int(new_exercise["sets"])
+                if current_sets < 5:  # Cap at 5 sets
+                    new_exercise["sets"] = current_sets + ((week_number - 1) // 3)
+            except ValueError:
+                pass
+        
+        # Reduce rest time slightly for conditioning
+        if new_exercise["rest_seconds"] > 30:
+            rest_reduction = min(10, (week_number - 1) * 5)  # Reduce by 5s per week, max 10s
+            new_exercise["rest_seconds"] = max(30, new_exercise["rest_seconds"] - rest_reduction)
+        
+        return new_exercise
+        
+    except Exception as e:
+        print(f"❌ Error applying progression: {e}")
+        return exercise_data
+
+def add_next_week(program_id, new_week_number, base_week_number=None):
+    """
+    Add week `new_week_number` (progressed from the base week) to the session
+    without committing. Returns the number of exercises added; 0 when the week
+    already exists or the base week is empty.
+    """
+    print(f"🏗️ Generating Week {new_week_number} for program {program_id}")
+
+    # Determine base week (default to week 1 or previous week)
+    if base_week_number is None:
+        base_week_number = max(1, new_week_number - 1)
+
+    # Check if the new week already exists
+    existing_week = db.session.query(WorkoutExercise.id).filter_by(
+        program_id=program_id,
+        week=new_week_number
+    ).first()
+
+    if existing_week:
+        print(f"⚠️ Week {new_week_number} already exists, skipping generation")
+        return 0
+
+    # Get the structure from the base week
+    base_week_structure = get_week_structure(program_id, base_week_number)
+
+    if not base_week_structure:
+        print(f"❌ Could not get base week {base_week_number} structure")
+        return 0
+
+    print(f"📋 Base week {base_week_number} has {len(base_week_structure)} days")
+
+    # Generate new week with progression, written with one multi-row insert
+    now = datetime.utcnow()
+    rows = []
+    for day_number, day_exercises in base_week_structure.items():
+        for exercise_data in day_exercises:
+            progressed_exercise = apply_progression_logic(exercise_data, new_week_number)
+            rows.append(exercise_row(program_id, new_week_number, day_number,
+                                     progressed_exercise["day_label"], progressed_exercise, now))
+
+    return len(insert_exercises(rows))
+
+def generate_next_week(program_id, new_week_number, base_week_number=None):
+    """Generate the next week based on a previous week structure and commit it"""
+    try:
+        added = add_next_week(program_id, new_week_number, base_week_number)
+        if not added:
+            return False
+        db.session.commit()
+        print(f"✅ Generated Week {new_week_number} with {added} exercises")
+        return True
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error generating Week {new_week_number}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def week_stats(program_id):
+    """[(week, total, completed)] for every week of a program, ordered, from one grouped query"""
+    rows = db.session.query(
+        WorkoutExercise.week,
+        func.count(WorkoutExercise.id),
+        func.coalesce(func.sum(case((WorkoutExercise.completed == True, 1), else_=0)), 0),  # noqa: E712
+    ).filter(
+        WorkoutExercise.program_id == program_id,
+    ).group_by(WorkoutExercise.week).order_by(WorkoutExercise.week).all()
+    return [(week, int(total), int(completed)) for week, total, completed in rows]
+
+
+def program_totals(program_id, stats=None):
+    """(total, completed) exercise counts of a program"""
+    stats = week_stats(program_id) if stats is None else stats
+    return sum(total for _, total, _ in stats), sum(completed for _, _, completed in stats)
+
+
+def completed_weeks(program_id, stats=None):
+    """Weeks in which every exercise is completed"""
+    stats = week_stats(program_id) if stats is None else stats
+    return [week for week, total, completed in stats if total and completed == total]
+
+
+def current_week_number(program_id, stats=None):
+    """First week that is not fully completed; the week after the last one when all are"""
+    stats = week_stats(program_id) if stats is None else stats
+    if not stats:
+        return 1
+    for week, total, completed in stats:
+        if completed < total:
+            return week
+    return stats[-1][0] + 1
+
+
+def completed_day_pairs(program_id):
+    """Distinct (week, day) pairs with at least one completed exercise"""
+    return set(db.session.query(WorkoutExercise.week, WorkoutExercise.day).filter(
+        WorkoutExercise.program_id == program_id,
+        WorkoutExercise.completed == True,  # noqa: E712
+    ).distinct().all())
+
+
+def is_week_completed(program_id, week):
+    """True when the week has exercises and all of them are completed"""
+    total, completed = week_completion(program_id, week)
+    return total > 0 and completed == total
+
+
+def week_completion(program_id, week):
+    """(total, completed) exercise counts of one week in a single aggregate query"""
+    total, completed = db.session.query(
+        func.count(WorkoutExercise.id),
+        func.coalesce(func.sum(case((WorkoutExercise.completed == True, 1), else_=0)), 0),  # noqa: E712
+    ).filter(
+        WorkoutExercise.program_id == program_id,
+        WorkoutExercise.week == week,
+    ).one()
+    return int(total or 0), int(completed or 0)
+
+
+def _locked_marker(program_id):
+    marker = db.session.query(ProgramWeekMarker).filter_by(program_id=program_id).with_for_update().first()
+    if marker is None:
+        marker = ProgramWeekMarker(program_id=program_id, highest_completed_week=0)
+        db.session.add(marker)
+    return marker
+
+
+def on_completion_write(program_id, week):
+    """
+    Call after exercise completion flags of `week` were committed. When the week
+    just became fully completed, records it in the marker and adds the next
+    week in the same transaction. Returns the generated week number or None.
+    """
+    try:
+        marker = _locked_marker(program_id)
+        if week <= (marker.highest_completed_week or 0):
+            # This week (or a later one) already triggered generation
+            db.session.commit()
+            return None
+
+        total, completed = week_completion(program_id, week)
+        if not total or completed < total:
+            db.session.commit()
+            return None
+
+        print(f"🚀 Week {week} completed, generating Week {week + 1}")
+        added = add_next_week(program_id, week + 1, week)
+        marker.highest_completed_week = week
+        db.session.commit()
+        if added:
+            print(f"✅ Week {week + 1} auto-generated with {added} exercises")
+            return week + 1
+        return None
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error in week auto-generation for program {program_id}: {e}")
+        return None
@@ -0,0 +1,14 @@
+# tests/conftest.py - Run the backend against an in-memory SQLite database
+#
+# Run from backend/:  python -m pytest tests
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ.setdefault("PARSE_ON_COMMIT", "false")
+
+# The app loads faiss_index/ and data/ relative to backend/
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,33 @@
+# tests/test_plan_parser.py - Day header formats the rule parser must accept
+
+import pytest
+
+from benchmarks.bench_parser import BARE_HEADER_PLAN, NUMBERED_PLAN
+from benchmarks.stubs import STUB_PLAN
+from services.plan_parser import parse_program
+
+
+def _days(result):
+    return result.weeks[0]["days"] if result.weeks else []
+
+
+def test_bare_day_headers_are_parsed_by_rules():
+    result = parse_program(BARE_HEADER_PLAN)
+    assert result.source == "rules"
+    assert [(day["label"], len(day["exercises"])) for day in _days(result)] == [
+        ("Upper Body", 2), ("Lower Body", 2)
+    ]
+
+
+@pytest.mark.parametrize("header", ["Day 1: Upper Body", "### Day 1: Upper Body", "**Day 1: Upper Body**",
+                                    "day 1 - Upper Body"])
+def test_day_header_prefixes(header):
+    result = parse_program(f"{header}\n- Push-ups: 3 sets x 10 reps\n- Squats: 3 sets x 15 reps\n"
+                           f"- Lunges: 3 sets x 10 reps\n")
+    assert result.source == "rules"
+    assert [day["label"] for day in _days(result)] == ["Upper Body"]
+
+
+@pytest.mark.parametrize("plan, days", [(STUB_PLAN, 3), (NUMBERED_PLAN, 2)])
+def test_markdown_plans_keep_their_days(plan, days):
+    assert len(_days(parse_program(plan))) == days
@@ -0,0 +1,79 @@
+# tests/test_workout_reads.py - Statement budgets of the workout screen
+#
+# The same seeding and counting as benchmarks/bench_workout_reads.py, as
+# assertions: the budgets must hold for any program size.
+
+import json
+
+import pytest
+from sqlalchemy import update
+
+from app import app
+from models.db import db
+from models.program_version import ProgramVersion
+from models.workoutLog_model import WorkoutExercise
+from services.plan_view import load_plan_data, invalidate
+from benchmarks.bench_workout_reads import PLAN_DATA_QUERY_BUDGET, USER_ID, QueryCounter, _seed
+
+COLD_GET_QUERY_BUDGET = 4
+# The latest program id and its committed version, checked against the cached view
+CACHED_GET_QUERY_BUDGET = 1
+
+
+@pytest.fixture
+def app_context():
+    with app.app_context():
+        db.create_all()
+        invalidate()
+        yield
+        db.session.remove()
+        db.drop_all()
+        invalidate()
+
+
+@pytest.mark.parametrize("weeks", [1, 8, 24])
+def test_load_plan_data_is_one_query(app_context, weeks):
+    program_id = _seed(weeks, 4, 6)
+    with QueryCounter(db.engine) as counter:
+        plan_data, total, _completed = load_plan_data(program_id)
+    assert counter.count <= PLAN_DATA_QUERY_BUDGET
+    assert len(plan_data) == weeks and total == weeks * 4 * 6
+
+
+@pytest.mark.parametrize("weeks", [1, 8, 24])
+def test_workout_current_query_budget(app_context, weeks):
+    _seed(weeks, 4, 6)
+    invalidate()
+    client = app.test_client()
+
+    with QueryCounter(db.engine) as counter:
+        response = client.get(f"/workout/current/{USER_ID}")
+    assert response.status_code == 200
+    assert counter.count <= COLD_GET_QUERY_BUDGET
+
+    with QueryCounter(db.engine) as counter:
+        cached = client.get(f"/workout/current/{USER_ID}")
+    assert cached.status_code == 200
+    assert cached.get_data() == response.get_data()
+    assert counter.count <= CACHED_GET_QUERY_BUDGET
+
+
+def test_workout_current_sees_writes_from_other_workers(app_context):
+    program_id = _seed(1, 4, 6)
+    client = app.test_client()
+    before = json.loads(client.get(f"/workout/current/{USER_ID}").get_data())
+    assert before["completed_exercises"] == 0
+
+    # A write this process's hooks never saw: another worker's commit
+    with db.engine.begin() as connection:
+        connection.execute(
+            update(WorkoutExercise).where(WorkoutExercise.program_id == program_id).values(completed=True)
+        )
+        connection.execute(
+            update(ProgramVersion).where(ProgramVersion.program_id == program_id)
+            .values(version=ProgramVersion.version + 1)
+        )
+
+    after = json.loads(client.get(f"/workout/current/{USER_ID}").get_data())
+    assert after["plan_version"] == before["plan_version"] + 1
+    assert after["completed_exercises"] == 24
@@ -45,6 +45,9 @@ const WorkoutLogsScreen = ({ navigation, user }) => {
 
   // Simple scroll ref without complex tracking
   const scrollViewRef = useRef(null);
+  // ETags of the last plan/progress responses; the backend answers 304 while they are current
+  const planEtagRef = useRef(null);
+  const progressEtagRef = useRef(null);
 
   const fadeAnim = useRef(new Animated.Value(0)).current;
   const scaleAnim = useRef(new Animated.Value(0.9)).current;
@@ -165,10 +168,17 @@ const WorkoutLogsScreen = ({ navigation, user }) => {
       setError(null);
       
       console.log(`🔄 Fetching current plan for user: ${user.uid}`);
-      const response = await fetch(`${BACKEND_URL}/workout/current/${user.uid}?v=${Date.now()}`);
+      const headers = !force && planEtagRef.current ? { 'If-None-Match': planEtagRef.current } : {};
+      const response = await fetch(`${BACKEND_URL}/workout/current/${user.uid}`, { headers });
       
       console.log(`📡 Response status: ${response.status}`);
       
+      if (response.status === 304) {
+        console.log("✅ Plan unchanged");
+        setError(null);
+        return;
+      }
+      
       if (!response.ok) {
         const errorText = await response.text();
         console.log(`❌ Error response: ${errorText}`);
@@ -176,11 +186,15 @@ const WorkoutLogsScreen = ({ navigation, user }) => {
       }
       
       const data = await response.json();
+      planEtagRef.current = response.headers.get('ETag');
       console.log("✅ Received plan data:", JSON.stringify(data, null, 2));
       
-      // Check if this is a new plan version
-      const newPlanVersion = data.plan_version || data.updated_at || Date.now();
+      // plan_version is bumped by every exercise or log write of the program
+      const newPlanVersion = `${data.program_id}:${data.plan_version}`;
       const isNewPlan = !planVersion || newPlanVersion !== planVersion;
+      // Only new weeks (or a new program) are worth an alert; completions are the user's own changes
+      const addedWeeks = !currentPlan || currentPlan.program_id !== data.program_id ||
+        Object.keys(data.plan || {}).length > Object.keys(currentPlan.plan || {}).length;
       
       if (isNewPlan || force) {
         console.log("🔄 Plan updated, refreshing interface...");
@@ -193,7 +207,7 @@ const WorkoutLogsScreen = ({ navigation, user }) => {
         setExpandedDay(null);
         
         // Show update notification if not initial load
-        if (planVersion && isNewPlan) {
+        if (planVersion && isNewPlan && addedWeeks) {
           Alert.alert(
             '🔄 Workout Plan Updated!',
             'Your workout plan has been updated with new exercises and progressions.',
@@ -217,9 +231,13 @@ const WorkoutLogsScreen = ({ navigation, user }) => {
     
     try {
       console.log(`🔄 Fetching progress for user: ${user.uid}`);
-      const response = await fetch(`${BACKEND_URL}/workout/progress/${user.uid}?v=${Date.now()}`);
+      const headers = progressEtagRef.current ? { 'If-None-Match': progressEtagRef.current } : {};
+      const response = await fetch(`${BACKEND_URL}/workout/progress/${user.uid}`, { headers });
       
-      if (response.ok) {
+      if (response.status === 304) {
+        console.log("✅ Progress unchanged");
+      } else if (response.ok) {
+        progressEtagRef.current = response.headers.get('ETag');
         const data = await response.json();
         console.log("✅ Received progress data:", data);
         setWorkoutProgress(data.progress);
@@ -330,19 +348,19 @@ const WorkoutLogsScreen = ({ navigation, user }) => {
         clearInterval(activeWorkout.intervalId);
       }
 
-      // Collect completed exercises data
-      const completedExercises = activeWorkout.exercises
-        .filter(ex => ex.completed)
-        .map(ex => ({
-          name: ex.name,
-          sets: ex.sets,
-          reps: ex.reps,
-          completed: true,
-          notes: ex.notes || ''
-        }));
+      // Collect the session's exercises (completion flags and log in one request)
+      const sessionExercises = activeWorkout.exercises.map(ex => ({
+        id: ex.id,
+        name: ex.name,
+        sets: ex.sets,
+        reps: ex.reps,
+        completed: !!ex.completed,
+        notes: ex.notes || ''
+      }));
+      const completedExercises = sessionExercises.filter(ex => ex.completed);
 
       // Submit workout log
-      const response = await fetch(`${BACKEND_URL}/workout/day/complete`, {
+      const response = await fetch(`${BACKEND_URL}/workout/exercises/completion`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
@@ -351,7 +369,7 @@ const WorkoutLogsScreen = ({ navigation, user }) => {
           day: activeWorkout.day,
           duration: Math.floor(workoutTimer / 60),
           notes: notes,
-          exercises: completedExercises
+          exercises: sessionExercises
         })
       });
 